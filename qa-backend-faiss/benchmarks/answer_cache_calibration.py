@@ -0,0 +1,97 @@
+"""답변 캐시 유사도 임계값 보정
+
+benchmarks/answer_cache_pairs.json 의 라벨된 질문 쌍(바꿔 말하기 / 주제만 겹치는 다른 질문)으로
+인코더 유사도를 계산하고, 임계값별 정밀도/재현율과 권장 임계값을 출력합니다.
+
+다른 질문에 캐시된 답변을 주는 쪽이 캐시 미스보다 훨씬 나쁘므로, 권장 임계값은
+오탐(false positive) 비율이 --max-fpr 이하인 가장 낮은 임계값입니다.
+
+    python -m benchmarks.answer_cache_calibration
+    python -m benchmarks.answer_cache_calibration --encoder model   # sentence-transformers 필요
+"""
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from typing import List, Dict, Any
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.answer_cache import HashingEncoder, SemanticAnswerCache  # noqa: E402
+
+PAIRS_PATH = Path(__file__).resolve().parent / "answer_cache_pairs.json"
+
+
+def load_pairs(path: Path = PAIRS_PATH) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["pairs"]
+
+
+def pair_similarities(encoder, pairs: List[Dict[str, Any]]) -> np.ndarray:
+    """쌍별 코사인 유사도 (SemanticAnswerCache와 같은 정규화)"""
+    cache = SemanticAnswerCache(encoder)
+    return np.array([float(cache.encode(pair["a"])[0] @ cache.encode(pair["b"])[0]) for pair in pairs])
+
+
+def evaluate(similarities: np.ndarray, labels: np.ndarray, threshold: float) -> Dict[str, float]:
+    predicted = similarities >= threshold
+    true_positive = int(np.sum(predicted & labels))
+    false_positive = int(np.sum(predicted & ~labels))
+    return {
+        "threshold": threshold,
+        "precision": true_positive / max(true_positive + false_positive, 1),
+        "recall": true_positive / max(int(labels.sum()), 1),
+        "fpr": false_positive / max(int((~labels).sum()), 1),
+        "false_positive": false_positive
+    }
+
+
+def calibrate_threshold(similarities: np.ndarray, labels: np.ndarray, max_fpr: float = 0.0) -> float:
+    """오탐 비율이 max_fpr 이하인 가장 낮은 임계값 (소수 둘째 자리로 올림)"""
+    negatives = np.sort(similarities[~labels])[::-1]
+    allowed = int(math.floor(max_fpr * len(negatives)))
+    if allowed >= len(negatives):
+        return 0.0
+    # allowed개보다 많은 오탐이 생기지 않도록 그 다음 음성 쌍 유사도보다 위로
+    return min(math.floor(negatives[allowed] * 100 + 1) / 100, 1.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="답변 캐시 임계값 보정")
+    parser.add_argument("--encoder", choices=["hashing", "model"], default="hashing")
+    parser.add_argument("--model-name", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--max-fpr", type=float, default=0.0, help="허용할 오탐 비율")
+    args = parser.parse_args()
+
+    if args.encoder == "model":
+        from models.embeddings import EmbeddingModel
+        encoder = EmbeddingModel(model_name=args.model_name)
+    else:
+        encoder = HashingEncoder()
+
+    pairs = load_pairs()
+    labels = np.array([bool(pair["paraphrase"]) for pair in pairs])
+    similarities = pair_similarities(encoder, pairs)
+    print(f"📊 {getattr(encoder, 'model_name', args.encoder)}: 쌍 {len(pairs)}개 "
+          f"(바꿔 말하기 {int(labels.sum())}, 다른 질문 {int((~labels).sum())})")
+
+    print(f"{'임계값':>6} {'정밀도':>7} {'재현율':>7} {'오탐율':>7}")
+    for threshold in np.arange(0.5, 1.0, 0.05):
+        result = evaluate(similarities, labels, round(float(threshold), 2))
+        print(f"{result['threshold']:>8.2f} {result['precision']:>9.3f} {result['recall']:>9.3f} {result['fpr']:>9.3f}")
+
+    print("\n가장 비슷한 다른 질문 쌍:")
+    for idx in np.argsort(-np.where(labels, -1.0, similarities))[:5]:
+        print(f"  {similarities[idx]:.3f}  {pairs[idx]['a']} | {pairs[idx]['b']}")
+
+    threshold = calibrate_threshold(similarities, labels, args.max_fpr)
+    result = evaluate(similarities, labels, threshold)
+    print(f"\n✅ 권장 임계값 {threshold:.2f} (정밀도 {result['precision']:.3f}, 재현율 {result['recall']:.3f}, "
+          f"오탐 {result['false_positive']}개)")
+
+
+if __name__ == "__main__":
+    main()
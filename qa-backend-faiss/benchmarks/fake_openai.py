@@ -0,0 +1,102 @@
+"""로컬 OpenAI chat completions 대역 서버 (부하 테스트용, 네트워크 불필요)
+
+    python -m benchmarks.fake_openai --port 9100 --latency 0.8 --jitter 0.2 --error-rate 0.01
+
+앱은 OPENAI_BASE_URL=http://127.0.0.1:9100/v1 로 이 서버를 호출합니다.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# 한국어 마크다운 답변과 비슷한 길이/형태의 고정 응답
+FAKE_ANSWER = (
+    "🔧 **점검 방법**\n\n"
+    "1. 차량을 평평한 곳에 세우고 시동을 꺼주세요.\n"
+    "2. 매뉴얼에 안내된 순서대로 상태를 확인해보세요.\n"
+    "3. 이상이 있으면 가까운 블루핸즈에서 점검을 받아주세요.\n\n"
+    "⚠️ **주의:** 작업 전 반드시 엔진이 충분히 식었는지 확인해주세요.\n"
+) * 3
+
+
+def create_app(latency: float, jitter: float, error_rate: float, chunk_delay: float) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    stats = {"requests": 0, "errors": 0}
+
+    async def simulated_latency():
+        await asyncio.sleep(max(0.0, random.gauss(latency, jitter)))
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        await simulated_latency()
+
+        if random.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse(status_code=500, content={
+                "error": {"message": "simulated upstream error", "type": "server_error"}
+            })
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "gpt-4o-mini")
+        created = int(time.time())
+
+        if body.get("stream"):
+            async def event_stream():
+                for i in range(0, len(FAKE_ANSWER), 20):
+                    chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": FAKE_ANSWER[i:i + 20]}, "finish_reason": None}]
+                    }
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(chunk_delay)
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": FAKE_ANSWER},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 900, "completion_tokens": 400, "total_tokens": 1300}
+        }
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="로컬 OpenAI 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.8, help="평균 응답 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="지연 표준편차(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 에러 비율 (0~1)")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="스트리밍 청크 간격(초)")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.jitter, args.error_rate, args.chunk_delay)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
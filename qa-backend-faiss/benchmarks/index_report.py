@@ -0,0 +1,96 @@
+"""FAISS 인덱스 종류별 recall / latency 비교 리포트
+
+저장된 벡터(data/vectors/faiss.index)를 복원해서 flat(정확 검색) 결과를 기준으로
+IVF, HNSW 인덱스의 recall@k 와 쿼리 지연 시간을 측정합니다.
+
+    python -m benchmarks.index_report --k 5 --queries 200
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.vector_store import FAISSVectorStore  # noqa: E402
+
+
+def make_queries(vectors: np.ndarray, count: int, noise: float, seed: int) -> np.ndarray:
+    """저장된 벡터에 잡음을 섞어 실제 질의와 비슷한 쿼리 생성"""
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), size=count)]
+    queries = picks + rng.normal(0, noise, size=picks.shape).astype('float32')
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def measure(index: faiss.Index, queries: np.ndarray, k: int):
+    """쿼리별 검색 결과 ID와 지연 시간(ms)"""
+    ids, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, indices = index.search(query[None, :].astype('float32'), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append(indices[0])
+    return np.array(ids), np.array(latencies)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f[f != -1]) & set(t[t != -1])) for f, t in zip(found, truth))
+    return hits / max(sum((t != -1).sum() for t in truth), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 종류별 recall/latency 리포트")
+    parser.add_argument("--index", default="./data/vectors/faiss.index", help="기준 벡터가 저장된 flat 인덱스")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # 저장소 파일을 건드리지 않도록 인덱스만 읽어서 벡터 복원
+    base_index = faiss.read_index(args.index)
+    if base_index.ntotal == 0:
+        print("❌ 저장된 벡터가 없습니다")
+        return
+    vectors = base_index.reconstruct_n(0, base_index.ntotal)
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    queries = make_queries(vectors, args.queries, args.noise, args.seed)
+    truth, flat_latency = measure(base_index, queries, args.k)
+
+    configs = [
+        ("flat", {}),
+        ("ivf", {"nprobe": 1}),
+        ("ivf", {"nprobe": 8}),
+        ("ivf", {"nprobe": 16}),
+        ("hnsw", {"ef_search": 16}),
+        ("hnsw", {"ef_search": 64}),
+    ]
+
+    print(f"📊 벡터 {len(vectors)}개, 쿼리 {len(queries)}개, k={args.k}")
+    print(f"{'index':<8}{'params':<28}{'build(ms)':>10}{'recall':>8}{'p50(ms)':>9}{'p95(ms)':>9}")
+
+    for index_type, params in configs:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = FAISSVectorStore(vectors.shape[1], tmp, index_type=index_type,
+                                     index_params=params, fsync=False)
+            start = time.perf_counter()
+            store._add_to_index(vectors)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            found, latency = measure(store.index, queries, args.k)
+            shown = {key: store.index_params[key] for key in ("nlist", "nprobe")} if index_type == "ivf" else \
+                    {key: store.index_params[key] for key in ("hnsw_m", "ef_search")} if index_type == "hnsw" else {}
+            print(f"{index_type:<8}{str(shown):<28}{build_ms:>10.1f}{recall_at_k(found, truth):>8.3f}"
+                  f"{np.percentile(latency, 50):>9.3f}{np.percentile(latency, 95):>9.3f}")
+
+    print(f"(기준 flat 지연: p50 {np.percentile(flat_latency, 50):.3f}ms)")
+
+
+if __name__ == "__main__":
+    main()
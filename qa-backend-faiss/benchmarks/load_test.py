@@ -0,0 +1,275 @@
+"""/ask 엔드투엔드 부하 테스트 (로컬 OpenAI 대역 서버 사용, 네트워크 불필요)
+
+세 개의 프로세스로 실행합니다.
+
+1. benchmarks.fake_openai  : 지연/지터/에러율/스트리밍을 설정할 수 있는 chat completions 대역
+2. 앱 서버 (--serve 모드)   : main.app + 이벤트 루프 지연 측정기, OPENAI_BASE_URL로 1번 호출
+3. 이 스크립트 (부하 생성기): 동시성 단계별로 요청 믹스를 재생하고 결과 집계
+
+    python -m benchmarks.load_test --concurrency 1,4,16,64 --duration 20
+    python -m benchmarks.load_test --mix ask=8,vehicles=1,health=1 --llm-latency 1.5 --llm-error-rate 0.02
+
+단계마다 처리량(req/s), 엔드포인트별 지연 p50/p95/p99, 상태 코드별 에러 수,
+앱 이벤트 루프 지연(p50/p99/max)을 출력합니다. 1 CPU 머신에서 측정하려면
+taskset -c 0 python -m benchmarks.load_test ... 처럼 세 프로세스를 한 코어에 묶으세요.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+import httpx
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.query_corpus import QUERIES  # noqa: E402
+
+LAG_PROBE_INTERVAL = 0.01  # 이벤트 루프 지연 측정 간격(초)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def parse_mix(mix: str) -> List[Tuple[str, float]]:
+    """'ask=8,vehicles=1,health=1' → [(엔드포인트, 가중치)]"""
+    weights = []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("ask", "vehicles", "health"):
+            raise ValueError(f"알 수 없는 요청 종류: {name}")
+        weights.append((name.strip(), float(weight or 1)))
+    return weights
+
+
+# ---------------------------------------------------------------------------
+# 앱 서버 프로세스 (--serve)
+# ---------------------------------------------------------------------------
+
+def serve(port: int):
+    """main.app에 이벤트 루프 지연 측정기를 붙여서 실행"""
+    import logging
+    import uvicorn
+
+    os.chdir(BACKEND_DIR)  # main은 ./data/processed 상대 경로를 사용
+    import main
+
+    lag_samples: List[float] = []
+
+    async def lag_probe():
+        # sleep이 예정보다 늦게 깨어난 만큼이 루프가 막혀 있던 시간
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lag_samples.append(time.perf_counter() - start - LAG_PROBE_INTERVAL)
+
+    async def start_probe():
+        asyncio.get_running_loop().create_task(lag_probe())
+
+    def take_lag_samples():
+        """지금까지 모은 지연 샘플(ms)을 돌려주고 비움"""
+        samples = [s * 1000 for s in lag_samples]
+        lag_samples.clear()
+        return {"lag_ms": samples}
+
+    main.app.router.on_startup.append(start_probe)
+    main.app.add_api_route("/__loadtest/lag", take_lag_samples, methods=["POST"])
+
+    logging.getLogger().setLevel(logging.WARNING)
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+# ---------------------------------------------------------------------------
+# 부하 생성기
+# ---------------------------------------------------------------------------
+
+def start_process(args: List[str], env: Dict[str, str], quiet: bool) -> subprocess.Popen:
+    output = subprocess.DEVNULL if quiet else None
+    return subprocess.Popen([sys.executable, *args], cwd=BACKEND_DIR, env=env, stdout=output, stderr=output)
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, timeout: float = 60.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.get(url)
+            if response.status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"서버가 준비되지 않았습니다: {url}")
+
+
+async def run_stage(client: httpx.AsyncClient, base_url: str, concurrency: int, duration: float,
+                    requests_per_stage: int, mix: List[Tuple[str, float]], vehicles: List[str],
+                    rng: random.Random) -> Dict[str, Any]:
+    """동시성 하나에 대해 요청 믹스 재생"""
+    kinds = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    latencies: Dict[str, List[float]] = {kind: [] for kind in kinds}
+    errors: Dict[str, int] = {}
+    issued = 0
+    deadline = time.perf_counter() + duration
+
+    def next_request():
+        nonlocal issued
+        if requests_per_stage and issued >= requests_per_stage:
+            return None
+        if not requests_per_stage and time.perf_counter() >= deadline:
+            return None
+        issued += 1
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "ask":
+            return kind, "POST", "/ask", {"q": rng.choice(QUERIES), "vehicle": rng.choice(vehicles)}
+        return kind, "GET", f"/{kind}", None
+
+    async def worker():
+        while True:
+            request = next_request()
+            if request is None:
+                return
+            kind, method, path, body = request
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, base_url + path, json=body)
+                status = str(response.status_code) if response.status_code >= 400 else None
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = (time.perf_counter() - start) * 1000
+            if status:
+                errors[status] = errors.get(status, 0) + 1
+            else:
+                latencies[kind].append(elapsed)
+
+    await client.post(base_url + "/__loadtest/lag")  # 이전 단계 샘플 비우기
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    lag = (await client.post(base_url + "/__loadtest/lag")).json()["lag_ms"]
+
+    completed = sum(len(values) for values in latencies.values())
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "concurrency": concurrency,
+        "seconds": wall,
+        "completed": completed,
+        "errors": errors,
+        "throughput": completed / wall if wall else 0.0,
+        "latency_ms": {
+            kind: {"p50": percentile(values, 50), "p95": percentile(values, 95),
+                   "p99": percentile(values, 99), "count": len(values)}
+            for kind, values in [("all", all_latencies), *latencies.items()] if values
+        },
+        "loop_lag_ms": {"p50": percentile(lag, 50), "p99": percentile(lag, 99),
+                        "max": max(lag) if lag else 0.0, "samples": len(lag)}
+    }
+
+
+def print_stage(result: Dict[str, Any]):
+    lag = result["loop_lag_ms"]
+    errors = ", ".join(f"{status}×{count}" for status, count in result["errors"].items()) or "없음"
+    print(f"\n⚡ 동시성 {result['concurrency']}: {result['completed']}건 / {result['seconds']:.1f}s "
+          f"= {result['throughput']:.1f} req/s, 에러 {errors}")
+    for kind, stats in result["latency_ms"].items():
+        print(f"  {kind:<9}: p50 {stats['p50']:8.1f}ms  p95 {stats['p95']:8.1f}ms  "
+              f"p99 {stats['p99']:8.1f}ms  ({stats['count']}건)")
+    print(f"  루프 지연 : p50 {lag['p50']:.1f}ms  p99 {lag['p99']:.1f}ms  max {lag['max']:.1f}ms")
+
+
+async def drive(args, app_url: str) -> List[Dict[str, Any]]:
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    max_concurrency = max(int(c) for c in args.concurrency.split(","))
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+        await wait_ready(client, app_url + "/health")
+        vehicles = (await client.get(app_url + "/vehicles")).json()["available_vehicles"]
+        if args.vehicles:
+            vehicles = [v for v in args.vehicles.split(",") if v in vehicles]
+        if not vehicles:
+            raise RuntimeError("로드된 매뉴얼이 없습니다 (data/processed 확인)")
+        print(f"🚗 대상 차량: {vehicles}")
+
+        results = []
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            result = await run_stage(client, app_url, concurrency, args.duration, args.requests,
+                                     mix, vehicles, rng)
+            print_stage(result)
+            results.append(result)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/ask 엔드투엔드 부하 테스트")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--concurrency", default="1,4,16,64", help="동시성 단계 (쉼표 구분)")
+    parser.add_argument("--duration", type=float, default=15.0, help="단계별 실행 시간(초)")
+    parser.add_argument("--requests", type=int, default=0, help="단계별 요청 수 (지정하면 --duration 대신 사용)")
+    parser.add_argument("--mix", default="ask=8,vehicles=1,health=1", help="요청 종류별 가중치")
+    parser.add_argument("--vehicles", help="질문할 차량 (영문, 쉼표 구분, 기본은 로드된 전체)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="요청 타임아웃(초)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="대역 서버 평균 지연(초)")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="대역 서버 지연 표준편차(초)")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="대역 서버 500 에러 비율")
+    parser.add_argument("--llm-chunk-delay", type=float, default=0.01, help="스트리밍 청크 간격(초)")
+    parser.add_argument("--answer-cache", action="store_true", help="답변 캐시 켜기 (기본은 LLM 경로 측정을 위해 끔)")
+    parser.add_argument("--app-logs", action="store_true", help="앱/대역 서버 출력 표시")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    openai_port, app_port = free_port(), free_port()
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "loadtest",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+        "ENABLE_ANSWER_CACHE": "true" if args.answer_cache else "false",
+        "PYTHONUNBUFFERED": "1"
+    }
+
+    processes = [
+        start_process(["-m", "benchmarks.fake_openai", "--port", str(openai_port),
+                       "--latency", str(args.llm_latency), "--jitter", str(args.llm_jitter),
+                       "--error-rate", str(args.llm_error_rate), "--chunk-delay", str(args.llm_chunk_delay)],
+                      env, quiet=not args.app_logs),
+        start_process(["-m", "benchmarks.load_test", "--serve", str(app_port)], env, quiet=not args.app_logs)
+    ]
+
+    print(f"🧪 LLM 대역: 지연 {args.llm_latency}s ± {args.llm_jitter}s, 에러율 {args.llm_error_rate}, "
+          f"믹스 {args.mix}")
+    try:
+        results = asyncio.run(drive(args, f"http://127.0.0.1:{app_port}"))
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""검색 벤치마크용 고정 질문 코퍼스
+
+차량 관리 주제 × 질문 패턴 조합으로 만든 실제 사용자 질문 형태의 한국어 질문 목록과,
+매뉴얼마다 그 차량에만 있는 기능(하이브리드/전기차/구동 방식 등)을 묻는 질문 목록입니다.
+순서와 내용이 항상 같아야 golden 결과와 비교할 수 있으므로 무작위 요소를 쓰지 않습니다.
+"""
+from typing import List, Dict
+
+TOPICS = [
+    "타이어 공기압", "타이어 교체", "타이어 펑크", "타이어 마모", "스페어 타이어",
+    "엔진오일", "엔진오일 교체", "냉각수", "브레이크 오일", "브레이크 패드",
+    "배터리", "배터리 방전", "12V 배터리", "와이퍼", "와셔액",
+    "에어컨 필터", "에어컨", "히터", "전조등", "방향지시등",
+    "퓨즈", "스마트 키", "시동", "원격 시동", "주차 브레이크",
+    "전자식 파킹 브레이크", "크루즈 컨트롤", "차로 유지 보조", "후방 카메라", "주차 보조",
+    "내비게이션", "블루투스", "시트 조절", "시트 열선", "안전벨트",
+    "에어백", "차일드 시트", "트렁크", "연료 주입구", "주유",
+    "충전", "경고등", "엔진 경고등", "TPMS", "차량 점검",
+    "정기 점검", "세차", "겨울철 관리", "견인", "비상 경고등",
+]
+
+# {subject}: 주제 + 받침에 맞는 주격 조사 (배터리가 / 에어컨이)
+TEMPLATES = [
+    "{topic} 확인 방법",
+    "{topic} 어떻게 해?",
+    "{topic} 점검은 어떻게 하나요?",
+    "{topic} 교체 주기는?",
+    "{topic} 문제가 생기면 어떻게 해야 하나요",
+    "{topic} 주의사항 알려줘",
+    "{topic} 사용법",
+    "{subject} 작동 안 해요",
+]
+
+# 매뉴얼 모델명(파일명에서 연식/접미사를 뗀 부분)별 전용 질문: 해당 매뉴얼에만 있는 섹션을 겨냥
+VEHICLE_QUERIES: Dict[str, List[str]] = {
+    "그랜저": [
+        "LPI 차량 사용 시 주의사항",
+        "전방 예측 변속 기능이 뭐예요?",
+        "4WD 사륜구동 작동 방식",
+        "액티브 사운드 디자인 설정",
+        "안전 하차 경고 SEW 기능",
+        "중립 주행 코스팅 기능 끄는 법",
+    ],
+    "그랜저 Hybrid": [
+        "12V 리튬 보조 배터리 비상 시동 방법",
+        "하이브리드 차량 화재 발생 시 응급조치",
+        "액티브 로드 노이즈 컨트롤이 뭐예요?",
+        "밀폐된 공간에서 시동 걸어도 되나요?",
+        "지능형 코스팅 중립 제어",
+        "하이브리드 배터리 관리 방법",
+    ],
+    "싼타페": [
+        "HTRAC 4륜구동 사용법",
+        "듀얼 와이드 선루프 여는 법",
+        "DCT 더블 클러치 변속기 오일 점검",
+        "ISG 스마트 공회전 제한 끄기",
+        "테일게이트 잠금 유지 기능",
+        "전자식 변속 칼럼 조작 방법",
+    ],
+    "쏘나타 Hybrid": [
+        "12V 배터리 비상 시동 버튼 위치",
+        "하이브리드 사고 및 화재 발생 시 조치사항",
+        "스티어링 휠 높이 조절",
+        "와이퍼 워셔 작동 방법",
+        "하이브리드 EV 모드 주행",
+        "회생 제동 단계 조절",
+    ],
+    "아반떼": [
+        "N Line 차량 내부 구성",
+        "LPI 차량 관리 요령",
+        "Smartstream G1.6 엔진 사양",
+        "드라이브 모드 변경 방법",
+        "번호판등 전구 교체",
+        "눈길 빙판길 주행 요령",
+    ],
+    "코나": [
+        "IVT 변속기 오일 점검",
+        "통합주행 모드 4WD 사용법",
+        "지능형 공기유동제어기가 뭐예요?",
+        "와이드 선루프 작동 방법",
+        "ISG 스마트 공회전 제한 시스템",
+        "전자식 변속 다이얼 사용법",
+    ],
+    "코나 Electric": [
+        "전기차 충전 도어 여는 법",
+        "V2L 전기 사용 기능 활용하기",
+        "12V 배터리 세이버 기능",
+        "감속기 오일 점검 주기",
+        "프론트 트렁크 여는 방법",
+        "전기차 시동이 안 걸릴 때 대처 방법",
+    ],
+    "투싼": [
+        "디젤 엔진 연료 필터 교체",
+        "터보차저 엔진 주의사항",
+        "전방 충돌방지 보조 FCA 센서퓨전",
+        "DCT 변속기 오일 점검",
+        "차대 번호 VIN 위치",
+        "주차 충돌방지 보조 PCA 끄기",
+    ],
+    "투싼 Hybrid": [
+        "HTRAC 4륜구동 모드",
+        "주차 충돌방지 보조 PCA 작동 조건",
+        "하이브리드 화재 발생 시 조치사항",
+        "차대 번호 VIN 확인 방법",
+        "하이브리드 시스템 경고등",
+        "회생 제동 패들 시프트 사용법",
+    ],
+    "팰리세이드 Hybrid": [
+        "디지털 키 사용하기",
+        "지문 인증 시스템 등록 방법",
+        "빌트인 캠 녹화 영상 보기",
+        "스마트 자세 제어 시스템",
+        "트레일러 견인 시 주의사항",
+        "운전석 자세 메모리 저장",
+        "어드밴스드 후석 승객 알림",
+    ],
+}
+
+# 받침이 있게 읽히는 영문자/숫자 (엘, 엠, 엔, 알 / 영, 일, 삼, 육, 칠, 팔)
+FINAL_CONSONANT_LETTERS = set("lmnr013678")
+
+
+def has_final_consonant(word: str) -> bool:
+    """마지막 글자를 읽었을 때 받침이 있는지"""
+    last = word.rstrip()[-1]
+    if "가" <= last <= "힣":
+        return (ord(last) - ord("가")) % 28 != 0
+    return last.lower() in FINAL_CONSONANT_LETTERS
+
+
+def with_subject_particle(word: str) -> str:
+    """받침에 맞는 주격 조사 붙이기 (에어컨이 / 배터리가)"""
+    return f"{word}{'이' if has_final_consonant(word) else '가'}"
+
+
+def build_queries() -> List[str]:
+    """주제 × 패턴 조합 질문 (400개, 모든 매뉴얼 공통)"""
+    return [template.format(topic=topic, subject=with_subject_particle(topic))
+            for topic in TOPICS for template in TEMPLATES]
+
+
+def manual_model(manual: str) -> str:
+    """매뉴얼 파일명(stem) → 모델명 ('코나 Electric_2025_structured' → '코나 Electric')"""
+    return manual.split("_", 1)[0]
+
+
+def queries_for_manual(manual: str) -> List[str]:
+    """공통 질문 + 해당 매뉴얼 전용 질문"""
+    return QUERIES + VEHICLE_QUERIES.get(manual_model(manual), [])
+
+
+QUERIES = build_queries()
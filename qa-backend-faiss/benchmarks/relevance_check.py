@@ -0,0 +1,86 @@
+"""키워드 검색 관련도 검사 (랭킹 가중치를 바꿀 때 golden 갱신 전에 실행)
+
+golden 비교는 랭킹이 "바뀌었는지"만 알려주므로, 가중치 변경이 실제로 나아졌는지는
+고정 질문 코퍼스의 주제로 관련 섹션을 정해서 따로 측정합니다.
+
+- 관련 섹션: 제목 토큰(analyze)에 질문 주제의 토큰이 모두 들어 있는 섹션
+- 매뉴얼에 관련 섹션이 하나도 없는 (주제, 매뉴얼)은 제외
+- hit@1: top-1이 관련 섹션인 비율, MRR@k: 첫 관련 섹션 순위의 역수 평균
+
+    python -m benchmarks.relevance_check
+    python -m benchmarks.relevance_check --by-template
+"""
+import argparse
+import collections
+import contextlib
+import os
+import sys
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.query_corpus import TOPICS, TEMPLATES, with_subject_particle  # noqa: E402
+from benchmarks.retrieval_bench import load_manuals  # noqa: E402
+from models.section_store import analyze  # noqa: E402
+from services.simple_search import SimpleSearchService  # noqa: E402
+
+
+def labeled_queries() -> List[Tuple[str, str, str]]:
+    """(질문, 주제, 패턴) 목록 (query_corpus.build_queries와 같은 순서)"""
+    return [(template.format(topic=topic, subject=with_subject_particle(topic)), topic, template)
+            for topic in TOPICS for template in TEMPLATES]
+
+
+def relevant_sections(json_data: Dict[str, Any], topic: str) -> set:
+    topic_tokens = set(analyze(topic))
+    return {section["section_number"] for section in json_data["sections"]
+            if topic_tokens <= set(analyze(section.get("title", "")))}
+
+
+def check(manuals: Dict[str, Dict[str, Any]], data_dir: Path, k: int) -> Dict[str, Dict[str, float]]:
+    """패턴별 / 전체 hit@1, MRR@k"""
+    totals: Dict[str, List[float]] = collections.defaultdict(lambda: [0, 0.0, 0.0])
+    queries = labeled_queries()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for json_data in manuals.values():
+            service = SimpleSearchService(data_path=str(data_dir))
+            service.add_document(json_data)
+            relevant_by_topic = {topic: relevant_sections(json_data, topic) for topic in TOPICS}
+
+            for query, topic, template in queries:
+                relevant = relevant_by_topic[topic]
+                if not relevant:
+                    continue
+                ranked = [result["section_number"] for result in service.search_sections(query, k=k)]
+                rank = next((i + 1 for i, number in enumerate(ranked) if number in relevant), None)
+                for key in (template, "전체"):
+                    totals[key][0] += 1
+                    totals[key][1] += 1.0 if rank == 1 else 0.0
+                    totals[key][2] += 1.0 / rank if rank else 0.0
+
+    return {key: {"queries": count, "hit@1": hits / count, "mrr": rr / count}
+            for key, (count, hits, rr) in totals.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="키워드 검색 관련도 검사")
+    parser.add_argument("--data", default="./data/processed/")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--by-template", action="store_true", help="질문 패턴별 결과도 출력")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data)
+    results = check(load_manuals(data_dir), data_dir, args.k)
+
+    keys = (list(TEMPLATES) if args.by_template else []) + ["전체"]
+    for key in keys:
+        result = results.get(key)
+        if result:
+            print(f"{key:<32} 질문 {result['queries']:>5}  hit@1 {result['hit@1']:.3f}  "
+                  f"MRR@{args.k} {result['mrr']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""검색 서비스 벤치마크 (속도 + 랭킹 회귀 검사)
+
+data/processed의 모든 매뉴얼을 로드해서 고정 질문 코퍼스(benchmarks/query_corpus.py)를
+SimpleSearchService / JSONSearchService에 재생하고 다음을 측정합니다.
+
+- 매뉴얼별 인덱스 빌드 시간 (add_document)
+- 질문별 지연 시간 p50 / p95 / p99
+- 질문별 메모리 할당 peak (tracemalloc, 지연 측정과 별도 패스)
+- golden top-k 결과 대비 랭킹 변화 (benchmarks/golden/*.json)
+
+    python -m benchmarks.retrieval_bench                  # 측정 + golden 비교
+    python -m benchmarks.retrieval_bench --update-golden  # 의도한 랭킹 변경 후 golden 갱신
+
+랭킹 가중치를 바꾼 경우 golden을 갱신하기 전에 benchmarks.relevance_check로 관련도가
+나아졌는지 확인합니다.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.query_corpus import QUERIES, queries_for_manual  # noqa: E402
+from services.simple_search import SimpleSearchService  # noqa: E402
+
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+
+
+class RandomProjectionEncoder:
+    """임베딩 모델이 없을 때 JSONSearchService 지연 측정용 인코더 (랭킹 품질은 의미 없음)"""
+
+    model_name = "random-projection"
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def encode_query(self, query: str) -> np.ndarray:
+        seed = int.from_bytes(query.encode("utf-8")[:8].ljust(8, b"\0"), "little") ^ len(query)
+        return np.random.default_rng(seed).standard_normal((1, self.dimension)).astype(np.float32)
+
+
+def load_manuals(data_dir: Path) -> Dict[str, Dict[str, Any]]:
+    manuals = {}
+    for json_file in sorted(data_dir.glob("*.json")):
+        with open(json_file, "r", encoding="utf-8") as f:
+            json_data = json.load(f)
+        if "sections" in json_data:
+            manuals[json_file.stem] = json_data
+    return manuals
+
+
+def make_service(kind: str, encoder, data_dir: Path):
+    if kind == "simple":
+        return SimpleSearchService(data_path=str(data_dir))
+    from services.json_search_service import JSONSearchService
+    return JSONSearchService(encoder, data_path=str(data_dir))
+
+
+def result_key(result: Dict[str, Any]):
+    return result["section_number"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def bench_service(kind: str, manuals: Dict[str, Dict[str, Any]], limit: int, k: int,
+                  encoder, data_dir: Path, measure_alloc: bool) -> Dict[str, Any]:
+    """서비스 하나에 대해 모든 매뉴얼 × (공통 + 매뉴얼 전용) 질문 재생"""
+    report = {"build_ms": {}, "latency_ms": [], "alloc_kb": [], "rankings": {}}
+
+    # 서비스 내부 print가 측정을 흐리지 않도록 버림 (실제 서버에서는 stdout 비용이 추가됨)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name, json_data in manuals.items():
+            service = make_service(kind, encoder, data_dir)
+            start = time.perf_counter()
+            service.add_document(json_data)
+            report["build_ms"][name] = (time.perf_counter() - start) * 1000
+
+            if kind == "json" and not service.embeddings_cached:
+                continue
+
+            queries = queries_for_manual(name)
+            queries = queries[:limit] if limit else queries
+
+            rankings = {}
+            for query in queries:
+                start = time.perf_counter()
+                results = service.search_sections(query, k=k)
+                report["latency_ms"].append((time.perf_counter() - start) * 1000)
+                rankings[query] = [result_key(r) for r in results]
+            report["rankings"][name] = rankings
+
+            if measure_alloc:
+                tracemalloc.start()
+                for query in queries:
+                    tracemalloc.reset_peak()
+                    before = tracemalloc.get_traced_memory()[0]
+                    service.search_sections(query, k=k)
+                    report["alloc_kb"].append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+                tracemalloc.stop()
+
+    return report
+
+
+def compare_golden(kind: str, rankings: Dict[str, Dict[str, List[Any]]], k: int) -> Optional[Dict[str, Any]]:
+    """golden top-k와 비교 (top-1 변경 수, 평균 top-k 겹침 비율)"""
+    golden_path = GOLDEN_DIR / f"{kind}.json"
+    if not golden_path.exists():
+        return None
+
+    with open(golden_path, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+
+    compared, top1_changed, overlap_sum, examples = 0, 0, 0.0, []
+    for manual, queries in golden.items():
+        for query, expected in queries.items():
+            actual = rankings.get(manual, {}).get(query)
+            if actual is None:
+                continue
+            compared += 1
+            expected, actual = expected[:k], actual[:k]
+            if (expected[:1] or [None]) != (actual[:1] or [None]):
+                top1_changed += 1
+                if len(examples) < 5:
+                    examples.append(f"{manual} / {query}: {expected[:1]} → {actual[:1]}")
+            if expected:
+                overlap_sum += len(set(expected) & set(actual)) / len(expected)
+            else:
+                overlap_sum += 1.0 if not actual else 0.0
+
+    return {
+        "compared": compared,
+        "top1_changed": top1_changed,
+        "mean_topk_overlap": overlap_sum / compared if compared else 1.0,
+        "examples": examples
+    }
+
+
+def write_golden(kind: str, rankings: Dict[str, Dict[str, List[Any]]]):
+    """질문 하나당 한 줄로 저장 (랭킹 변경 시 diff를 읽기 쉽게)"""
+    GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+    manual_blocks = []
+    for manual in sorted(rankings):
+        lines = [f"    {json.dumps(query, ensure_ascii=False)}: {json.dumps(top)}"
+                 for query, top in rankings[manual].items()]
+        manual_blocks.append(f"  {json.dumps(manual, ensure_ascii=False)}: {{\n" + ",\n".join(lines) + "\n  }")
+    with open(GOLDEN_DIR / f"{kind}.json", "w", encoding="utf-8") as f:
+        f.write("{\n" + ",\n".join(manual_blocks) + "\n}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 서비스 벤치마크")
+    parser.add_argument("--data", default="./data/processed/")
+    parser.add_argument("--services", default="simple,json", help="simple,json 중 선택 (쉼표 구분)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=0, help="질문 수 제한 (0이면 전체)")
+    parser.add_argument("--no-alloc", action="store_true", help="메모리 할당 측정 생략")
+    parser.add_argument("--update-golden", action="store_true")
+    parser.add_argument("--max-top1-changes", type=int, default=0, help="허용할 top-1 변경 수")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data)
+    manuals = load_manuals(data_dir)
+
+    # JSONSearchService용 인코더: 실제 모델이 있으면 사용, 없으면 지연 측정만
+    encoder, real_encoder = None, False
+    if "json" in args.services:
+        try:
+            from models.embeddings import EmbeddingModel
+            encoder, real_encoder = EmbeddingModel(query_cache_bytes=0), True
+        except ImportError:
+            encoder = RandomProjectionEncoder()
+            print("⚠️ sentence-transformers가 없어 JSONSearchService는 지연 시간만 측정합니다 (랭킹 검사 생략)")
+
+    vehicle_queries = sum(len(queries_for_manual(name)) - len(QUERIES) for name in manuals)
+    print(f"📊 매뉴얼 {len(manuals)}개 × 공통 질문 {args.limit or len(QUERIES)}개 + 전용 질문 {vehicle_queries}개, k={args.k}")
+    summary, regressed = {}, False
+
+    for kind in [s.strip() for s in args.services.split(",") if s.strip()]:
+        report = bench_service(kind, manuals, args.limit, args.k, encoder, data_dir, not args.no_alloc)
+        latency = report["latency_ms"]
+        build = list(report["build_ms"].values())
+
+        print(f"\n🔍 {kind}")
+        print(f"  빌드   : 합계 {sum(build):.1f}ms, 매뉴얼당 평균 {np.mean(build) if build else 0:.1f}ms")
+        print(f"  지연   : p50 {percentile(latency, 50):.3f}ms  p95 {percentile(latency, 95):.3f}ms  "
+              f"p99 {percentile(latency, 99):.3f}ms  ({len(latency)}회)")
+        if report["alloc_kb"]:
+            print(f"  할당   : 평균 {np.mean(report['alloc_kb']):.1f}KB  p95 {percentile(report['alloc_kb'], 95):.1f}KB")
+
+        ranking_checked = kind == "simple" or real_encoder
+        golden = None
+        if ranking_checked and args.update_golden:
+            write_golden(kind, report["rankings"])
+            print(f"  golden : {GOLDEN_DIR / (kind + '.json')} 갱신")
+        elif ranking_checked:
+            golden = compare_golden(kind, report["rankings"], args.k)
+            if golden is None:
+                print("  golden : 없음 (--update-golden 으로 생성)")
+            else:
+                print(f"  golden : {golden['compared']}개 비교, top-1 변경 {golden['top1_changed']}개, "
+                      f"top-{args.k} 평균 겹침 {golden['mean_topk_overlap']:.3f}")
+                for example in golden["examples"]:
+                    print(f"    - {example}")
+                if golden["top1_changed"] > args.max_top1_changes:
+                    regressed = True
+
+        summary[kind] = {
+            "build_ms": report["build_ms"],
+            "latency_ms": {"p50": percentile(latency, 50), "p95": percentile(latency, 95),
+                           "p99": percentile(latency, 99), "count": len(latency)},
+            "alloc_kb": {"mean": float(np.mean(report["alloc_kb"])) if report["alloc_kb"] else None,
+                         "p95": percentile(report["alloc_kb"], 95)},
+            "golden": golden
+        }
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    if regressed:
+        print("\n❌ 랭킹 회귀 감지: golden 대비 top-1 변경이 허용치를 넘었습니다")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,139 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Literal, Tuple
+import asyncio
+import functools
 import os
 import json
 import logging
 from dotenv import load_dotenv
 from pathlib import Path
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
+from services.logging_config import (
+    setup_logging, fields, log_sampled, get_logging_stats, RequestContextMiddleware
+)
+
+# 환경 변수 로딩
+load_dotenv()
+
+# 로깅 설정 (큐 기반 비동기 핸들러: stdout 쓰기는 별도 스레드, 질문별 상세 로그는 LOG_SAMPLE_RATE 비율만)
+setup_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    output_format=os.getenv("LOG_FORMAT", "text"),  # text / json
+    sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "0.05")),
+    queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+)
 logger = logging.getLogger(__name__)
 
 # 🚀 간단한 모듈 import (임베딩 모델 제거)
 try:
     from services.simple_search import SimpleSearchService
     from services.answer_generator import AnswerGenerator
+    from services.answer_cache import HashingEncoder, SemanticAnswerCache, HASHING_ENCODER_THRESHOLD
+    from services.profiling import install_profiler, track_thread
+    from services.shared_index import SharedIndexRegistry
+    from models.section_store import SECTION_STORE
+    from models.prefix_index import PrefixIndex
+    from models.sentence_index import SentenceIndex
+    from services.warmup import WarmupState, run_warmup, parse_warmup_queries
+    from services.conversation import ConversationStore, conversational_search
+    from services.admission import AdmissionLimiter
+    from services.http_responses import FastJSONResponse, StaticPayloadCache, compressed_json_response
+    from services.metrics import (
+        REGISTRY, ASK_STAGE_SECONDS, ASK_REQUESTS, ERRORS, CACHE_LOOKUPS, CACHE_HIT_RATIO, SUGGEST_SECONDS,
+        ADMISSION_IN_FLIGHT, ADMISSION_QUEUED, LOAD_SHED, SEARCH_SECONDS
+    )
+    from services.search_api import query_fingerprint, encode_cursor, decode_cursor, format_search_results
+    from services.vehicles import (
+        SUPPORTED_VEHICLES, FRONTEND_VEHICLES, map_vehicle_to_backend, map_vehicle_to_frontend, extract_vehicle_name
+    )
+    from services.shard_ring import HashRing, parse_nodes
     logger.info("✅ 모든 모듈 임포트 성공")
 except ImportError as e:
     logger.error(f"❌ 모듈 임포트 실패: {e}")
     raise
 
-# 환경 변수 로딩
-load_dotenv()
-
 # 환경 변수에서 포트 정보 가져오기
 PORT = int(os.getenv("PORT", "8080"))
 HOST = os.getenv("HOST", "0.0.0.0")
 
+# 🧠 임베딩 기반 검색 (선택 사항: sentence-transformers 설치 + ENABLE_EMBEDDINGS=true 인 경우만)
+ENABLE_EMBEDDINGS = os.getenv("ENABLE_EMBEDDINGS", "false").lower() == "true"
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")
+QUERY_CACHE_BYTES = int(os.getenv("QUERY_CACHE_BYTES", str(8 * 1024 * 1024)))
+QUERY_CACHE_PATH = os.getenv("QUERY_CACHE_PATH") or None  # 설정하면 재시작 후에도 쿼리 캐시 유지
+
+# 💬 유사 질문 답변 캐시 (임계값은 인코더에 따라 다름: 해싱 인코더 0.6, 임베딩 모델 0.9 권장)
+ENABLE_ANSWER_CACHE = os.getenv("ENABLE_ANSWER_CACHE", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = os.getenv("ANSWER_CACHE_THRESHOLD")
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+
+# 🔬 요청별 프로파일링 (PROFILE_SECRET이 있을 때만: X-Profile-Token 헤더 또는 ?profile= 로 켬)
+PROFILE_SECRET = os.getenv("PROFILE_SECRET")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./data/profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+
+# 🗂️ 워커 간 공유 인덱스 (uvicorn --workers N / WEB_CONCURRENCY): 빈 값이면 워커별 메모리 인덱스
+SHARED_INDEX_DIR = os.getenv("SHARED_INDEX_DIR", "./data/shared")
+SHARED_INDEX_POLL_SECONDS = float(os.getenv("SHARED_INDEX_POLL_SECONDS", "1"))
+
+# 🔥 콜드 스타트 워밍업 (끝나야 /ready가 200): WARMUP_QUERIES는 '|'로 구분, 빈 값이면 질문 재생 생략
+ENABLE_WARMUP = os.getenv("ENABLE_WARMUP", "true").lower() == "true"
+WARMUP_QUERIES = parse_warmup_queries(os.getenv("WARMUP_QUERIES"))
+
+# 🗨️ 후속 질문 검색 (conversation_id를 보낸 경우만): 최근 턴의 섹션 후보를 먼저 채점
+ENABLE_CONVERSATIONS = os.getenv("ENABLE_CONVERSATIONS", "true").lower() == "true"
+CONVERSATION_TTL_SECONDS = float(os.getenv("CONVERSATION_TTL_SECONDS", "1800"))
+CONVERSATION_MAX_SESSIONS = int(os.getenv("CONVERSATION_MAX_SESSIONS", "10000"))
+CONVERSATION_TURNS = int(os.getenv("CONVERSATION_TURNS", "3"))
+FOLLOWUP_MIN_COVERAGE = float(os.getenv("FOLLOWUP_MIN_COVERAGE", "0.5"))  # 질문 주제어가 후보에 나오는 비율
+
+# 답변 방식: auto(OpenAI 키가 있으면 llm, 없으면 extractive) / llm / extractive(LLM 없이 문장 추출, 수 ms)
+ANSWER_MODE = os.getenv("ANSWER_MODE", "auto").lower()
+
+# /ask 단계별 동시 실행 제한 (0이면 제한 없음): 검색이 넘치면 429, LLM이 넘치면 추출형 답변으로 대체
+RETRIEVAL_MAX_CONCURRENCY = int(os.getenv("RETRIEVAL_MAX_CONCURRENCY", "4"))
+RETRIEVAL_MAX_QUEUE = int(os.getenv("RETRIEVAL_MAX_QUEUE", "64"))
+RETRIEVAL_QUEUE_TIMEOUT = float(os.getenv("RETRIEVAL_QUEUE_TIMEOUT", "2"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "1"))
+SHED_RETRY_AFTER = os.getenv("SHED_RETRY_AFTER", "1")  # 429 응답의 Retry-After (초)
+
+# /search 페이지네이션 상한 (offset + k가 이보다 크면 다음 페이지 없음)
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "200"))
+
+# 🧩 차량 샤딩 (라우터와 같은 값: 노드 주소 목록, 이 노드 주소, 차량당 담당 노드 수)
+SHARD_NODES = parse_nodes(os.getenv("SHARD_NODES"))
+SHARD_SELF = os.getenv("SHARD_SELF", "").rstrip("/") or None
+SHARD_REPLICAS = int(os.getenv("SHARD_REPLICAS", "2"))
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "64"))
+
+# 📦 /, /vehicles 캐시 헤더 (업로드 시 ETag가 바뀌므로 짧게 두고 재검증)
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "60"))
+
+if ENABLE_EMBEDDINGS:
+    try:
+        from models.embeddings import EmbeddingModel
+        from services.json_search_service import JSONSearchService
+        from services.embedding_builder import EmbeddingBuilder, EmbeddingJobQueue
+        logger.info("✅ 임베딩 모듈 임포트 성공")
+    except ImportError as e:
+        logger.warning(f"⚠️ 임베딩 모듈을 사용할 수 없어 키워드 검색만 사용합니다: {e}")
+        ENABLE_EMBEDDINGS = False
+
 logger.info(f"🚀 서버 설정: {HOST}:{PORT}")
 
 # FastAPI 앱 초기화
 app = FastAPI(
     title="현대자동차 매뉴얼 QA API (Simple)",
     description="키워드 기반 매뉴얼 질의응답 시스템",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS 설정
@@ -49,38 +148,59 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "X-Profile-Path", "ETag", "X-Answer-Mode"],
 )
 
-# 프론트엔드와 백엔드 차량명 매핑
-VEHICLE_MAPPING = {
-    "GRANDEUR": "그랜저",
-    "SANTAFE": "싼타페",
-    "SONATA": "쏘나타",
-    "AVANTE": "아반떼", 
-    "KONA": "코나",
-    "TUCSON": "투싼",
-    "PALISADE": "펠리세이드"
-}
-
-# 백엔드 -> 프론트엔드 (역방향 매핑)
-REVERSE_VEHICLE_MAPPING = {v: k for k, v in VEHICLE_MAPPING.items()}
-
-# 지원하는 차량 목록 (백엔드 기준)
-SUPPORTED_VEHICLES = [
-    "그랜저", "싼타페", "쏘나타", "아반떼", "코나", "투싼", "펠리세이드"
-]
-
-# 프론트엔드에 보낼 차량 목록 (영문)
-FRONTEND_VEHICLES = list(VEHICLE_MAPPING.keys())
-
-# 전역 변수 (임베딩 모델 제거)
+# 요청별 프로파일링 (비밀값이 없으면 등록하지 않음) - 요청 ID를 쓰므로 아래 미들웨어보다 안쪽
+if install_profiler(app, PROFILE_SECRET, PROFILE_DIR, PROFILE_INTERVAL_MS):
+    logger.info(f"🔬 요청 프로파일링 활성화 (저장 위치: {PROFILE_DIR})")
+
+# 요청별 상관관계 ID (X-Request-ID) + 로그 샘플링 결정
+app.add_middleware(RequestContextMiddleware)
+
+# 🧩 차량 샤딩 (SHARD_NODES/SHARD_SELF를 설정하면 이 노드가 담당하는 차량만 로드, router.py가 요청을 나눔)
+shard_ring = HashRing(SHARD_NODES, SUPPORTED_VEHICLES, vnodes=SHARD_VNODES, replicas=SHARD_REPLICAS) \
+    if SHARD_NODES and SHARD_SELF else None
+SHARD_VEHICLES = shard_ring.shard(SHARD_SELF) if shard_ring else list(SUPPORTED_VEHICLES)
+if shard_ring:
+    if SHARD_SELF not in SHARD_NODES:
+        logger.warning(f"⚠️ SHARD_SELF({SHARD_SELF})가 SHARD_NODES에 없어 담당 차량이 없습니다.")
+    logger.info(f"🧩 샤드 노드 {SHARD_SELF}: 담당 차량 {SHARD_VEHICLES} (노드 {len(SHARD_NODES)}개, 복제 {shard_ring.replicas})")
+
+# 전역 변수
 vehicle_search_services = {}  # 차량별 검색 서비스
+suggest_indexes = {}  # 차량별 자동완성 접두어 인덱스 (매뉴얼 로드/업로드 시 생성)
+sentence_indexes = {}  # 차량별 추출형 답변용 문장 인덱스 (매뉴얼 로드/업로드 시 생성)
 answer_generator = None
+embedding_model = None  # ENABLE_EMBEDDINGS일 때만 사용
+embedding_jobs = None  # 임베딩 빌드 작업 큐
+answer_cache = None  # 유사 질문 답변 캐시
+shared_indexes = None  # 워커 간 공유 섹션 인덱스
+warmup_state = WarmupState()  # /ready 판단용
+conversations = ConversationStore(
+    max_sessions=CONVERSATION_MAX_SESSIONS,
+    ttl_seconds=CONVERSATION_TTL_SECONDS,
+    max_turns=CONVERSATION_TURNS
+) if ENABLE_CONVERSATIONS else None  # 대화별 최근 검색 섹션
+retrieval_limiter = AdmissionLimiter("retrieval", RETRIEVAL_MAX_CONCURRENCY, RETRIEVAL_MAX_QUEUE, RETRIEVAL_QUEUE_TIMEOUT)
+llm_limiter = AdmissionLimiter("llm", LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT)
+static_payloads = StaticPayloadCache(max_age=CATALOG_MAX_AGE)  # 업로드 전까지 고정인 응답 (/, /vehicles, /health 고정 부분)
 
 # 요청/응답 모델
 class Question(BaseModel):
     q: str
     vehicle: Optional[str] = None
+    conversation_id: Optional[str] = Field(None, max_length=128)  # 같은 대화의 후속 질문이면 같은 값
+    answer_mode: Optional[Literal["auto", "llm", "extractive"]] = None  # 없으면 ANSWER_MODE
+
+class SearchRequest(BaseModel):
+    q: str = Field(..., min_length=1)
+    vehicle: str
+    k: int = Field(10, ge=1, le=50)  # 페이지 크기
+    min_score: float = Field(0.05, ge=0.0)  # 이 점수를 넘는 섹션만
+    cursor: Optional[str] = None  # 이전 응답의 next_cursor
+    content: Literal["snippet", "full", "none"] = "snippet"
+    snippet_chars: int = Field(200, ge=20, le=2000)
 
 class QuestionResponse(BaseModel):
     answer: str
@@ -92,22 +212,15 @@ class UploadResponse(BaseModel):
     filename: str
     vehicle: str
     sections_count: int
+    embedding_job_id: Optional[str] = None
 
 class VehicleListResponse(BaseModel):
     vehicles: List[str]
     available_vehicles: List[str]
 
-def map_vehicle_to_backend(frontend_vehicle: str) -> str:
-    """프론트엔드 차량명을 백엔드 차량명으로 매핑"""
-    return VEHICLE_MAPPING.get(frontend_vehicle, frontend_vehicle)
-
-def map_vehicle_to_frontend(backend_vehicle: str) -> str:
-    """백엔드 차량명을 프론트엔드 차량명으로 매핑"""
-    return REVERSE_VEHICLE_MAPPING.get(backend_vehicle, backend_vehicle)
-
 # 초기화 함수 (매우 간단)
 async def initialize_services():
-    global answer_generator
+    global answer_generator, embedding_model, embedding_jobs, answer_cache, shared_indexes
     
     try:
         # 데이터 디렉토리 생성
@@ -115,9 +228,42 @@ async def initialize_services():
         data_dir.mkdir(parents=True, exist_ok=True)
         logger.info(f"✅ 데이터 디렉토리 생성: {data_dir.absolute()}")
         
+        # 🗂️ 공유 인덱스 저장소 (먼저 시작한 워커가 만들고 나머지는 메모리 맵으로 연결)
+        if SHARED_INDEX_DIR:
+            shared_indexes = SharedIndexRegistry(SHARED_INDEX_DIR, poll_interval=SHARED_INDEX_POLL_SECONDS,
+                                                 vehicles=SHARD_VEHICLES if shard_ring else None)
+            logger.info(f"✅ 공유 인덱스 사용: {SHARED_INDEX_DIR}")
+
         # 답변 생성기만 초기화 (임베딩 모델 제거)
-        answer_generator = AnswerGenerator()
+        answer_generator = AnswerGenerator(llm_threads=LLM_MAX_CONCURRENCY or 32)
         logger.info("✅ 답변 생성기 초기화 완료")
+
+        # 🧠 임베딩 모델 + 백그라운드 빌드 큐 (선택 사항)
+        if ENABLE_EMBEDDINGS:
+            embedding_model = EmbeddingModel(
+                query_cache_bytes=QUERY_CACHE_BYTES,
+                query_cache_path=QUERY_CACHE_PATH
+            )
+            builder = EmbeddingBuilder(
+                embedding_model,
+                cache_dir=str(data_dir / "embeddings"),
+                batch_size=EMBEDDING_BATCH_SIZE,
+                workers=EMBEDDING_WORKERS,
+                cache_dtype=EMBEDDING_CACHE_DTYPE
+            )
+            embedding_jobs = EmbeddingJobQueue(builder, on_complete=upgrade_to_vector_search)
+            logger.info(f"✅ 임베딩 빌드 큐 초기화 완료 (배치 {EMBEDDING_BATCH_SIZE}, 워커 {EMBEDDING_WORKERS})")
+
+        # 💬 답변 캐시 (임베딩 모델이 없으면 가벼운 해싱 인코더 사용)
+        if ENABLE_ANSWER_CACHE:
+            encoder = embedding_model or HashingEncoder()
+            default_threshold = 0.9 if embedding_model else HASHING_ENCODER_THRESHOLD
+            answer_cache = SemanticAnswerCache(
+                encoder,
+                threshold=float(ANSWER_CACHE_THRESHOLD or default_threshold),
+                max_entries_per_vehicle=ANSWER_CACHE_SIZE
+            )
+            logger.info(f"✅ 답변 캐시 초기화 완료 (임계값 {answer_cache.threshold})")
         
         # 기존 JSON 파일들 로드
         await load_existing_manuals()
@@ -140,19 +286,28 @@ async def load_existing_manuals():
     # JSON 파일들 로드
     for json_file in data_dir.glob("*.json"):
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-            
             # 차량명 추출
             vehicle_name = extract_vehicle_name(json_file.stem)
             
-            if vehicle_name and vehicle_name in SUPPORTED_VEHICLES:
+            if vehicle_name and vehicle_name not in SHARD_VEHICLES:
+                logger.info(f"🧩 {vehicle_name}: 다른 노드 담당이라 로드하지 않음 ({json_file.name})")
+            elif vehicle_name and vehicle_name in SUPPORTED_VEHICLES:
+                # 공유 인덱스가 이미 있으면 JSON을 읽지 않음 (임베딩 빌드에는 원본 필요)
+                json_data = None
+                if embedding_jobs or not shared_indexes:
+                    with open(json_file, 'r', encoding='utf-8') as f:
+                        json_data = json.load(f)
+
                 # 🚀 간단한 검색 서비스 생성
-                search_service = SimpleSearchService()
-                search_service.add_document(json_data)
+                search_service = create_search_service(vehicle_name, json_file, json_data)
                 vehicle_search_services[vehicle_name] = search_service
+                update_manual_indexes(vehicle_name, search_service)
+
+                # 🧠 임베딩 캐시가 있으면 바로 벡터 검색, 없으면 백그라운드 빌드
+                if embedding_jobs and not upgrade_to_vector_search(vehicle_name, json_data):
+                    embedding_jobs.submit(vehicle_name, json_data)
                 
-                sections_count = len(json_data.get("sections", []))
+                sections_count = len(search_service.sections_data)
                 logger.info(f"✅ {vehicle_name} 매뉴얼 로드 완료: {json_file.name} ({sections_count}개 섹션)")
             else:
                 logger.warning(f"⚠️ 인식되지 않은 차량: {json_file.name}")
@@ -160,30 +315,108 @@ async def load_existing_manuals():
         except Exception as e:
             logger.error(f"❌ {json_file} 로드 실패: {e}")
 
-def extract_vehicle_name(filename: str) -> str:
-    """파일명에서 차량명 추출 (간단 버전)"""
-    filename_lower = filename.lower()
-    
-    for vehicle in SUPPORTED_VEHICLES:
-        if vehicle in filename_lower:
-            return vehicle
-        
-        # 영문명도 확인
-        english_names = {
-            "그랜저": ["grandeur", "granzer"],
-            "싼타페": ["santafe", "santa"],
-            "쏘나타": ["sonata"],
-            "아반떼": ["avante", "elantra"],
-            "코나": ["kona"],
-            "투싼": ["tucson"],
-            "펠리세이드": ["palisade"]
+    refresh_static_payloads()
+
+def create_search_service(vehicle_name: str, json_file: Path,
+                          json_data: Optional[Dict[str, Any]] = None) -> SimpleSearchService:
+    """키워드 검색 서비스 생성 (공유 인덱스를 쓰면 다른 워커와 같은 메모리 맵 인덱스에 연결)"""
+    search_service = SimpleSearchService()
+    if not shared_indexes:
+        search_service.add_document(json_data)
+        return search_service
+
+    if shared_indexes.publish_file(vehicle_name, json_file, json_data) is None:
+        raise ValueError("sections 필드가 없습니다.")
+    file_name, index = shared_indexes.get(vehicle_name)
+    search_service.attach_index(index, file_name)
+    return search_service
+
+def update_manual_indexes(vehicle_name: str, search_service: SimpleSearchService):
+    """매뉴얼 부가 인덱스: 자동완성(제목/키워드/본문 빈출어) + 추출형 답변용 문장 인덱스(워밍업/첫 사용 때 생성)
+    (섹션 순서가 같으므로 벡터 검색으로 전환해도 그대로 사용)"""
+    suggest_indexes[vehicle_name] = PrefixIndex.from_section_index(search_service.index)
+    sentence_indexes[vehicle_name] = SentenceIndex.from_section_index(search_service.index)
+
+def resolve_answer_mode(requested: Optional[str]) -> str:
+    """실제로 쓸 답변 방식 (llm은 OpenAI 키가 있을 때만, 없으면 extractive)"""
+    mode = requested or ANSWER_MODE
+    if mode != "extractive" and answer_generator.openai_available:
+        return "llm"
+    return "extractive"
+
+def load_shared_index_updates() -> List[Dict[str, Any]]:
+    """다른 워커가 업로드한 매뉴얼의 검색 서비스/부가 인덱스 생성 (스레드풀에서 실행, 전역 상태는 건드리지 않음)
+
+    임베딩을 쓰는 워커는 매뉴얼 JSON도 읽어서, 임베딩 캐시가 있으면 벡터 검색 서비스까지 만듭니다.
+    """
+    updates = []
+    for vehicle in shared_indexes.refresh(force=True):
+        file_name, index = shared_indexes.get(vehicle)
+        search_service = SimpleSearchService()
+        search_service.attach_index(index, file_name)
+        update = {
+            "vehicle": vehicle,
+            "search_service": search_service,
+            "prefix_index": PrefixIndex.from_section_index(search_service.index),
+            "sentence_index": SentenceIndex.from_section_index(search_service.index),
+            "vector_service": None,
+            "json_data": None
         }
-        
-        for eng_name in english_names.get(vehicle, []):
-            if eng_name in filename_lower:
-                return vehicle
-    
-    return None
+        if embedding_jobs:
+            with open(Path("./data/processed") / shared_indexes.source_file(vehicle), 'r', encoding='utf-8') as f:
+                update["json_data"] = json.load(f)
+            update["vector_service"] = build_vector_service(update["json_data"])
+        updates.append(update)
+    return updates
+
+def apply_shared_index_updates(updates: List[Dict[str, Any]]):
+    """새로 만든 인덱스로 교체 (이벤트 루프에서 await 없이 한 번에: 핸들러는 교체 전이나 후의 스냅샷만 봄)
+
+    벡터 검색을 쓰던 워커는 키워드 검색으로 내려간 채 남지 않도록, 임베딩 캐시가 아직 없으면
+    임베딩 빌드를 제출해서 끝나면 벡터 검색으로 다시 전환합니다.
+    """
+    for update in updates:
+        vehicle = update["vehicle"]
+        vehicle_search_services[vehicle] = update["vector_service"] or update["search_service"]
+        suggest_indexes[vehicle] = update["prefix_index"]
+        sentence_indexes[vehicle] = update["sentence_index"]
+        if answer_cache:
+            answer_cache.invalidate(vehicle)
+        logger.info(f"🔄 {vehicle} 공유 인덱스 갱신 감지 (다른 워커 업로드)")
+
+        if embedding_jobs and update["vector_service"] is None:
+            job_id = embedding_jobs.submit(vehicle, update["json_data"])
+            logger.info(f"🧠 {vehicle} 임베딩 빌드 제출 (job {job_id})")
+
+    if updates:
+        refresh_static_payloads()
+
+async def poll_shared_indexes():
+    """SHARED_INDEX_POLL_SECONDS마다 manifest를 확인해서 다른 워커가 업로드한 매뉴얼로 교체
+    (인덱스 생성/메모리 맵 연결은 스레드풀에서, 요청 핸들러는 현재 인덱스를 읽기만 함)"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(SHARED_INDEX_POLL_SECONDS)
+        try:
+            apply_shared_index_updates(await loop.run_in_executor(None, load_shared_index_updates))
+        except Exception as e:
+            logger.exception("❌ 공유 인덱스 갱신 중 오류", extra=fields(error=str(e)))
+
+def build_vector_service(json_data: Dict[str, Any]) -> Optional["JSONSearchService"]:
+    """임베딩 캐시가 준비되어 있으면 벡터 검색 서비스 생성 (없으면 None, 인코딩은 하지 않음)"""
+    vector_service = JSONSearchService(embedding_model, cache_dtype=EMBEDDING_CACHE_DTYPE)
+    vector_service.add_document(json_data)
+    return vector_service if vector_service.embeddings_cached else None
+
+def upgrade_to_vector_search(vehicle_name: str, json_data: Dict[str, Any]) -> bool:
+    """임베딩 캐시가 준비된 차량의 검색 서비스를 벡터 검색으로 교체"""
+    vector_service = build_vector_service(json_data)
+    if vector_service is None:
+        return False
+
+    vehicle_search_services[vehicle_name] = vector_service
+    logger.info(f"✅ {vehicle_name} 벡터 검색으로 전환")
+    return True
 
 def generate_vehicle_filename(vehicle_name: str) -> str:
     """차량명을 파일명으로 변환"""
@@ -196,17 +429,44 @@ async def startup_event():
     success = await initialize_services()
     if not success:
         logger.error("⚠️ 서비스 초기화 실패")
+        warmup_state.finish(error="서비스 초기화 실패")
     else:
         logger.info("✅ 서비스 초기화 완료")
+        # 워밍업은 요청을 받기 시작한 뒤 백그라운드에서 (그동안 /health는 200, /ready는 503)
+        app.state.warmup_task = asyncio.create_task(warmup_services())
+        if shared_indexes:
+            app.state.shared_index_task = asyncio.create_task(poll_shared_indexes())
+
+async def warmup_services():
+    """import / LLM 연결 / 인덱스 / 캐시 / 대표 질문 재생 후 ready 표시"""
+    warmup_state.start()
+    if ENABLE_WARMUP:
+        logger.info(f"🔥 워밍업 시작 (대표 질문 {len(WARMUP_QUERIES)}개)")
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, run_warmup, warmup_state, vehicle_search_services, answer_generator,
+                answer_cache, WARMUP_QUERIES, True, sentence_indexes
+            )
+        except Exception as e:
+            logger.exception("❌ 워밍업 중 오류", extra=fields(error=str(e)))
+    warmup_state.finish()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if getattr(app.state, "shared_index_task", None):
+        app.state.shared_index_task.cancel()
+    if embedding_jobs:
+        embedding_jobs.shutdown()
+    if answer_generator:
+        answer_generator.shutdown()
+    if embedding_model:
+        embedding_model.save_query_cache()
 
 # API 엔드포인트들
-@app.get("/")
-def root():
-    available_vehicles_frontend = [
-        map_vehicle_to_frontend(vehicle) 
-        for vehicle in vehicle_search_services.keys()
-    ]
-    
+def available_frontend_vehicles() -> List[str]:
+    return [map_vehicle_to_frontend(vehicle) for vehicle in vehicle_search_services.keys()]
+
+def build_root_payload() -> Dict[str, Any]:
     return {
         "message": "현대자동차 매뉴얼 QA 시스템 v3.0 (Simple)",
         "status": "healthy",
@@ -216,40 +476,31 @@ def root():
             "port": PORT
         },
         "supported_vehicles": FRONTEND_VEHICLES,
-        "available_vehicles": available_vehicles_frontend,
+        "available_vehicles": available_frontend_vehicles(),
         "backend_vehicles": list(vehicle_search_services.keys()),
         "endpoints": {
             "차량 목록": "GET /vehicles",
             "JSON 업로드": "POST /upload_json/{vehicle}",
+            "임베딩 빌드 상태": "GET /embedding_jobs/{job_id}",
             "질문하기": "POST /ask", 
-            "건강상태": "GET /health"
+            "자동완성": "GET /suggest?vehicle={vehicle}&prefix={prefix}",
+            "건강상태": "GET /health",
+            "준비상태": "GET /ready",
+            "메트릭": "GET /metrics"
         }
     }
 
-@app.get("/vehicles", response_model=VehicleListResponse)
-def get_vehicles():
-    """지원하는 차량 목록과 사용 가능한 차량 목록 반환"""
-    available_vehicles_frontend = [
-        map_vehicle_to_frontend(vehicle) 
-        for vehicle in vehicle_search_services.keys()
-    ]
-    
-    return VehicleListResponse(
-        vehicles=FRONTEND_VEHICLES,
-        available_vehicles=available_vehicles_frontend
-    )
+def build_vehicles_payload() -> Dict[str, Any]:
+    return {
+        "vehicles": FRONTEND_VEHICLES,
+        "available_vehicles": available_frontend_vehicles()
+    }
 
-@app.get("/health")
-def health_check():
-    available_vehicles_frontend = [
-        map_vehicle_to_frontend(vehicle) 
-        for vehicle in vehicle_search_services.keys()
-    ]
-    
+def build_health_payload() -> Dict[str, Any]:
+    available_vehicles_frontend = available_frontend_vehicles()
     return {
         "status": "healthy",
         "search_method": "keyword_matching",
-        "answer_generator_ready": answer_generator is not None,
         "supported_vehicles": len(FRONTEND_VEHICLES),
         "available_vehicles": len(available_vehicles_frontend),
         "loaded_manuals": available_vehicles_frontend,
@@ -260,6 +511,48 @@ def health_check():
         }
     }
 
+def refresh_static_payloads():
+    """차량 목록이 바뀌었을 때 (로드/업로드/벡터 검색 전환) 미리 만든 응답 무효화"""
+    static_payloads.invalidate()
+
+@app.get("/")
+def root(if_none_match: Optional[str] = Header(None)):
+    return static_payloads.response("root", build_root_payload, if_none_match)
+
+@app.get("/vehicles", response_model=VehicleListResponse)
+def get_vehicles(if_none_match: Optional[str] = Header(None)):
+    """지원하는 차량 목록과 사용 가능한 차량 목록 반환 (ETag로 재검증)"""
+    return static_payloads.response("vehicles", build_vehicles_payload, if_none_match)
+
+@app.get("/health")
+def health_check():
+    # 차량 정보는 미리 만든 고정 부분 재사용, 캐시/로깅 통계만 매번 계산
+    return {
+        **static_payloads.get_object("health", build_health_payload),
+        "answer_generator_ready": answer_generator is not None,
+        "query_cache": embedding_model.get_query_cache_stats() if embedding_model else None,
+        "answer_cache": answer_cache.get_stats() if answer_cache else None,
+        "logging": get_logging_stats(),
+        "shared_index": shared_indexes.get_stats() if shared_indexes else None,
+        "conversations": conversations.get_stats() if conversations else None,
+        "section_store": SECTION_STORE.get_stats(),
+        "admission": {limiter.stage: limiter.get_stats() for limiter in (retrieval_limiter, llm_limiter)},
+        "shard": {
+            "node": SHARD_SELF,
+            "nodes": len(SHARD_NODES),
+            "vehicles": [map_vehicle_to_frontend(vehicle) for vehicle in SHARD_VEHICLES]
+        } if shard_ring else None
+    }
+
+@app.get("/ready")
+def readiness_check():
+    """워밍업까지 끝났는지 (/health는 프로세스 생존 여부만): 준비 전에는 503"""
+    state = warmup_state.snapshot()
+    state["available_vehicles"] = len(vehicle_search_services)
+    if not warmup_state.ready:
+        return FastJSONResponse(state, status_code=503, headers={"Retry-After": "1"})
+    return state
+
 # JSON 업로드 엔드포인트
 @app.post("/upload_json/{vehicle}", response_model=UploadResponse)
 async def upload_json(vehicle: str, file: UploadFile = File(...)):
@@ -269,6 +562,9 @@ async def upload_json(vehicle: str, file: UploadFile = File(...)):
     
     if backend_vehicle not in SUPPORTED_VEHICLES:
         raise HTTPException(status_code=400, detail=f"지원하지 않는 차량입니다. 지원 차량: {FRONTEND_VEHICLES}")
+
+    if backend_vehicle not in SHARD_VEHICLES:
+        raise HTTPException(status_code=421, detail=f"'{vehicle}'는 이 노드 담당이 아닙니다. 담당 노드: {shard_ring.owners(backend_vehicle)}")
     
     if not file.filename.endswith('.json'):
         raise HTTPException(status_code=400, detail="JSON 파일만 업로드 가능합니다.")
@@ -290,12 +586,20 @@ async def upload_json(vehicle: str, file: UploadFile = File(...)):
         with open(save_path, 'w', encoding='utf-8') as f:
             json.dump(json_data, f, ensure_ascii=False, indent=2)
         
-        # 🚀 간단한 검색 서비스 생성
-        search_service = SimpleSearchService()
-        search_service.add_document(json_data)
+        # 🚀 간단한 검색 서비스 생성 (공유 인덱스면 다른 워커에도 publish)
+        search_service = create_search_service(backend_vehicle, save_path, json_data)
         vehicle_search_services[backend_vehicle] = search_service
+        update_manual_indexes(backend_vehicle, search_service)
+        refresh_static_payloads()
+
+        # 매뉴얼이 바뀌었으므로 이전 답변 캐시 제거
+        if answer_cache:
+            answer_cache.invalidate(backend_vehicle)
         
         sections_count = len(json_data.get("sections", []))
+
+        # 🧠 임베딩은 백그라운드에서 빌드 후 벡터 검색으로 전환
+        job_id = embedding_jobs.submit(backend_vehicle, json_data) if embedding_jobs else None
         
         logger.info(f"✅ {backend_vehicle} 매뉴얼 업로드 완료: {filename}")
         logger.info(f"   📊 섹션 수: {sections_count}")
@@ -304,7 +608,8 @@ async def upload_json(vehicle: str, file: UploadFile = File(...)):
             message=f"'{vehicle}' 매뉴얼 업로드 완료! (키워드 검색 방식)",
             filename=filename,
             vehicle=vehicle,
-            sections_count=sections_count
+            sections_count=sections_count,
+            embedding_job_id=job_id
         )
         
     except json.JSONDecodeError:
@@ -313,19 +618,139 @@ async def upload_json(vehicle: str, file: UploadFile = File(...)):
         logger.error(f"❌ JSON 파일 처리 중 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"JSON 파일 처리 중 오류: {str(e)}")
 
+# 임베딩 빌드 작업 상태 조회
+@app.get("/embedding_jobs/{job_id}")
+def get_embedding_job(job_id: str):
+    if not embedding_jobs:
+        raise HTTPException(status_code=404, detail="임베딩 빌드가 활성화되어 있지 않습니다.")
+
+    job = embedding_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
+    return job
+
+# ⌨️ 입력 중 자동완성 (키 입력마다 호출: 스레드풀을 거치지 않도록 async)
+@app.get("/suggest")
+async def suggest(vehicle: str, prefix: str = "", limit: int = Query(8, ge=1, le=20)):
+    backend_vehicle = map_vehicle_to_backend(vehicle)
+    prefix_index = suggest_indexes.get(backend_vehicle)
+    if prefix_index is None:
+        raise HTTPException(status_code=404, detail=f"'{vehicle}' 매뉴얼을 찾을 수 없습니다.")
+
+    with SUGGEST_SECONDS.time():
+        suggestions = prefix_index.suggest(prefix, limit)
+
+    # 같은 매뉴얼이면 결과가 같으므로 브라우저에서 잠시 재사용
+    return FastJSONResponse(
+        {"vehicle": vehicle, "prefix": prefix, "suggestions": suggestions},
+        headers={"Cache-Control": f"public, max-age={CATALOG_MAX_AGE}"}
+    )
+
+# 🔎 검색 전용 (답변 생성 없이 순위 섹션만: 분석/QA 도구용)
+@app.get("/search")
+async def search_get(q: str = Query(..., min_length=1), vehicle: str = Query(...),
+                     k: int = Query(10, ge=1, le=50), min_score: float = Query(0.05, ge=0.0),
+                     cursor: Optional[str] = None,
+                     content: Literal["snippet", "full", "none"] = "snippet",
+                     snippet_chars: int = Query(200, ge=20, le=2000),
+                     accept_encoding: Optional[str] = Header(None)):
+    request = SearchRequest(q=q, vehicle=vehicle, k=k, min_score=min_score, cursor=cursor,
+                            content=content, snippet_chars=snippet_chars)
+    return await run_search(request, accept_encoding)
+
+@app.post("/search")
+async def search_post(request: SearchRequest, accept_encoding: Optional[str] = Header(None)):
+    return await run_search(request, accept_encoding)
+
+async def run_search(request: SearchRequest, accept_encoding: Optional[str]) -> Response:
+    """순위 섹션 한 페이지 (커서에는 offset만: 다음 페이지는 같은 검색을 다시 실행해 이어서 반환)"""
+    backend_vehicle = map_vehicle_to_backend(request.vehicle)
+    search_service = vehicle_search_services.get(backend_vehicle)
+    if search_service is None:
+        raise HTTPException(status_code=404, detail=f"'{request.vehicle}' 매뉴얼을 찾을 수 없습니다.")
+
+    fingerprint = query_fingerprint(backend_vehicle, request.q, request.min_score)
+    try:
+        offset = decode_cursor(request.cursor, fingerprint)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    end = min(offset + request.k, SEARCH_MAX_RESULTS)
+    results = []
+    if offset < end:
+        # /ask와 같은 검색 단계 제한 사용
+        if not await retrieval_limiter.acquire():
+            shed_request("retrieval")
+        try:
+            with SEARCH_SECONDS.time():
+                # 다음 페이지가 있는지 보려고 하나 더
+                results = await asyncio.get_running_loop().run_in_executor(None, track_thread(functools.partial(
+                    search_service.search_sections, request.q, k=end + 1, min_score=request.min_score
+                )))
+        finally:
+            retrieval_limiter.release()
+
+    has_more = len(results) > end and end < SEARCH_MAX_RESULTS
+    return compressed_json_response({
+        "vehicle": request.vehicle,
+        "query": request.q,
+        "k": request.k,
+        "min_score": request.min_score,
+        "results": format_search_results(results[offset:end], request.q, offset,
+                                         request.content, request.snippet_chars),
+        "next_cursor": encode_cursor(end, fingerprint) if has_more else None
+    }, accept_encoding)
+
+# 📈 Prometheus 형식 메트릭
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    # 캐시 적중률은 스크랩 시점의 캐시 통계에서 계산
+    if answer_cache:
+        CACHE_HIT_RATIO.set("answer", value=answer_cache.get_stats()["hit_rate"])
+    if embedding_model:
+        CACHE_HIT_RATIO.set("query_embedding", value=embedding_model.get_query_cache_stats().get("hit_rate", 0.0))
+    for limiter in (retrieval_limiter, llm_limiter):
+        ADMISSION_IN_FLIGHT.set(limiter.stage, value=limiter.active)
+        ADMISSION_QUEUED.set(limiter.stage, value=limiter.waiting)
+
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def serialize_answer(answer: str, vehicle: str, sources: List[Dict[str, Any]],
+                     accept_encoding: Optional[str]) -> Response:
+    """QuestionResponse 형태로 직접 직렬화 + 압축 협상 (단계별 메트릭에서 직렬화 시간을 따로 측정)"""
+    with ASK_STAGE_SECONDS.time("serialization"):
+        return compressed_json_response(
+            {"answer": answer, "vehicle": vehicle, "sources": sources},
+            accept_encoding
+        )
+
+def shed_request(stage: str, vehicle_label: Optional[str] = None):
+    """과부하로 거절 (429 + Retry-After: 클라이언트가 잠시 뒤 재시도)"""
+    LOAD_SHED.inc(stage, "rejected")
+    if vehicle_label:
+        ASK_REQUESTS.inc(vehicle_label, "shed")
+    raise HTTPException(status_code=429, detail="요청이 많아 잠시 후 다시 시도해주세요.",
+                        headers={"Retry-After": SHED_RETRY_AFTER})
+
 # 질문 응답 엔드포인트
 @app.post("/ask", response_model=QuestionResponse)
-async def ask_question(item: Question):
+async def ask_question(item: Question, accept_encoding: Optional[str] = Header(None)):
     """키워드 기반 질문 응답"""
     
     if not item.vehicle:
+        ASK_REQUESTS.inc("none", "bad_request")
         raise HTTPException(status_code=400, detail="차량을 선택해주세요.")
     
-    backend_vehicle = map_vehicle_to_backend(item.vehicle)
+    with ASK_STAGE_SECONDS.time("vehicle_mapping"):
+        backend_vehicle = map_vehicle_to_backend(item.vehicle)
+        vehicle_loaded = backend_vehicle in vehicle_search_services
+    # 지원하지 않는 차량명은 라벨 수가 늘어나지 않도록 하나로 묶음
+    vehicle_label = item.vehicle if backend_vehicle in SUPPORTED_VEHICLES else "unknown"
     
-    logger.info(f"🔍 {item.vehicle} ({backend_vehicle}) 매뉴얼에서 키워드 검색 시작: '{item.q}'")
+    log_sampled(logger, "🔍 질문 수신", vehicle=item.vehicle, backend_vehicle=backend_vehicle, question=item.q)
     
-    if backend_vehicle not in vehicle_search_services:
+    if not vehicle_loaded:
+        ASK_REQUESTS.inc(vehicle_label, "not_found")
         available_vehicles_frontend = [
             map_vehicle_to_frontend(vehicle) 
             for vehicle in vehicle_search_services.keys()
@@ -336,28 +761,79 @@ async def ask_question(item: Question):
         )
     
     if not answer_generator:
+        ASK_REQUESTS.inc(vehicle_label, "unavailable")
         raise HTTPException(status_code=503, detail="답변 생성기가 초기화되지 않았습니다.")
     
+    # 🚦 검색 단계 입장 제한 (검색 없이는 어떤 답변도 만들 수 없으므로 넘치면 바로 429)
+    if not await retrieval_limiter.acquire():
+        shed_request("retrieval", vehicle_label)
+
     try:
-        # 🚀 키워드 기반 검색
+        # 🚀 키워드 기반 검색 (스레드풀에서: 검색 중에도 이벤트 루프는 다른 요청을 받음)
         search_service = vehicle_search_services[backend_vehicle]
-        results = search_service.search_sections(item.q, k=3)
+        try:
+            with ASK_STAGE_SECONDS.time("retrieval"):
+                results, retrieval_mode = await asyncio.get_running_loop().run_in_executor(None, track_thread(functools.partial(
+                    conversational_search, search_service, conversations, item.conversation_id,
+                    backend_vehicle, item.q, k=3, min_coverage=FOLLOWUP_MIN_COVERAGE
+                )))
+        finally:
+            retrieval_limiter.release()
         
         if not results:
-            return QuestionResponse(
-                answer=f"'{item.vehicle}' 매뉴얼에서 관련 정보를 찾을 수 없습니다.",
-                vehicle=item.vehicle,
-                sources=[]
+            ASK_REQUESTS.inc(vehicle_label, "no_results")
+            return serialize_answer(
+                f"'{item.vehicle}' 매뉴얼에서 관련 정보를 찾을 수 없습니다.",
+                item.vehicle, [], accept_encoding
             )
         
-        logger.info(f"📊 {backend_vehicle} 검색 결과: {len(results)}개 섹션 발견")
-        
         # 최고 점수 섹션으로 답변 생성
         best_section = results[0]
+        answer_mode = resolve_answer_mode(item.answer_mode)
+        sentence_index = sentence_indexes.get(backend_vehicle)
         
-        logger.info(f"🤖 답변 생성 중 - 섹션: {best_section['title']}")
-        
-        answer = await answer_generator.generate_answer(item.q, best_section)
+        # 💬 같은 섹션/의도로 이어지는 비슷한 질문이면 저장된 답변 재사용 (추출형은 캐시 조회보다 빠르므로 제외)
+        cached = None
+        if answer_cache and answer_mode == "llm":
+            intent = answer_generator.get_question_intent(item.q)
+            question_vector = answer_cache.encode(item.q)
+            cached = answer_cache.lookup(backend_vehicle, item.q, best_section, intent, question_vector)
+            CACHE_LOOKUPS.inc("answer", "hit" if cached else "miss")
+
+        # 🚦 generate_answer로 가는 요청은 모두 LLM 입장 제한 (추출형이어도 문장 인덱스가 없으면 generate_answer)
+        # 자리가 없으면 추출형 답변으로 대체하고, 문장 인덱스도 없으면 429
+        llm_admitted = False
+        if not cached and (answer_mode == "llm" or sentence_index is None):
+            llm_admitted = await llm_limiter.acquire()
+            if not llm_admitted:
+                if sentence_index is None:
+                    shed_request("llm", vehicle_label)
+                LOAD_SHED.inc("llm", "extractive")
+                answer_mode = "extractive"
+
+        if cached:
+            log_sampled(logger, "💬 답변 캐시 사용", similarity=round(cached["similarity"], 3),
+                        cached_question=cached["question"])
+            answer = cached["answer"]
+        elif answer_mode == "extractive" and sentence_index is not None:
+            log_sampled(logger, "⚡ 추출형 답변 생성", section=best_section["title"], results=len(results),
+                        retrieval=retrieval_mode)
+            if not sentence_index.built:
+                # 워밍업 전이나 업로드 직후: 문장 인덱스 생성(수백 ms)은 이벤트 루프 밖에서
+                await asyncio.get_running_loop().run_in_executor(None, track_thread(sentence_index.build))
+            answer = answer_generator.generate_extractive_answer(item.q, results, sentence_index)
+        else:
+            log_sampled(logger, "🤖 답변 생성", section=best_section["title"], results=len(results),
+                        retrieval=retrieval_mode)
+
+            try:
+                answer = await answer_generator.generate_answer(item.q, best_section)
+            finally:
+                if llm_admitted:
+                    llm_limiter.release()
+
+            if answer_cache and answer_mode == "llm" and answer != AnswerGenerator.OPENAI_ERROR_MESSAGE:
+                answer_cache.store(backend_vehicle, item.q, best_section, answer, intent, question_vector)
         
         # 소스 정보 구성
         sources = [
@@ -371,14 +847,20 @@ async def ask_question(item: Question):
             for result in results
         ]
         
-        return QuestionResponse(
-            answer=answer,
-            vehicle=item.vehicle,
-            sources=sources
-        )
+        outcome = "llm_error" if answer == AnswerGenerator.OPENAI_ERROR_MESSAGE else \
+            "cached" if cached else "answered" if answer_mode == "llm" else "extractive"
+        ASK_REQUESTS.inc(vehicle_label, outcome)
+        
+        response = serialize_answer(answer, item.vehicle, sources, accept_encoding)
+        response.headers["X-Answer-Mode"] = "cached" if cached else answer_mode
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ {backend_vehicle} 질문 처리 중 오류: {str(e)}")
+        ERRORS.inc("ask")
+        ASK_REQUESTS.inc(vehicle_label, "error")
+        logger.exception("❌ 질문 처리 중 오류", extra=fields(vehicle=backend_vehicle, error=str(e)))
         raise HTTPException(status_code=500, detail=f"질문 처리 중 오류: {str(e)}")
 
 # 메인 실행 부분
@@ -390,5 +872,6 @@ if __name__ == "__main__":
         host=HOST,
         port=PORT,
         reload=False,
-        log_level="info"
+        log_level="info",
+        log_config=None  # uvicorn 로그도 위의 큐 핸들러로 (동기 stdout 쓰기 방지)
     )
\ No newline at end of file
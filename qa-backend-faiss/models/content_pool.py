@@ -0,0 +1,136 @@
+import json
+import mmap
+import os
+import shutil
+import threading
+import weakref
+from pathlib import Path
+from typing import List, Dict, Iterable, Tuple
+
+import numpy as np
+
+from models.section_store import section_key
+
+# pack 디렉토리 구조: content.bin / content_lower.bin(고유 본문 UTF-8) + offsets.npy + keys.json(본문 해시)
+CONTENT_FILE = "content.bin"
+CONTENT_LOWER_FILE = "content_lower.bin"
+OFFSETS_FILE = "offsets.npy"
+KEYS_FILE = "keys.json"
+
+
+class ContentPack:
+    """한 번 쓰면 바뀌지 않는 고유 본문 묶음 (읽기 전용 메모리 맵)"""
+
+    def __init__(self, directory: Path):
+        self.name = directory.name
+        self._files = []
+        mapped = []
+        for file_name in (CONTENT_FILE, CONTENT_LOWER_FILE):
+            f = open(directory / file_name, "rb")
+            self._files.append(f)
+            # 빈 파일은 mmap할 수 없음 (본문이 모두 빈 pack)
+            mapped.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                          if os.fstat(f.fileno()).st_size else b"")
+        self.content, self.content_lower = mapped
+        self.bounds = np.load(directory / OFFSETS_FILE).tolist()  # 슬라이스용 파이썬 int
+
+    def __len__(self) -> int:
+        return len(self.bounds[0]) - 1
+
+    def close(self):
+        for data in (self.content, self.content_lower):
+            if isinstance(data, mmap.mmap):
+                data.close()
+        for f in self._files:
+            f.close()
+        self._files = []
+
+
+class ContentPool:
+    """매뉴얼 인덱스들이 같이 쓰는 본문 저장소 (본문 해시 → pack / 슬롯)
+
+    인덱스를 저장할 때 이미 어떤 pack에 있는 본문은 다시 쓰지 않고 참조만 하고,
+    새 본문만 새 pack 하나로 씁니다. 같은 pack은 프로세스마다 한 번만 메모리 맵으로 엽니다.
+    pack 추가/삭제는 SharedIndexRegistry의 파일 잠금 안에서만 합니다.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        # pack은 바뀌지 않으므로 본문 해시 목록은 pack마다 한 번만 읽음
+        self._keys: Dict[str, List[str]] = {}
+        # 참조하는 인덱스가 없어지면 메모리 맵도 해제
+        self._packs: "weakref.WeakValueDictionary[str, ContentPack]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def pack_names(self) -> List[str]:
+        return sorted(path.name for path in self.root.iterdir() if path.is_dir() and not path.name.endswith(".tmp"))
+
+    def _pack_keys(self, name: str) -> List[str]:
+        keys = self._keys.get(name)
+        if keys is None:
+            with open(self.root / name / KEYS_FILE, "r", encoding="utf-8") as f:
+                keys = self._keys[name] = json.load(f)
+        return keys
+
+    def catalog(self) -> Dict[str, Tuple[str, int]]:
+        """디스크에 있는 모든 본문: 본문 해시 → (pack 이름, 슬롯)"""
+        catalog = {}
+        for name in self.pack_names():
+            for slot, key in enumerate(self._pack_keys(name)):
+                catalog.setdefault(key, (name, slot))
+        return catalog
+
+    def write(self, bodies: List[Tuple[str, bytes, bytes]], fsync: bool = True) -> str:
+        """(본문 해시, 원본, 소문자) 목록을 새 pack으로 저장하고 이름 반환 (같은 목록이면 기존 pack 재사용)"""
+        keys = [key for key, _, _ in bodies]
+        name = section_key("\n".join(keys))[:16]
+        directory = self.root / name
+        if directory.exists():
+            return name
+
+        tmp_dir = self.root / f"{name}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir()
+
+        offsets = np.zeros((2, len(bodies) + 1), dtype=np.int64)
+        offsets[0, 1:] = np.cumsum([len(content) for _, content, _ in bodies])
+        offsets[1, 1:] = np.cumsum([len(lowered) for _, _, lowered in bodies])
+        for file_name, data in ((CONTENT_FILE, b"".join(content for _, content, _ in bodies)),
+                                (CONTENT_LOWER_FILE, b"".join(lowered for _, _, lowered in bodies))):
+            with open(tmp_dir / file_name, "wb") as f:
+                f.write(data)
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+        np.save(tmp_dir / OFFSETS_FILE, offsets)
+        with open(tmp_dir / KEYS_FILE, "w", encoding="utf-8") as f:
+            json.dump(keys, f)
+
+        os.replace(tmp_dir, directory)
+        self._keys[name] = keys
+        return name
+
+    def open(self, name: str) -> ContentPack:
+        with self._lock:
+            pack = self._packs.get(name)
+            if pack is None:
+                pack = ContentPack(self.root / name)
+                self._packs[name] = pack
+            return pack
+
+    def collect_garbage(self, live: Iterable[str]):
+        """어느 인덱스도 참조하지 않는 pack 삭제 (이미 매핑한 워커는 계속 읽을 수 있음)"""
+        live = set(live)
+        for path in self.root.iterdir():
+            if path.is_dir() and path.name not in live:
+                shutil.rmtree(path, ignore_errors=True)
+                self._keys.pop(path.name, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        names = self.pack_names()
+        return {
+            "packs": len(names),
+            "bodies": sum(len(self._pack_keys(name)) for name in names),
+            "bytes": sum((self.root / name / CONTENT_FILE).stat().st_size for name in names)
+        }
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+from typing import List, Dict, Any, Optional
+from pathlib import Path
+
+# 캐시 파일 구조 (data/processed/embeddings/)
+#   {content_hash}.json        : 버전, dtype, shape, 섹션 ID 목록 등 사이드카
+#   {array_digest}.f16.npy     : float16 임베딩 (또는 .i8.npy + .scale.npy)
+# 배열 파일은 내용 해시로 이름을 정하므로 동일한 임베딩은 한 번만 저장됨
+FORMAT_VERSION = 1
+CACHE_DTYPES = ("float16", "int8")
+# 유사도 계산 시 한 번에 float32로 바꾸는 행 수 (전체 행렬 크기의 임시 배열을 만들지 않음)
+BLOCK_ROWS = 2048
+
+
+def content_hash(sections: List[Dict[str, Any]]) -> str:
+    """섹션 번호/제목/본문 기준 내용 해시 (임베딩이 어떤 문서로 만들어졌는지 확인용)"""
+    digest = hashlib.sha256()
+    for section in sections:
+        record = [section.get("section_number"), section.get("title"), section.get("content")]
+        digest.update(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """메모리 맵으로 연 양자화 임베딩 (로드 시 복사 없음)"""
+
+    def __init__(self, vectors: np.ndarray, scales: Optional[np.ndarray], sidecar: Dict[str, Any]):
+        self.vectors = vectors
+        self.scales = scales
+        self.sidecar = sidecar
+
+    @property
+    def dtype(self) -> str:
+        return self.sidecar["dtype"]
+
+    @property
+    def shape(self):
+        return self.vectors.shape
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def similarities(self, query_norm: np.ndarray) -> np.ndarray:
+        """정규화된 쿼리 (1, d)와 모든 섹션의 내적 (BLOCK_ROWS행씩 변환: 임시 배열은 블록 크기만큼만)"""
+        query = np.asarray(query_norm, dtype=np.float32).reshape(-1)
+        scores = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            end = min(start + BLOCK_ROWS, len(self))
+            np.dot(self.vectors[start:end].astype(np.float32), query, out=scores[start:end])
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def to_float32(self) -> np.ndarray:
+        """복원된 float32 임베딩 (정확도 비교/재저장용, 결과 배열 외 임시 배열은 블록 크기만큼만)"""
+        vectors = np.empty(self.vectors.shape, dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            end = min(start + BLOCK_ROWS, len(self))
+            vectors[start:end] = self.vectors[start:end]
+        if self.scales is not None:
+            vectors *= self.scales[:, None]
+        return vectors
+
+    def row(self, idx: int) -> np.ndarray:
+        """한 섹션의 float32 임베딩"""
+        vector = self.vectors[idx].astype(np.float32)
+        if self.scales is not None:
+            vector *= self.scales[idx]
+        return vector
+
+
+def quantize(embeddings: np.ndarray, dtype: str):
+    """float32 임베딩을 저장용 dtype으로 변환 (int8은 행별 대칭 스케일)"""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if dtype == "float16":
+        return embeddings.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(embeddings).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"지원하지 않는 캐시 dtype입니다: {dtype} (지원: {CACHE_DTYPES})")
+
+
+def _save_array_atomic(path: Path, array: np.ndarray):
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def _array_digest(array: np.ndarray) -> str:
+    return hashlib.sha256(array.tobytes()).hexdigest()[:16]
+
+
+def save_embedding_cache(cache_dir: Path, sections: List[Dict[str, Any]], embeddings: np.ndarray,
+                         dtype: str = "float16", source: str = "",
+                         extra: Optional[Dict[str, Any]] = None) -> Path:
+    """임베딩을 버전 관리되는 캐시 형식으로 저장하고 사이드카 경로 반환 (extra는 사이드카에 추가 기록)"""
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    if len(sections) != len(embeddings):
+        raise ValueError(f"섹션 수({len(sections)})와 임베딩 수({len(embeddings)})가 다릅니다")
+
+    vectors, scales = quantize(embeddings, dtype)
+    suffix = "f16" if dtype == "float16" else "i8"
+
+    digest = _array_digest(vectors)
+    array_name = f"{digest}.{suffix}.npy"
+    if not (cache_dir / array_name).exists():
+        _save_array_atomic(cache_dir / array_name, vectors)
+
+    scales_name = None
+    if scales is not None:
+        scales_name = f"{digest}.scale.npy"
+        if not (cache_dir / scales_name).exists():
+            _save_array_atomic(cache_dir / scales_name, scales)
+
+    doc_hash = content_hash(sections)
+    sidecar = {
+        "format_version": FORMAT_VERSION,
+        "dtype": dtype,
+        "shape": list(vectors.shape),
+        "content_hash": doc_hash,
+        "source": source,
+        "array": array_name,
+        "scales": scales_name,
+        "section_ids": [section.get("section_number") for section in sections],
+        **(extra or {})
+    }
+
+    sidecar_path = cache_dir / f"{doc_hash}.json"
+    tmp_path = sidecar_path.with_name(sidecar_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(sidecar, f, ensure_ascii=False)
+    os.replace(tmp_path, sidecar_path)
+
+    return sidecar_path
+
+
+def load_embedding_cache(cache_dir: Path, sections: List[Dict[str, Any]]) -> Optional[EmbeddingCache]:
+    """문서 내용 해시로 캐시를 찾아 메모리 맵으로 로드 (없거나 맞지 않으면 None)"""
+    cache_dir = Path(cache_dir)
+    doc_hash = content_hash(sections)
+    sidecar_path = cache_dir / f"{doc_hash}.json"
+    if not sidecar_path.exists():
+        return None
+
+    with open(sidecar_path, "r", encoding="utf-8") as f:
+        sidecar = json.load(f)
+
+    if sidecar.get("content_hash") != doc_hash:
+        return None
+
+    cache = open_sidecar(cache_dir, sidecar)
+    if cache is None or len(cache) != len(sections):
+        return None
+    return cache
+
+
+def open_sidecar(cache_dir: Path, sidecar: Dict[str, Any]) -> Optional[EmbeddingCache]:
+    """사이드카가 가리키는 배열을 메모리 맵으로 열기 (버전/shape가 맞지 않으면 None)"""
+    if sidecar.get("format_version") != FORMAT_VERSION:
+        return None
+
+    cache_dir = Path(cache_dir)
+    vectors = np.load(cache_dir / sidecar["array"], mmap_mode="r")
+    scales = np.load(cache_dir / sidecar["scales"], mmap_mode="r") if sidecar.get("scales") else None
+
+    if list(vectors.shape) != sidecar["shape"]:
+        return None
+
+    return EmbeddingCache(vectors, scales, sidecar)
+
+
+def iter_sidecars(cache_dir: Path):
+    """캐시 폴더의 모든 사이드카 (증분 빌드 시 재사용할 섹션 탐색용)"""
+    cache_dir = Path(cache_dir)
+    if not cache_dir.exists():
+        return
+    for sidecar_path in sorted(cache_dir.glob("*.json")):
+        try:
+            with open(sidecar_path, "r", encoding="utf-8") as f:
+                yield json.load(f)
+        except (OSError, ValueError):
+            continue
+
+
+def load_legacy_pickle(pickle_path: Path, sections: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+    """기존 {vehicle}_embeddings.pkl에서 같은 문서로 만든 임베딩만 꺼냄"""
+    with open(pickle_path, "rb") as f:
+        cache_data = pickle.load(f)
+
+    if content_hash(cache_data["sections_data"]) != content_hash(sections):
+        return None
+    return np.asarray(cache_data["embeddings"], dtype=np.float32)
+
+
+def main():
+    """기존 pickle 캐시를 새 형식으로 변환하고 float32 대비 정확도 차이 출력"""
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="임베딩 pickle 캐시 변환")
+    parser.add_argument("--data", default="./data/processed/")
+    parser.add_argument("--dtype", choices=CACHE_DTYPES, default="float16")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    data_dir = Path(args.data)
+    cache_dir = data_dir / "embeddings"
+    documents = {}
+    for json_file in glob.glob(str(data_dir / "*.json")):
+        with open(json_file, "r", encoding="utf-8") as f:
+            json_data = json.load(f)
+        documents[content_hash(json_data["sections"])] = json_data
+
+    rng = np.random.default_rng(0)
+    for pickle_path in sorted(data_dir.glob("*_embeddings.pkl")):
+        with open(pickle_path, "rb") as f:
+            cache_data = pickle.load(f)
+        json_data = documents.get(content_hash(cache_data["sections_data"]))
+        if json_data is None:
+            print(f"⚠️ {pickle_path.name}: 일치하는 JSON 문서가 없어 건너뜁니다")
+            continue
+
+        embeddings = np.asarray(cache_data["embeddings"], dtype=np.float32)
+        save_embedding_cache(cache_dir, json_data["sections"], embeddings, args.dtype, json_data.get("file_name", ""))
+        cache = load_embedding_cache(cache_dir, json_data["sections"])
+
+        # 섹션 임베딩에 잡음을 섞은 쿼리로 float32 대비 점수 오차 / top-k 일치율 측정
+        queries = embeddings[rng.integers(0, len(embeddings), size=args.queries)]
+        queries = queries + rng.normal(0, 0.05, size=queries.shape).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        max_error, overlap = 0.0, 0.0
+        for query in queries:
+            exact = embeddings @ query
+            approx = cache.similarities(query)
+            max_error = max(max_error, float(np.abs(exact - approx).max()))
+            top_exact = set(np.argsort(-exact)[:args.k])
+            top_approx = set(np.argsort(-approx)[:args.k])
+            overlap += len(top_exact & top_approx) / args.k
+
+        print(f"✅ {pickle_path.name} → {cache.sidecar['array']} "
+              f"({pickle_path.stat().st_size / 1024:.0f}KB → {cache.vectors.nbytes / 1024:.0f}KB, "
+              f"최대 점수 오차 {max_error:.5f}, top-{args.k} 일치율 {overlap / len(queries):.3f})")
+
+
+if __name__ == "__main__":
+    main()
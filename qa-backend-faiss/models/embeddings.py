@@ -1,18 +1,42 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List
+from typing import List, Optional
 import os
 
+from models.query_cache import QueryEmbeddingCache
+
 class EmbeddingModel:
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 query_cache_bytes: int = 8 * 1024 * 1024, query_cache_path: Optional[str] = None):
         self.model_name = model_name
         self.model = SentenceTransformer(model_name)
         self.dimension = self.model.get_sentence_embedding_dimension()
-    
+
+        # 🚀 반복 쿼리는 모델을 다시 돌리지 않도록 캐시 (0이면 비활성화)
+        self.query_cache = QueryEmbeddingCache(query_cache_bytes, query_cache_path, model_name) \
+            if query_cache_bytes > 0 else None
+
     def encode_texts(self, texts: List[str]) -> np.ndarray:
         """텍스트 리스트를 벡터로 변환"""
         return self.model.encode(texts, convert_to_numpy=True)
-    
+
     def encode_query(self, query: str) -> np.ndarray:
-        """단일 쿼리를 벡터로 변환"""
-        return self.model.encode([query], convert_to_numpy=True)
\ No newline at end of file
+        """단일 쿼리를 정규화된 벡터로 변환 (캐시 우선)"""
+        if self.query_cache is not None:
+            cached = self.query_cache.get(query)
+            if cached is not None:
+                return cached
+
+        vector = self.model.encode([query], convert_to_numpy=True)
+
+        if self.query_cache is not None:
+            return self.query_cache.put(query, vector)
+        return vector / np.linalg.norm(vector, axis=1, keepdims=True)
+
+    def save_query_cache(self):
+        """쿼리 캐시 저장 (persist 경로가 설정된 경우)"""
+        if self.query_cache is not None:
+            self.query_cache.save()
+
+    def get_query_cache_stats(self) -> dict:
+        return self.query_cache.get_stats() if self.query_cache is not None else {"enabled": False}
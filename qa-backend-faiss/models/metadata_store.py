@@ -0,0 +1,147 @@
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+from pathlib import Path
+
+# 파일 구조: 헤더(매직, 버전, 레코드 수) + 오프셋 테이블(uint64 × (n+1)) + JSON 레코드 묶음
+MAGIC = b"QAMD"
+VERSION = 1
+HEADER = struct.Struct("<4sIQ")
+
+
+class MappedMetadataStore:
+    """메모리 맵 기반 메타데이터 저장소 (검색 결과 행만 디코딩)"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else None
+        self._file = None
+        self._mmap = None
+        self._offsets = np.zeros(1, dtype="<u8")
+        self._data_start = 0
+        self._mapped_count = 0
+
+        # 마지막 체크포인트 이후 추가된 레코드 (메모리 보관, 추가할 때 인코딩해 둔 바이트와 함께)
+        self._tail: List[Dict[str, Any]] = []
+        self._tail_bytes: List[bytes] = []
+
+        if self.path and self.path.exists():
+            self._open()
+
+    def _open(self):
+        """파일을 메모리 맵으로 열고 헤더/오프셋 테이블만 읽음"""
+        self._file = open(self.path, "rb")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            return
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"지원하지 않는 메타데이터 파일 형식입니다: {self.path}")
+
+        self._offsets = np.frombuffer(self._mmap, dtype="<u8", count=count + 1, offset=HEADER.size)
+        self._data_start = HEADER.size + self._offsets.nbytes
+        self._mapped_count = count
+
+    def close(self):
+        """메모리 맵 해제"""
+        # np.frombuffer 뷰가 남아 있으면 mmap을 닫을 수 없으므로 먼저 해제
+        self._offsets = np.zeros(1, dtype="<u8")
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._mapped_count = 0
+
+    def __len__(self) -> int:
+        return self._mapped_count + len(self._tail)
+
+    def __getitem__(self, idx: int) -> Dict[str, Any]:
+        idx = int(idx)
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError("메타데이터 인덱스 범위를 벗어났습니다")
+
+        if idx >= self._mapped_count:
+            return self._tail[idx - self._mapped_count]
+
+        return json.loads(self._raw_record(idx))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def _raw_record(self, idx: int) -> bytes:
+        """매핑된 레코드의 원본 바이트"""
+        begin = self._data_start + int(self._offsets[idx])
+        end = self._data_start + int(self._offsets[idx + 1])
+        return self._mmap[begin:end]
+
+    def extend(self, records: Iterable[Dict[str, Any]]):
+        """레코드 추가 (다음 save 전까지 메모리에 보관)
+
+        JSON으로 저장할 수 없는 값이 있으면 TypeError (하나라도 실패하면 아무것도 추가하지 않음)
+        """
+        records = list(records)
+        encoded = [self._encode(record) for record in records]
+        self._tail.extend(records)
+        self._tail_bytes.extend(encoded)
+
+    def append(self, record: Dict[str, Any]):
+        self.extend([record])
+
+    def save(self, path: Optional[Path] = None, fsync: bool = True):
+        """매핑된 레코드(원본 바이트 그대로) + 추가분을 새 파일로 원자적 저장 후 다시 매핑"""
+        path = Path(path) if path else self.path
+        tmp_path = path.with_name(path.name + ".tmp")
+
+        tail_bytes = self._tail_bytes
+        count = self._mapped_count + len(tail_bytes)
+
+        mapped_size = int(self._offsets[self._mapped_count])
+        tail_sizes = np.array([len(b) for b in tail_bytes], dtype="<u8")
+        offsets = np.concatenate([
+            self._offsets[:self._mapped_count + 1],
+            mapped_size + np.cumsum(tail_sizes, dtype="<u8")
+        ]).astype("<u8")
+
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, count))
+            f.write(offsets.tobytes())
+            if self._mapped_count:
+                f.write(self._mmap[self._data_start:self._data_start + mapped_size])
+            for record_bytes in tail_bytes:
+                f.write(record_bytes)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+
+        self.close()
+        os.replace(tmp_path, path)
+
+        self.path = path
+        self._tail = []
+        self._tail_bytes = []
+        self._open()
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        """JSON 바이트로 인코딩 (문자열로 바꿔 저장하지 않음: 읽을 때 원래 값과 달라지므로
+        numpy 값 등은 호출하는 쪽에서 int/float/list로 변환해서 넣어야 함)"""
+        try:
+            return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        except TypeError as e:
+            raise TypeError(f"메타데이터 레코드를 JSON으로 저장할 수 없습니다: {e}") from e
+
+    @classmethod
+    def from_records(cls, path: Path, records: Iterable[Dict[str, Any]], fsync: bool = True) -> "MappedMetadataStore":
+        """기존 레코드 목록으로 새 저장소 파일 생성 (pickle 메타데이터 변환용)"""
+        store = cls()
+        store.extend(records)
+        store.save(Path(path), fsync=fsync)
+        return store
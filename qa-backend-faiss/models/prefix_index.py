@@ -0,0 +1,143 @@
+import bisect
+import math
+import re
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+
+from models.section_store import normalize_token
+
+
+# 항목 종류별 기본 가중치 (제목 > 키워드 > 본문 빈출어)
+KIND_WEIGHTS = {"title": 2.0, "keyword": 1.5, "term": 0.0}
+
+# 본문 빈출어 후보에서 뺄 어미 (문장 끝 서술어는 검색어로 쓸모가 없음)
+VERB_ENDINGS = ("니다", "시오", "세요", "십시오", "하여", "하고", "하면", "되어", "되면", "으며", "있는", "없는")
+
+MIN_TERM_DF = 3  # 이보다 적은 섹션에 나오는 본문 단어는 제외
+MAX_TERMS = 2000
+SHORT_PREFIX = 2  # 이 길이 이하 접두어는 결과를 미리 계산 (범위가 넓어 스캔 비용이 큼)
+PRECOMPUTED_LIMIT = 20
+MAX_SCAN = 2000
+
+# 입력 중인 한글 자모 (조합 중인 마지막 글자: "타이ㅇ")
+_TRAILING_JAMO = re.compile(r'[ㄱ-ㅎㅏ-ㅣ]+$')
+_SPACES = re.compile(r'\s+')
+# 본문 빈출어 후보 (소문자 본문에서 두 글자 이상: tokenize()와 같은 문자 범위)
+_TERM = re.compile(r'[가-힣a-z0-9]{2,}')
+
+
+def normalize_prefix(text: str) -> str:
+    return _TRAILING_JAMO.sub("", _SPACES.sub(" ", text.lower()).lstrip())
+
+
+class PrefixIndex:
+    """자동완성용 접두어 인덱스 (정렬된 배열 + 이진 탐색)
+
+    항목(제목/키워드/본문 빈출어)마다 단어 시작 위치의 접미 문자열을 키로 넣어서
+    "공기"로 "타이어 공기압 경보 시스템"도 찾습니다. 1~2글자 접두어는 결과를 미리 계산해 둡니다.
+    """
+
+    def __init__(self, entries: List[Tuple[str, str, float]]):
+        # 같은 문구는 가중치가 큰 항목 하나만
+        best: Dict[str, Tuple[str, str, float]] = {}
+        for text, kind, weight in entries:
+            text = _SPACES.sub(" ", text).strip()
+            key = text.lower()
+            if key and (key not in best or best[key][2] < weight):
+                best[key] = (text, kind, weight)
+
+        self.texts: List[str] = []
+        self.kinds: List[str] = []
+        self.weights: List[float] = []
+        keys: List[Tuple[str, int, bool]] = []
+        for key, (text, kind, weight) in best.items():
+            entry_id = len(self.texts)
+            self.texts.append(text)
+            self.kinds.append(kind)
+            self.weights.append(weight)
+            for match in re.finditer(r'\S+', key):
+                keys.append((key[match.start():], entry_id, match.start() == 0))
+
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._ids = [entry_id for _, entry_id, _ in keys]
+        self._at_start = [at_start for _, _, at_start in keys]
+
+        # 짧은 접두어 결과 미리 계산
+        candidates: Dict[str, Dict[int, float]] = {}
+        for i, key in enumerate(self._keys):
+            for length in range(1, min(SHORT_PREFIX, len(key)) + 1):
+                bucket = candidates.setdefault(key[:length], {})
+                score = self._score(i)
+                if bucket.get(self._ids[i], -1.0) < score:
+                    bucket[self._ids[i]] = score
+        self._short = {
+            prefix: [entry_id for entry_id, _ in sorted(bucket.items(), key=lambda x: (-x[1], x[0]))[:PRECOMPUTED_LIMIT]]
+            for prefix, bucket in candidates.items()
+        }
+
+    @classmethod
+    def from_section_index(cls, index) -> "PrefixIndex":
+        """매뉴얼 섹션 인덱스에서 생성 (제목, 키워드, 여러 섹션에 나오는 본문 단어)"""
+        titles, keywords, term_df = Counter(), Counter(), Counter()
+        seen_content = set()
+
+        for idx, record in enumerate(index.records):
+            if record["title"]:
+                titles[record["title"]] += 1
+            for keyword in record["keywords"] or []:
+                keywords[keyword] += 1
+
+            # 같은 본문은 한 번만 (변형 매뉴얼/중복 섹션)
+            content_key = index.content_key(idx)
+            if content_key in seen_content:
+                continue
+            seen_content.add(content_key)
+            term_df.update(set(_TERM.findall(index.content_lower_bytes(idx).decode("utf-8"))))
+
+        # 조사/어미가 붙은 형태는 원형에 합침 (원형도 본문에 있을 때만: "타이어를" → "타이어")
+        for term in list(term_df):
+            stem = normalize_token(term)
+            if stem != term and stem in term_df:
+                term_df[stem] += term_df.pop(term)
+
+        terms = [
+            (term, df) for term, df in term_df.most_common()
+            if df >= MIN_TERM_DF and 2 <= len(term) <= 12 and not term.isdigit() and not term.endswith(VERB_ENDINGS)
+        ][:MAX_TERMS]
+
+        entries = [(text, "title", KIND_WEIGHTS["title"] + math.log1p(count)) for text, count in titles.items()]
+        entries += [(text, "keyword", KIND_WEIGHTS["keyword"] + math.log1p(count)) for text, count in keywords.items()]
+        entries += [(term, "term", KIND_WEIGHTS["term"] + math.log1p(df)) for term, df in terms]
+        return cls(entries)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _score(self, key_position: int) -> float:
+        # 문구 맨 앞에서 일치하면 가산
+        entry_id = self._ids[key_position]
+        return self.weights[entry_id] + (1.0 if self._at_start[key_position] else 0.0)
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return []
+
+        if len(prefix) <= SHORT_PREFIX and limit <= PRECOMPUTED_LIMIT:
+            ids = self._short.get(prefix, [])[:limit]
+        else:
+            scores: Dict[int, float] = {}
+            start = bisect.bisect_left(self._keys, prefix)
+            for i in range(start, min(start + MAX_SCAN, len(self._keys))):
+                if not self._keys[i].startswith(prefix):
+                    break
+                score = self._score(i)
+                if scores.get(self._ids[i], -1.0) < score:
+                    scores[self._ids[i]] = score
+            ids = [entry_id for entry_id, _ in sorted(scores.items(), key=lambda x: (-x[1], x[0]))[:limit]]
+
+        return [{"text": self.texts[i], "kind": self.kinds[i]} for i in ids]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"entries": len(self.texts), "keys": len(self._keys), "short_prefixes": len(self._short)}
@@ -0,0 +1,127 @@
+import os
+import re
+import threading
+import unicodedata
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from pathlib import Path
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키용 쿼리 정규화 (유니코드 NFC, 소문자, 공백 정리)"""
+    query = unicodedata.normalize("NFC", query or "")
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class QueryEmbeddingCache:
+    """정규화된 쿼리 → 정규화된 벡터 LRU 캐시 (용량은 바이트 단위)"""
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, persist_path: Optional[str] = None,
+                 model_name: str = ""):
+        self.max_bytes = max_bytes
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.model_name = model_name
+
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+
+        # 📊 적중률 카운터
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.persist_path and self.persist_path.exists():
+            self.load()
+
+    @staticmethod
+    def _entry_bytes(key: str, vector: np.ndarray) -> int:
+        return vector.nbytes + len(key.encode("utf-8"))
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        key = normalize_query(query)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, query: str, vector: np.ndarray) -> np.ndarray:
+        """벡터를 정규화해서 저장하고 저장된 (읽기 전용) 벡터 반환"""
+        key = normalize_query(query)
+        vector = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        vector.setflags(write=False)
+
+        size = self._entry_bytes(key, vector)
+        if size > self.max_bytes:
+            return vector
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= self._entry_bytes(key, previous)
+
+            self._entries[key] = vector
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes and self._entries:
+                old_key, old_vector = self._entries.popitem(last=False)
+                self.current_bytes -= self._entry_bytes(old_key, old_vector)
+                self.evictions += 1
+
+        return vector
+
+    def save(self):
+        """캐시를 파일로 저장 (재시작 후에도 유지)"""
+        if not self.persist_path:
+            return
+
+        with self._lock:
+            keys = list(self._entries.keys())
+            vectors = np.vstack(list(self._entries.values())) if keys else np.zeros((0, 0), dtype=np.float32)
+
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.persist_path.with_name(self.persist_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, keys=np.array(keys, dtype=str), vectors=vectors, model_name=np.array(self.model_name))
+        os.replace(tmp_path, self.persist_path)
+
+    def load(self):
+        """저장된 캐시 로드 (다른 모델로 만든 캐시는 무시)"""
+        try:
+            with np.load(self.persist_path) as data:
+                if str(data["model_name"]) != self.model_name:
+                    print(f"⚠️ 쿼리 캐시 모델이 달라 무시합니다: {self.persist_path}")
+                    return
+                keys, vectors = data["keys"], data["vectors"]
+        except Exception as e:
+            print(f"⚠️ 쿼리 캐시 로드 실패: {e}")
+            return
+
+        # 저장 순서 = 오래된 순서이므로 그대로 넣으면 LRU 순서도 유지됨
+        for key, vector in zip(keys, vectors):
+            self.put(str(key), vector)
+        print(f"✅ 쿼리 임베딩 캐시 로드 완료: {len(self._entries)}개")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계 (적중률 포함)"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
@@ -0,0 +1,152 @@
+import json
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+from pathlib import Path
+
+from models.content_pool import ContentPool, ContentPack
+from models.metadata_store import MappedMetadataStore
+from models.section_store import SECTION_STORE, SectionStore, section_key
+
+# 보너스 점수 판단용 제목 단어 (SimpleSearchService._calculate_bonus_score와 같은 목록)
+IMPORTANT_TITLE_WORDS = ["안전", "주의", "경고", "중요"]
+
+# 디렉토리 구조: sections.bin(작은 메타데이터) + packs.json(참조하는 ContentPool pack 이름)
+#               + refs.npy(섹션 → (pack 번호, 슬롯)), 본문 자체는 매뉴얼 간에 공유하는 ContentPool에
+SECTIONS_FILE = "sections.bin"
+PACKS_FILE = "packs.json"
+REFS_FILE = "refs.npy"
+
+
+class SectionIndex:
+    """키워드 검색용 섹션 인덱스 (본문은 UTF-8 바이트로 보관, 파일로 저장하면 메모리 맵으로 공유)
+
+    검색은 소문자 본문 바이트에서 바로 부분 문자열 개수를 세므로 질문마다 본문 전체를
+    str로 디코딩하지 않습니다. 원본 본문은 결과로 나가는 섹션만 디코딩합니다.
+    메모리에서 만든 인덱스는 SectionStore의 고유 본문을 참조하고, 저장할 때는 ContentPool에 없는
+    본문만 써서 다른 매뉴얼(변형 매뉴얼, 같은 매뉴얼의 이전 버전)과 본문 파일을 공유합니다.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]], sections=None,
+                 packs: Optional[List[ContentPack]] = None, refs: Optional[List[Tuple[int, int]]] = None,
+                 path: Optional[Path] = None, store: SectionStore = SECTION_STORE):
+        self.records = records  # source / section_number / title / page_range / keywords / subsections / 길이 / 플래그
+        self._sections = sections  # 메모리 인덱스: 섹션별 StoredSection (변형 매뉴얼과 공유)
+        self._packs = packs  # 메모리 맵 인덱스: 본문이 들어 있는 pack (다른 매뉴얼 인덱스와 공유)
+        if packs is not None:
+            # 섹션별 (메모리 맵, 시작, 끝): 질문마다 pack/슬롯을 다시 찾지 않도록 미리 계산
+            self._refs = refs
+            self._spans = [(packs[pack].content, packs[pack].bounds[0][slot], packs[pack].bounds[0][slot + 1])
+                           for pack, slot in refs]
+            self._lower_spans = [(packs[pack].content_lower, packs[pack].bounds[1][slot],
+                                  packs[pack].bounds[1][slot + 1]) for pack, slot in refs]
+        self.path = path
+
+        # 제목 토큰은 고유 제목마다 한 번만 계산 (질문마다 섹션 제목을 다시 토큰화하지 않음)
+        self.title_tokens = [store.title_tokens(record["title"]) for record in records]
+
+    @classmethod
+    def from_json(cls, json_data: Dict[str, Any], store: SectionStore = SECTION_STORE) -> "SectionIndex":
+        """JSON 매뉴얼에서 인덱스 생성 (메모리, 본문은 store에 한 벌만)"""
+        records, sections = [], []
+
+        for section in json_data.get("sections", []):
+            title = section.get("title", "")
+            stored = store.intern(section.get("content", ""))
+            title_lower = title.lower()
+
+            records.append({
+                "source": json_data.get("file_name", "unknown"),
+                "section_number": section.get("section_number", ""),
+                "title": title,
+                "page_range": section.get("page_range", ""),
+                "keywords": section.get("keywords", []),
+                "subsections": section.get("subsections", []),
+                "content_key": stored.key,
+                "content_length": stored.length,
+                "procedure": stored.procedure,
+                "problem": stored.problem,
+                "important_title": any(word in title_lower for word in IMPORTANT_TITLE_WORDS)
+            })
+            sections.append(stored)
+
+        return cls(records, sections=sections, store=store)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def content(self, idx: int) -> str:
+        """원본 본문 (결과로 내보낼 때만 디코딩)"""
+        if self._sections is not None:
+            return self._sections[idx].content.decode("utf-8")
+        data, start, end = self._spans[idx]
+        return data[start:end].decode("utf-8")
+
+    def content_lower_bytes(self, idx: int) -> bytes:
+        """소문자 본문 UTF-8 바이트 (검색용)"""
+        if self._sections is not None:
+            return self._sections[idx].content_lower
+        data, start, end = self._lower_spans[idx]
+        return data[start:end]
+
+    def content_key(self, idx: int) -> str:
+        """본문 내용 해시 (정리된 본문 캐시 등 본문 단위 캐시 키)"""
+        key = self.records[idx].get("content_key")
+        return key if key is not None else section_key(self.content(idx))
+
+    def unique_count(self) -> int:
+        if self._sections is not None:
+            return len({id(stored) for stored in self._sections})
+        return len(set(self._refs))
+
+    def save(self, directory: Path, pool: ContentPool, fsync: bool = True):
+        """디렉토리에 저장 (publish용: 이후 open()으로 여러 프로세스가 같은 페이지를 공유)
+
+        pool에 이미 있는 본문은 참조만 하고, 없는 본문만 새 pack 하나로 씁니다.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        catalog = pool.catalog()
+        keys = [self.content_key(idx) for idx in range(len(self.records))]
+        new_bodies, seen = [], set()
+        for idx, key in enumerate(keys):
+            if key not in catalog and key not in seen:
+                seen.add(key)
+                new_bodies.append((key, self.content(idx).encode("utf-8"), self.content_lower_bytes(idx)))
+        if new_bodies:
+            name = pool.write(new_bodies, fsync=fsync)
+            for slot, (key, _, _) in enumerate(new_bodies):
+                catalog[key] = (name, slot)
+
+        pack_names = sorted({catalog[key][0] for key in keys})
+        pack_ids = {name: i for i, name in enumerate(pack_names)}
+        refs = np.array([(pack_ids[catalog[key][0]], catalog[key][1]) for key in keys],
+                        dtype=np.int32).reshape(-1, 2)
+
+        with open(directory / PACKS_FILE, "w", encoding="utf-8") as f:
+            json.dump(pack_names, f)
+        np.save(directory / REFS_FILE, refs)
+        MappedMetadataStore.from_records(directory / SECTIONS_FILE, self.records, fsync=fsync).close()
+
+    @staticmethod
+    def pack_names(directory: Path) -> List[str]:
+        """저장된 인덱스가 참조하는 pack 이름 (pool 정리용)"""
+        with open(Path(directory) / PACKS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @classmethod
+    def open(cls, directory: Path, pool: ContentPool, store: SectionStore = SECTION_STORE) -> "SectionIndex":
+        """저장된 인덱스를 읽기 전용 메모리 맵으로 열기 (작은 메타데이터만 프로세스 메모리에 올림)"""
+        directory = Path(directory)
+        store_file = MappedMetadataStore(directory / SECTIONS_FILE)
+        records = list(store_file)
+        store_file.close()
+
+        packs = [pool.open(name) for name in cls.pack_names(directory)]
+        refs = [tuple(ref) for ref in np.load(directory / REFS_FILE).tolist()]
+        return cls(records, packs=packs, refs=refs, path=directory, store=store)
+
+    def close(self):
+        """pack은 다른 인덱스와 공유하므로 참조만 놓음 (마지막 참조가 없어지면 pool에서 해제)"""
+        self._packs = None
+        self._spans = self._lower_spans = []
@@ -0,0 +1,117 @@
+import functools
+import hashlib
+import re
+import threading
+import weakref
+from typing import List, Dict, Any, Tuple
+
+# 보너스 점수 판단용 단어 (SimpleSearchService._calculate_bonus_score와 같은 목록)
+PROCEDURE_CONTENT_WORDS = ["방법", "절차", "단계", "하십시오", "순서"]
+PROBLEM_CONTENT_WORDS = ["점검", "확인", "교체", "정비", "수리"]
+
+
+def tokenize(text: str) -> List[str]:
+    """텍스트를 토큰으로 분리 (한글/영문/숫자, 길이 1인 토큰은 숫자만 유지)"""
+    if not text:
+        return []
+    tokens = re.findall(r'[가-힣a-zA-Z0-9]+', text.lower())
+    return [token for token in tokens if len(token) > 1 or token.isdigit()]
+
+
+# 명사 뒤 조사 (긴 것부터 비교)
+PARTICLES = ("에서는", "으로는", "에서", "으로", "에는", "까지", "부터", "에게", "이나", "처럼",
+             "은", "는", "이", "가", "을", "를", "의", "에", "도", "로", "와", "과", "만")
+# 질문에 자주 붙는 서술어 어미 ("교체하는" → "교체", "점검하려면" → "점검")
+ENDINGS = ("하려면", "하나요", "되나요", "인가요", "하는법", "하는", "하기", "하면", "해요", "할때", "되면")
+SUFFIXES = ENDINGS + PARTICLES
+MIN_STEM = 2
+
+
+@functools.lru_cache(maxsize=65536)
+def normalize_token(token: str) -> str:
+    """토큰 정규화: 서술어 어미나 조사 하나 제거 (남는 부분이 두 글자 이상일 때만: "공기압은" → "공기압", "차가"는 그대로)
+
+    질문/제목/본문에 같은 규칙을 쓰므로 "디스플레이" → "디스플레"처럼 명사 끝이 잘려도 서로 일치합니다.
+    """
+    if len(token) > MIN_STEM:
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+                return token[:-len(suffix)]
+    return token
+
+
+@functools.lru_cache(maxsize=4096)
+def analyze(text: str) -> Tuple[str, ...]:
+    """검색용 토큰 (tokenize + normalize_token, 같은 질문/제목은 다시 계산하지 않음)"""
+    return tuple(normalize_token(token) for token in tokenize(text))
+
+
+def section_key(content: str) -> str:
+    """섹션 본문 내용 해시 (차종 변형 매뉴얼 간에 같은 본문이면 같은 키)"""
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class StoredSection:
+    """고유 본문 하나 (본문에서만 정해지는 값은 여기서 한 번만 계산)"""
+
+    __slots__ = ("key", "content", "content_lower", "length", "procedure", "problem", "__weakref__")
+
+    def __init__(self, key: str, content: str):
+        content_lower = content.lower()
+        self.key = key
+        self.content = content.encode("utf-8")
+        self.content_lower = content_lower.encode("utf-8")
+        self.length = len(content)
+        self.procedure = any(word in content_lower for word in PROCEDURE_CONTENT_WORDS)
+        self.problem = any(word in content_lower for word in PROBLEM_CONTENT_WORDS)
+
+
+class SectionStore:
+    """내용 주소 기반 섹션 저장소 (그랜저/그랜저 Hybrid처럼 본문이 같은 섹션은 한 벌만 보관)
+
+    매뉴얼은 StoredSection 참조 목록만 가지고, 어느 매뉴얼도 참조하지 않는 본문은
+    약한 참조라서 자동으로 해제됩니다. 제목 토큰도 고유 제목마다 한 번만 계산합니다.
+    """
+
+    def __init__(self, max_titles: int = 50000):
+        self._sections: "weakref.WeakValueDictionary[str, StoredSection]" = weakref.WeakValueDictionary()
+        self._title_tokens: Dict[str, frozenset] = {}
+        self.max_titles = max_titles
+        self._lock = threading.Lock()
+        self.interned = 0
+        self.reused = 0
+
+    def intern(self, content: str) -> StoredSection:
+        key = section_key(content)
+        with self._lock:
+            stored = self._sections.get(key)
+            if stored is None:
+                stored = self._sections[key] = StoredSection(key, content)
+            else:
+                self.reused += 1
+            self.interned += 1
+            return stored
+
+    def title_tokens(self, title: str) -> frozenset:
+        tokens = self._title_tokens.get(title)
+        if tokens is None:
+            tokens = frozenset(analyze(title))
+            with self._lock:
+                if len(self._title_tokens) >= self.max_titles:
+                    self._title_tokens.clear()
+                self._title_tokens[title] = tokens
+        return tokens
+
+    def get_stats(self) -> Dict[str, Any]:
+        sections = list(self._sections.values())
+        return {
+            "unique_sections": len(sections),
+            "unique_bytes": sum(len(s.content) + len(s.content_lower) for s in sections),
+            "interned": self.interned,
+            "reused": self.reused,
+            "titles": len(self._title_tokens)
+        }
+
+
+# 프로세스 전체에서 공유 (메모리 맵으로 연 공유 인덱스는 이 저장소를 거치지 않음)
+SECTION_STORE = SectionStore()
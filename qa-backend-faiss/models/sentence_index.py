@@ -0,0 +1,146 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+
+from models.section_store import normalize_token
+
+# BM25 파라미터 (짧은 문장 위주라 길이 정규화는 약하게)
+BM25_K1 = 1.2
+BM25_B = 0.5
+
+MIN_SENTENCE_CHARS = 8
+MAX_SENTENCE_CHARS = 300
+
+# 문장 경계: 마침표/물음표/느낌표 뒤 공백, 줄바꿈, 글머리 기호
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|[\n•▶■●※]')
+# 본문의 이미지/라벨 코드 (AnswerGenerator._clean_content와 같은 규칙)
+_NOISE = re.compile(r'(WL_\w+|정기 점검\s*\d+|2C_\w+)')
+# tokenize()와 같은 규칙을 정규식 하나로 (두 글자 이상, 또는 한 글자 숫자)
+_TERM = re.compile(r'[가-힣a-z0-9]{2,}|(?<![가-힣a-z0-9])[0-9](?![가-힣a-z0-9])')
+
+
+def sentence_terms(text: str) -> List[str]:
+    """BM25용 검색어 (section_store.analyze와 같은 결과: 질문과 문장에 같은 규칙)"""
+    return list(map(normalize_token, _TERM.findall(text.lower())))
+
+
+def split_sentences(content: str) -> List[str]:
+    sentences = []
+    for sentence in _SENTENCE_BOUNDARY.split(_NOISE.sub(" ", content)):
+        sentence = " ".join(sentence.split())
+        if MIN_SENTENCE_CHARS <= len(sentence) <= MAX_SENTENCE_CHARS:
+            sentences.append(sentence)
+    return sentences
+
+
+class SentenceIndex:
+    """추출형 답변용 문장 인덱스 (BM25로 질문과 가까운 문장 선택)
+
+    매뉴얼당 수천 문장이라 생성에 수백 ms가 걸리므로 매뉴얼 로드 때는 섹션 인덱스만 잡아 두고
+    워밍업이나 첫 사용 때 만듭니다. 같은 본문(content_key)의 섹션은 문장 목록을 공유하고,
+    IDF는 매뉴얼 전체 문장 기준입니다.
+    """
+
+    def __init__(self, section_index):
+        self._section_index = section_index
+        self._lock = threading.Lock()
+        self.built = False
+        self.sentences: List[str] = []
+        self.section_ranges: List[Tuple[int, int]] = []  # 섹션 번호 → (첫 문장 번호, 끝 문장 번호)
+        self.term_freqs: List[Dict[str, int]] = []
+        self.term_sets: List[frozenset] = []
+        self.lengths: List[int] = []
+        self.avg_length = 0.0
+        self.idf: Dict[str, float] = {}
+
+    @classmethod
+    def from_section_index(cls, index) -> "SentenceIndex":
+        return cls(index)
+
+    def build(self) -> "SentenceIndex":
+        if not self.built:
+            with self._lock:
+                if not self.built:
+                    self._build(self._section_index)
+                    self._section_index = None
+                    self.built = True
+        return self
+
+    def _build(self, index):
+        by_content: Dict[str, Tuple[int, int]] = {}
+        for idx in range(len(index)):
+            content_key = index.content_key(idx)
+            if content_key not in by_content:
+                start = len(self.sentences)
+                self.sentences.extend(split_sentences(index.content(idx)))
+                by_content[content_key] = (start, len(self.sentences))
+            self.section_ranges.append(by_content[content_key])
+
+        df = Counter()
+        for sentence in self.sentences:
+            terms = sentence_terms(sentence)
+            freqs = Counter(terms)
+            self.term_freqs.append(dict(freqs))
+            self.term_sets.append(frozenset(freqs))
+            self.lengths.append(len(terms))
+            df.update(freqs.keys())
+
+        n = len(self.sentences)
+        self.avg_length = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def __len__(self) -> int:
+        return len(self.build().sentences)
+
+    def score(self, query_terms: List[str], sentence_id: int) -> float:
+        freqs = self.term_freqs[sentence_id]
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[sentence_id] / max(self.avg_length, 1e-9))
+        total = 0.0
+        for term in query_terms:
+            tf = freqs.get(term)
+            if tf:
+                total += self.idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+        return total
+
+    def rank(self, query: str, section_weights: List[Tuple[int, float]]) -> List[Dict[str, Any]]:
+        """검색된 섹션들의 문장을 BM25 × 섹션 가중치로 정렬 (점수 0인 문장 제외)"""
+        self.build()
+        query_terms = list(dict.fromkeys(sentence_terms(query)))
+        ranked, seen = [], set()
+
+        for rank, (section_idx, weight) in enumerate(section_weights):
+            start, end = self.section_ranges[section_idx]
+            for sentence_id in range(start, end):
+                if sentence_id in seen:
+                    continue
+                seen.add(sentence_id)
+                score = self.score(query_terms, sentence_id)
+                if score > 0:
+                    ranked.append({"id": sentence_id, "score": score * weight, "section_rank": rank,
+                                   "position": sentence_id - start})
+
+        ranked.sort(key=lambda x: (-x["score"], x["id"]))
+        return ranked
+
+    def select(self, ranked: List[Dict[str, Any]], limit: int = 5, max_overlap: float = 0.6) -> List[Dict[str, Any]]:
+        """중복 제거 (이미 고른 문장과 검색어가 max_overlap 이상 겹치면 건너뜀), 고른 뒤 원문 순서로 정렬"""
+        selected = []
+        for item in ranked:
+            terms = self.term_sets[item["id"]]
+            if any(_overlap(terms, self.term_sets[other["id"]]) >= max_overlap for other in selected):
+                continue
+            selected.append(item)
+            if len(selected) >= limit:
+                break
+
+        # 절차 설명은 원문 순서가 중요: 섹션 순위 → 섹션 안 위치
+        selected.sort(key=lambda x: (x["section_rank"], x["position"]))
+        return selected
+
+
+def _overlap(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
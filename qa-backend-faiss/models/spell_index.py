@@ -0,0 +1,165 @@
+import re
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Set
+
+from models.section_store import analyze, normalize_token
+
+# 교정 대상 단어 사전: 이보다 적은 섹션에 나오는 본문 단어는 제외 (제목/키워드 단어는 모두 포함)
+MIN_TERM_DF = 2
+# 삭제 변형은 앞 PREFIX_LENGTH 자모까지만 생성 (SymSpell prefix length: 사전 크기를 제한)
+PREFIX_LENGTH = 7
+# 이보다 짧은 단어(글자 수)는 교정하지 않음 (두 글자 단어는 "연료" → "완료"처럼 다른 매뉴얼에만 있는 정상 단어를 바꾸기 쉬움)
+MIN_CHARS = 3
+# 자모 수가 이 이하면 편집 거리 1, 넘으면 2까지 허용 (세 글자 단어까지는 한 타만)
+SHORT_JAMO = 9
+
+# 본문에 없어도 교정하지 않는 질문 형식 단어
+QUESTION_WORDS = {
+    "어떻게", "어떡해", "어디", "언제", "무엇", "뭐야", "뭐예요", "왜", "알려줘", "알려주세요", "해줘", "해주세요",
+    "하나요", "인가요", "있나요", "되나요", "없나요", "생기면", "작동", "안돼요", "안되요", "해야"
+}
+
+# 본문 단어 (소문자 본문에서 두 글자 이상: tokenize()와 같은 문자 범위)
+_TERM = re.compile(r'[가-힣a-z0-9]{2,}')
+
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONGSEONG = " ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+
+def to_jamo(text: str) -> str:
+    """한글 음절을 초성/중성/종성 자모로 분해 (오타는 보통 자모 하나 차이: "공기앞" ↔ "공기압"), 영문/숫자는 그대로"""
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            out.append(_CHOSEONG[code // 588])
+            out.append(_JUNGSEONG[code % 588 // 28])
+            if code % 28:
+                out.append(_JONGSEONG[code % 28])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def deletes(word: str, max_distance: int) -> Set[str]:
+    """word에서 문자를 max_distance개까지 지운 변형 (word 포함)"""
+    variants, frontier = {word}, {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - variants
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """제한 Damerau-Levenshtein 거리 (max_distance를 넘으면 max_distance + 1)"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SpellIndex:
+    """오타 교정용 대칭 삭제(SymSpell) 사전 (매뉴얼 단어의 자모 삭제 변형 → 단어)
+
+    질문 단어도 같은 방식으로 삭제 변형을 만들어 사전에서 찾으므로 사전 크기와 상관없이
+    질문 단어마다 변형 수만큼만 조회하고, 편집 거리는 찾은 후보에만 계산합니다.
+    생성에 수백 ms가 걸려서 SentenceIndex처럼 워밍업이나 첫 사용 때 만듭니다.
+    """
+
+    def __init__(self, section_index):
+        self._section_index = section_index
+        self._lock = threading.Lock()
+        self.built = False
+        self.known: Set[str] = set()  # 교정하지 않는 단어 (매뉴얼에 나오는 모든 단어)
+        self.terms: List[str] = []  # 교정 후보 단어
+        self.term_jamo: List[str] = []
+        self.term_df: List[int] = []
+        self._deletes: Dict[str, List[int]] = {}
+        self.corrected = 0
+
+    @classmethod
+    def from_section_index(cls, index) -> "SpellIndex":
+        return cls(index)
+
+    def build(self) -> "SpellIndex":
+        if not self.built:
+            with self._lock:
+                if not self.built:
+                    self._build(self._section_index)
+                    self._section_index = None
+                    self.built = True
+        return self
+
+    def _build(self, index):
+        df, title_terms, seen_content = Counter(), set(), set()
+        for idx, record in enumerate(index.records):
+            for text in [record["title"], *(record["keywords"] or [])]:
+                title_terms.update(analyze(text))
+
+            content_key = index.content_key(idx)
+            if content_key in seen_content:
+                continue
+            seen_content.add(content_key)
+            raw_terms = set(_TERM.findall(index.content_lower_bytes(idx).decode("utf-8")))
+            df.update({normalize_token(term) for term in raw_terms})
+
+        self.known = set(df) | title_terms
+        for term in sorted(self.known):
+            # 제목/키워드 단어는 본문 빈도와 상관없이 후보
+            if term.isdigit() or (df[term] < MIN_TERM_DF and term not in title_terms):
+                continue
+            if len(term) < MIN_CHARS:
+                continue
+            jamo = to_jamo(term)
+            term_id = len(self.terms)
+            self.terms.append(term)
+            self.term_jamo.append(jamo)
+            self.term_df.append(df[term])
+            for variant in deletes(jamo[:PREFIX_LENGTH], self._max_distance(jamo)):
+                self._deletes.setdefault(variant, []).append(term_id)
+
+    @staticmethod
+    def _max_distance(jamo: str) -> int:
+        return 1 if len(jamo) <= SHORT_JAMO else 2
+
+    def correct(self, token: str) -> Optional[str]:
+        """사전에 없는 단어를 가장 가까운 매뉴얼 단어로 교정 (거리가 같으면 많은 섹션에 나오는 단어), 후보가 없으면 None"""
+        self.build()
+        if len(token) < MIN_CHARS or token in self.known or token in QUESTION_WORDS or token.isdigit():
+            return None
+        jamo = to_jamo(token)
+
+        max_distance = self._max_distance(jamo)
+        candidates = set()
+        for variant in deletes(jamo[:PREFIX_LENGTH], max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        best, best_key = None, None
+        for term_id in candidates:
+            distance = edit_distance(jamo, self.term_jamo[term_id], max_distance)
+            if distance <= max_distance:
+                key = (distance, -self.term_df[term_id], self.terms[term_id])
+                if best_key is None or key < best_key:
+                    best, best_key = self.terms[term_id], key
+
+        if best is not None:
+            self.corrected += 1
+        return best
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"built": self.built, "known": len(self.known), "terms": len(self.terms),
+                "deletes": len(self._deletes), "corrected": self.corrected}
@@ -1,80 +1,402 @@
 import faiss
 import numpy as np
+import json
 import pickle
 import os
-from typing import List, Tuple, Dict, Any
+import logging
+from typing import List, Tuple, Dict, Any, Optional, Sequence
 from pathlib import Path
 
+from models.metadata_store import MappedMetadataStore
+from services.vehicles import extract_vehicle_name
+
+logger = logging.getLogger(__name__)
+
+# 지원하는 인덱스 종류와 기본 빌드 파라미터
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+DEFAULT_INDEX_PARAMS = {
+    "nlist": 64,            # IVF 클러스터 수
+    "nprobe": 8,            # IVF 검색 시 탐색할 클러스터 수
+    "hnsw_m": 32,           # HNSW 노드당 연결 수
+    "ef_construction": 80,  # HNSW 빌드 탐색 폭
+    "ef_search": 64         # HNSW 검색 탐색 폭
+}
+
+# IVF는 첫 배치로 학습하므로, 학습한 벡터 수의 이 배수만큼 쌓이면 전체로 다시 학습
+IVF_RETRAIN_GROWTH = 2
+# 클러스터당 이만큼 학습했으면 더 학습하지 않음 (faiss 기본 max_points_per_centroid)
+IVF_MAX_POINTS_PER_CENTROID = 256
+# filters.json 형식 버전 (이전 버전이면 메타데이터를 다시 훑어서 생성)
+FILTERS_VERSION = 2
+
+
+def derive_filter_value(record: Dict[str, Any], field: str) -> Optional[str]:
+    """필터 필드 값 (기존 메타데이터에는 vehicle이 없으므로 source 파일명에서 차량명 추출)"""
+    value = record.get(field)
+    if value is None and field == "vehicle" and record.get("source"):
+        value = extract_vehicle_name(Path(record["source"]).stem)
+    return str(value) if value is not None else None
+
 class FAISSVectorStore:
-    def __init__(self, dimension: int, store_path: str = "./data/vectors/"):
+    def __init__(self, dimension: int, store_path: str = "./data/vectors/",
+                 checkpoint_every: int = 5000, fsync: bool = True,
+                 index_type: str = "flat", index_params: Optional[Dict[str, int]] = None,
+                 filter_fields: Sequence[str] = ("vehicle", "source")):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"지원하지 않는 인덱스 종류입니다: {index_type} (지원: {INDEX_TYPES})")
+
         self.dimension = dimension
         self.store_path = Path(store_path)
         self.store_path.mkdir(parents=True, exist_ok=True)
-        
+
+        # 체크포인트 파일과 추가분 로그 경로
+        self.index_path = self.store_path / "faiss.index"
+        self.config_path = self.store_path / "index_config.json"
+        self.filters_path = self.store_path / "filters.json"
+        self.metadata_path = self.store_path / "metadata.bin"
+        self.legacy_metadata_path = self.store_path / "metadata.pkl"
+        self.log_path = self.store_path / "metadata.log"
+
+        # 📝 쓰기 지연 설정: 체크포인트 이후 쌓인 벡터가 이 개수를 넘으면 전체 저장
+        self.checkpoint_every = checkpoint_every
+        self.fsync = fsync
+        self.pending_vectors = 0
+
+        # 인덱스 종류/빌드 파라미터 (저장된 인덱스가 있으면 저장된 설정이 우선)
+        self.index_type = index_type
+        self.index_params = {**DEFAULT_INDEX_PARAMS, **(index_params or {})}
+        # IVF: 요청한 클러스터 수 (학습 데이터가 적으면 index_params["nlist"]는 더 작음) / 학습에 쓴 벡터 수
+        self.target_nlist = self.index_params["nlist"]
+        self.trained_on = 0
+
+        # 🚗 메타데이터 필드별 벡터 ID 목록 (차량/매뉴얼 단위 필터링용)
+        self.filter_fields = list(filter_fields)
+        self.filter_ids: Dict[str, Dict[str, List[int]]] = {field: {} for field in self.filter_fields}
+
         # FAISS 인덱스 초기화 (내적 유사도 사용)
-        self.index = faiss.IndexFlatIP(dimension)
-        
-        # 메타데이터 저장용
-        self.metadata: List[Dict[str, Any]] = []
-        
+        self.index = self._create_index(self.index_type)
+
+        # 메타데이터 저장용 (메모리 맵, 검색 결과 행만 디코딩)
+        self.metadata = MappedMetadataStore()
+
         # 저장된 인덱스가 있으면 로드
         self.load_index()
-    
+
+    def _create_index(self, index_type: str, train_size: Optional[int] = None) -> faiss.Index:
+        """설정에 맞는 빈 인덱스 생성"""
+        if index_type == "ivf":
+            # 학습 데이터보다 클러스터가 많으면 학습이 불가능하므로 줄여서 생성
+            nlist = self.target_nlist
+            if train_size is not None:
+                nlist = max(1, min(nlist, train_size // 39))
+                self.index_params["nlist"] = nlist
+            index = faiss.index_factory(self.dimension, f"IVF{nlist},Flat", faiss.METRIC_INNER_PRODUCT)
+        elif index_type == "hnsw":
+            index = faiss.index_factory(self.dimension, f"HNSW{self.index_params['hnsw_m']}", faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.index_params["ef_construction"]
+        else:
+            index = faiss.IndexFlatIP(self.dimension)
+
+        self._apply_search_params(index, index_type)
+        return index
+
+    def _apply_search_params(self, index: faiss.Index, index_type: str):
+        """검색 시 파라미터 (nprobe, efSearch) 적용"""
+        if index_type == "ivf":
+            faiss.extract_index_ivf(index).nprobe = self.index_params["nprobe"]
+        elif index_type == "hnsw":
+            index.hnsw.efSearch = self.index_params["ef_search"]
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """검색 정확도/속도 조정 (빌드 없이 변경 가능한 값만)"""
+        if nprobe is not None:
+            self.index_params["nprobe"] = nprobe
+        if ef_search is not None:
+            self.index_params["ef_search"] = ef_search
+        self._apply_search_params(self.index, self.index_type)
+
     def add_vectors(self, vectors: np.ndarray, metadata: List[Dict[str, Any]]):
-        """벡터와 메타데이터 추가"""
+        """벡터와 메타데이터 추가 (로그에 추가 기록, 주기적으로 체크포인트)"""
         # L2 정규화 (코사인 유사도를 위해)
         vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
-        
-        self.index.add(vectors.astype('float32'))
+        vectors = vectors.astype('float32')
+
+        start = self.index.ntotal
+        # 메타데이터를 먼저 추가: 저장할 수 없는 값이면 인덱스에 벡터가 들어가기 전에 실패
         self.metadata.extend(metadata)
-        
-        # 자동 저장
-        self.save_index()
-    
-    def search(self, query_vector: np.ndarray, k: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
-        """유사도 검색"""
+        self._add_to_index(vectors)
+        self._register_filters(start, metadata)
+
+        # 📝 전체 파일을 다시 쓰지 않고 추가분만 로그에 기록
+        self._append_log(start, vectors, metadata)
+        self.pending_vectors += len(vectors)
+
+        if self.pending_vectors >= self.checkpoint_every:
+            self.flush()
+
+    def _add_to_index(self, vectors: np.ndarray):
+        """인덱스에 벡터 추가 (IVF는 첫 추가 시 해당 배치로 학습, 크게 늘어나면 전체로 다시 학습)"""
+        if not self.index.is_trained:
+            self.index = self._create_index(self.index_type, train_size=len(vectors))
+            self.index.train(vectors)
+            self.trained_on = len(vectors)
+        self.index.add(vectors)
+
+        if self.index_type == "ivf" and self.index.ntotal >= IVF_RETRAIN_GROWTH * self.trained_on \
+                and self.trained_on < self.target_nlist * IVF_MAX_POINTS_PER_CENTROID:
+            self._retrain()
+
+    def _retrain(self):
+        """IVF 클러스터를 지금까지 쌓인 전체 벡터로 다시 학습 (학습 수가 배로 늘 때만이라 전체 비용은 선형)"""
+        vectors = self.reconstruct_all()
+        self.index = self._create_index(self.index_type, train_size=len(vectors))
+        self.index.train(vectors)
+        self.index.add(vectors)
+        self.trained_on = len(vectors)
+        logger.info(f"🔄 IVF 재학습: {len(vectors)}개 벡터, 클러스터 {self.index_params['nlist']}개")
+
+    def _register_filters(self, start: int, metadata: List[Dict[str, Any]]):
+        """필터 대상 필드 값별로 벡터 ID 기록"""
+        for offset, record in enumerate(metadata):
+            for field in self.filter_fields:
+                value = derive_filter_value(record, field)
+                if value is not None:
+                    self.filter_ids[field].setdefault(value, []).append(start + offset)
+
+    def _append_log(self, start: int, vectors: np.ndarray, metadata: List[Dict[str, Any]]):
+        """추가된 벡터/메타데이터를 로그 파일 끝에 기록"""
+        with open(self.log_path, 'ab') as f:
+            pickle.dump((start, vectors, metadata), f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def search(self, query_vector: np.ndarray, k: int = 5,
+               filters: Optional[Dict[str, Any]] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """유사도 검색 (filters: {"vehicle": "그랜저"} 처럼 메타데이터 값으로 제한, vehicle은 source 파일명 기준)"""
         if self.index.ntotal == 0:
             return []
-        
+
         # L2 정규화
         query_vector = query_vector / np.linalg.norm(query_vector, axis=1, keepdims=True)
-        
-        scores, indices = self.index.search(query_vector.astype('float32'), k)
-        
+
+        params = None
+        if filters:
+            allowed = self._filtered_ids(filters)
+            if allowed.size == 0:
+                return []
+            params = self._make_search_params(faiss.IDSelectorBatch(allowed))
+
+        scores, indices = self.index.search(query_vector.astype('float32'), k, params=params)
+
         results = []
         for score, idx in zip(scores[0], indices[0]):
             if idx != -1:  # 유효한 인덱스인 경우
                 results.append((float(score), self.metadata[idx]))
-        
+
         return results
-    
+
+    def _filtered_ids(self, filters: Dict[str, Any]) -> np.ndarray:
+        """필터 조건을 모두 만족하는 벡터 ID (값이 리스트면 그 중 하나)"""
+        allowed = None
+        for field, value in filters.items():
+            if field not in self.filter_ids:
+                raise ValueError(f"필터링할 수 없는 필드입니다: {field} (지원: {self.filter_fields})")
+
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            ids = [np.asarray(self.filter_ids[field].get(str(v), []), dtype='int64') for v in values]
+            field_ids = np.unique(np.concatenate(ids)) if ids else np.zeros(0, dtype='int64')
+            allowed = field_ids if allowed is None else np.intersect1d(allowed, field_ids)
+
+        return allowed if allowed is not None else np.zeros(0, dtype='int64')
+
+    def _make_search_params(self, selector) -> faiss.SearchParameters:
+        """인덱스 종류별 검색 파라미터에 ID 선택자 연결"""
+        if self.index_type == "ivf":
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.index_params["nprobe"])
+        if self.index_type == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.index_params["ef_search"])
+        return faiss.SearchParameters(sel=selector)
+
+    def rebuild(self, index_type: str, index_params: Optional[Dict[str, int]] = None):
+        """저장된 벡터로 다른 종류의 인덱스를 새로 빌드"""
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"지원하지 않는 인덱스 종류입니다: {index_type} (지원: {INDEX_TYPES})")
+
+        vectors = self.reconstruct_all()
+
+        self.index_type = index_type
+        self.index_params = {**DEFAULT_INDEX_PARAMS, **(index_params or {})}
+        self.target_nlist = self.index_params["nlist"]
+        self.trained_on = 0
+        self.index = self._create_index(index_type)
+        if len(vectors):
+            self._add_to_index(vectors)
+
+        self.flush()
+
+    def reconstruct_all(self) -> np.ndarray:
+        """인덱스에 저장된 전체 벡터 복원"""
+        if self.index.ntotal == 0:
+            return np.zeros((0, self.dimension), dtype='float32')
+        if self.index_type == "ivf":
+            faiss.extract_index_ivf(self.index).make_direct_map()
+        return self.index.reconstruct_n(0, self.index.ntotal)
+
+    def flush(self):
+        """인덱스와 메타데이터 체크포인트 저장 후 로그 비우기"""
+        # 임시 파일에 쓴 뒤 교체 (중간에 죽어도 기존 파일은 온전함)
+        index_tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        faiss.write_index(self.index, str(index_tmp))
+        if self.fsync:
+            # faiss는 fsync하지 않으므로 교체 전에 직접 (전원이 꺼져도 잘린 인덱스로 바뀌지 않도록)
+            self._fsync_path(index_tmp)
+        os.replace(index_tmp, self.index_path)
+
+        self._write_json_atomic(self.config_path, {
+            "index_type": self.index_type,
+            "dimension": self.dimension,
+            "index_params": self.index_params,
+            "target_nlist": self.target_nlist,
+            "trained_on": self.trained_on,
+            "filter_fields": self.filter_fields
+        })
+        self._write_json_atomic(self.filters_path, {"version": FILTERS_VERSION, "fields": self.filter_ids})
+
+        # 메타데이터도 임시 파일 → 교체 방식으로 저장
+        self.metadata.save(self.metadata_path, fsync=self.fsync)
+
+        # 교체(rename) 자체도 디스크에 기록된 뒤에만 로그 제거
+        if self.fsync:
+            self._fsync_path(self.store_path, directory=True)
+        if self.log_path.exists():
+            self.log_path.unlink()
+        self.pending_vectors = 0
+
+    @staticmethod
+    def _fsync_path(path: Path, directory: bool = False):
+        """이미 쓴 파일이나 디렉토리 항목(rename 결과)을 디스크에 기록"""
+        fd = os.open(path, os.O_RDONLY | (getattr(os, "O_DIRECTORY", 0) if directory else 0))
+        try:
+            os.fsync(fd)
+        except OSError:
+            # 디렉토리 fsync를 지원하지 않는 플랫폼 (Windows 등)
+            if not directory:
+                raise
+        finally:
+            os.close(fd)
+
+    def _write_json_atomic(self, path: Path, data: Any):
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
     def save_index(self):
-        """인덱스와 메타데이터 저장"""
-        index_path = self.store_path / "faiss.index"
-        metadata_path = self.store_path / "metadata.pkl"
-        
-        faiss.write_index(self.index, str(index_path))
-        
-        with open(metadata_path, 'wb') as f:
-            pickle.dump(self.metadata, f)
-    
+        """인덱스와 메타데이터 저장 (flush와 동일)"""
+        self.flush()
+
     def load_index(self):
-        """저장된 인덱스와 메타데이터 로드"""
-        index_path = self.store_path / "faiss.index"
-        metadata_path = self.store_path / "metadata.pkl"
-        
-        if index_path.exists() and metadata_path.exists():
-            self.index = faiss.read_index(str(index_path))
-            
-            with open(metadata_path, 'rb') as f:
-                self.metadata = pickle.load(f)
-            
-            print(f"✅ 기존 인덱스 로드 완료: {self.index.ntotal}개 벡터")
-    
+        """저장된 인덱스와 메타데이터 로드 (체크포인트 + 로그 재생)"""
+        if self.index_path.exists() and not self.metadata_path.exists() and self.legacy_metadata_path.exists():
+            self._migrate_legacy_metadata()
+
+        if self.index_path.exists() and self.metadata_path.exists():
+            self._load_config()
+            self.index = faiss.read_index(str(self.index_path))
+            self._apply_search_params(self.index, self.index_type)
+            if not self.trained_on:
+                # 이전 버전 설정에는 없음: 지금 벡터 수로 (다음 재학습은 두 배가 됐을 때)
+                self.trained_on = self.index.ntotal
+            self.metadata = MappedMetadataStore(self.metadata_path)
+            self._load_filters()
+
+        replayed = self._replay_log()
+
+        if self.index.ntotal > 0:
+            logger.info(f"✅ 기존 인덱스 로드 완료: {self.index.ntotal}개 벡터 ({self.index_type}, 로그 재생 {replayed}개)")
+
+    def _load_config(self):
+        """저장된 인덱스 종류/빌드 파라미터 복원 (설정 파일이 없으면 flat)"""
+        if not self.config_path.exists():
+            self.index_type = "flat"
+            return
+
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+        self.index_type = config.get("index_type", "flat")
+        self.index_params = {**DEFAULT_INDEX_PARAMS, **config.get("index_params", {})}
+        self.target_nlist = config.get("target_nlist", self.index_params["nlist"])
+        self.trained_on = config.get("trained_on", 0)
+
+    def _load_filters(self):
+        """필터 ID 목록 로드 (없으면 메타데이터를 한 번 훑어서 생성)"""
+        if self.filters_path.exists():
+            with open(self.filters_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            # 이전 형식(버전 없음)은 vehicle을 source에서 추출하기 전이므로 다시 생성
+            saved = saved.get("fields", {}) if saved.get("version") == FILTERS_VERSION else {}
+            if all(field in saved for field in self.filter_fields):
+                # 메타데이터 교체 전에 중단된 경우 로그 재생에서 다시 등록되므로 범위 밖 ID는 제외
+                count = len(self.metadata)
+                self.filter_ids = {
+                    field: {value: [i for i in ids if i < count] for value, ids in saved[field].items()}
+                    for field in self.filter_fields
+                }
+                return
+
+        self.filter_ids = {field: {} for field in self.filter_fields}
+        self._register_filters(0, list(self.metadata))
+
+    def _migrate_legacy_metadata(self):
+        """기존 metadata.pkl을 메모리 맵 형식으로 한 번만 변환"""
+        with open(self.legacy_metadata_path, 'rb') as f:
+            records = pickle.load(f)
+
+        MappedMetadataStore.from_records(self.metadata_path, records, fsync=self.fsync).close()
+        logger.info(f"🔄 메타데이터 형식 변환 완료: {self.legacy_metadata_path.name} → {self.metadata_path.name}")
+
+    def _replay_log(self) -> int:
+        """체크포인트 이후 로그에 기록된 추가분 재생"""
+        if not self.log_path.exists():
+            return 0
+
+        replayed = 0
+        with open(self.log_path, 'r+b') as f:
+            while True:
+                good_offset = f.tell()
+                try:
+                    start, vectors, metadata = pickle.load(f)
+                except EOFError:
+                    break
+                except Exception:
+                    # 마지막 기록이 쓰다 만 상태면 잘라내고 이후 추가가 이어지도록 함
+                    logger.warning("⚠️ 로그 끝부분이 손상되어 이후 기록은 무시합니다")
+                    f.truncate(good_offset)
+                    break
+
+                # 인덱스/메타데이터 교체 사이에 중단된 경우를 위해 각각 따로 판단
+                if start >= self.index.ntotal:
+                    self._add_to_index(vectors)
+                    replayed += len(vectors)
+                if start >= len(self.metadata):
+                    self.metadata.extend(metadata)
+                    self._register_filters(start, metadata)
+
+        self.pending_vectors = replayed
+        return replayed
+
     def get_stats(self) -> Dict[str, Any]:
         """인덱스 통계 정보"""
         return {
             "total_vectors": self.index.ntotal,
             "dimension": self.dimension,
-            "metadata_count": len(self.metadata)
-        }
\ No newline at end of file
+            "metadata_count": len(self.metadata),
+            "pending_vectors": self.pending_vectors,
+            "index_type": self.index_type,
+            "index_params": self.index_params
+        }
@@ -0,0 +1,283 @@
+"""차량 샤딩 라우터 (여러 노드에 차량을 나눠 로드하고 /ask, /search, /suggest를 담당 노드로 전달)
+
+노드는 main.py 그대로 실행하되 같은 노드 목록과 자기 주소를 주면 담당 차량만 로드합니다.
+
+    SHARD_NODES=http://127.0.0.1:8081,http://127.0.0.1:8082 SHARD_SELF=http://127.0.0.1:8081 PORT=8081 python main.py
+    SHARD_NODES=http://127.0.0.1:8081,http://127.0.0.1:8082 SHARD_SELF=http://127.0.0.1:8082 PORT=8082 python main.py
+    SHARD_NODES=http://127.0.0.1:8081,http://127.0.0.1:8082 PORT=8080 python router.py
+
+로컬에서 한 번에 띄우려면 (노드는 PORT+1부터, 모두 같은 data/ 디렉토리 사용):
+
+    python router.py --spawn-nodes 3
+
+차량마다 SHARD_REPLICAS개 노드가 담당하므로 (기본 2) 노드 하나가 죽거나 워밍업 중이어도
+복제 노드가 대신 응답합니다.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
+
+from services.logging_config import setup_logging, fields, RequestContextMiddleware
+from services.http_responses import FastJSONResponse
+from services.metrics import REGISTRY
+from services.shard_ring import HashRing, parse_nodes
+from services.shard_router import ShardRouter
+from services.vehicles import SUPPORTED_VEHICLES, FRONTEND_VEHICLES, map_vehicle_to_backend, map_vehicle_to_frontend
+
+load_dotenv()
+
+setup_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    output_format=os.getenv("LOG_FORMAT", "text"),
+    sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "0.05")),
+    queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+)
+logger = logging.getLogger(__name__)
+
+PORT = int(os.getenv("PORT", "8080"))
+HOST = os.getenv("HOST", "0.0.0.0")
+
+# 노드 목록과 링 설정은 노드(main.py)와 같아야 함
+SHARD_NODES = parse_nodes(os.getenv("SHARD_NODES"))
+SHARD_REPLICAS = int(os.getenv("SHARD_REPLICAS", "2"))
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "64"))
+
+ROUTER_TIMEOUT = float(os.getenv("ROUTER_TIMEOUT", "60"))  # /ask는 LLM 답변까지 기다림
+ROUTER_CONNECT_TIMEOUT = float(os.getenv("ROUTER_CONNECT_TIMEOUT", "1"))
+ROUTER_MAX_CONNECTIONS = int(os.getenv("ROUTER_MAX_CONNECTIONS", "200"))  # 노드 keep-alive 연결 풀 크기
+ROUTER_HEALTH_INTERVAL = float(os.getenv("ROUTER_HEALTH_INTERVAL", "2"))
+
+app = FastAPI(
+    title="현대자동차 매뉴얼 QA 라우터",
+    description="차량별 담당 노드로 요청 전달",
+    version="3.0.0",
+    default_response_class=FastJSONResponse
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=False,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Request-ID", "ETag", "X-Answer-Mode", "X-Shard-Node"],
+)
+app.add_middleware(RequestContextMiddleware)
+
+router: Optional[ShardRouter] = None
+
+
+@app.on_event("startup")
+async def startup_event():
+    global router
+    if not SHARD_NODES:
+        logger.error("❌ SHARD_NODES가 비어 있어 전달할 노드가 없습니다.")
+        return
+    ring = HashRing(SHARD_NODES, SUPPORTED_VEHICLES, vnodes=SHARD_VNODES, replicas=SHARD_REPLICAS)
+    router = ShardRouter(ring, timeout=ROUTER_TIMEOUT, connect_timeout=ROUTER_CONNECT_TIMEOUT,
+                         max_connections=ROUTER_MAX_CONNECTIONS, health_interval=ROUTER_HEALTH_INTERVAL)
+    await router.start()
+    for vehicle, owners in ring.assignments().items():
+        logger.info(f"🧩 {map_vehicle_to_frontend(vehicle)} → {owners}")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if router:
+        await router.close()
+
+
+def get_router() -> ShardRouter:
+    if router is None:
+        raise HTTPException(status_code=503, detail="라우터가 초기화되지 않았습니다.")
+    return router
+
+
+def resolve_vehicle(vehicle: Optional[str]) -> str:
+    """요청의 차량명 → 링 키 (백엔드 차량명)"""
+    if not vehicle:
+        raise HTTPException(status_code=400, detail="차량을 선택해주세요.")
+    backend_vehicle = map_vehicle_to_backend(vehicle)
+    if backend_vehicle not in SUPPORTED_VEHICLES:
+        raise HTTPException(status_code=404, detail=f"'{vehicle}' 매뉴얼을 찾을 수 없습니다. 지원 차량: {FRONTEND_VEHICLES}")
+    return backend_vehicle
+
+
+async def read_vehicle_from_body(request: Request) -> Tuple[bytes, Optional[str]]:
+    """본문과 본문의 vehicle (라우팅에만 쓰고 본문은 그대로 전달)"""
+    body = await request.body()
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="올바른 JSON 본문이 아닙니다.")
+    return body, payload.get("vehicle") if isinstance(payload, dict) else None
+
+
+def request_path(request: Request) -> str:
+    return f"{request.url.path}?{request.url.query}" if request.url.query else request.url.path
+
+
+@app.post("/ask")
+async def ask_question(request: Request):
+    body, vehicle = await read_vehicle_from_body(request)
+    return await get_router().forward(resolve_vehicle(vehicle), "ask", "POST", "/ask", dict(request.headers), body)
+
+
+@app.get("/search")
+async def search_get(request: Request):
+    vehicle = resolve_vehicle(request.query_params.get("vehicle"))
+    return await get_router().forward(vehicle, "search", "GET", request_path(request), dict(request.headers))
+
+
+@app.post("/search")
+async def search_post(request: Request):
+    body, vehicle = await read_vehicle_from_body(request)
+    return await get_router().forward(resolve_vehicle(vehicle), "search", "POST", "/search",
+                                      dict(request.headers), body)
+
+
+@app.get("/suggest")
+async def suggest(request: Request):
+    vehicle = resolve_vehicle(request.query_params.get("vehicle"))
+    return await get_router().forward(vehicle, "suggest", "GET", request_path(request), dict(request.headers))
+
+
+@app.post("/upload_json/{vehicle}")
+async def upload_json(vehicle: str, request: Request):
+    """담당 노드 모두에 업로드
+
+    성공한 노드 중 가장 앞 노드(보통 기본 노드)의 응답을 반환하고, 노드별 결과를 본문의
+    replication 필드에 붙입니다 (일부 노드만 성공하면 complete가 false, 실패 노드는 로그).
+    """
+    shard_router = get_router()
+    backend_vehicle = resolve_vehicle(vehicle)
+    body = await request.body()
+    owners = shard_router.ring.owners(backend_vehicle)
+    results: Dict[str, Any] = {}
+    responses = []
+    for node in owners:
+        try:
+            upstream = await shard_router.client.post(
+                f"{node}{request.url.path}", content=body,
+                headers={"content-type": request.headers.get("content-type", "")}
+            )
+        except Exception as e:
+            results[node] = type(e).__name__
+            logger.warning(f"⚠️ 업로드 전달 실패: {node}", extra=fields(node=node, error=type(e).__name__))
+            continue
+        results[node] = upstream.status_code
+        responses.append((node, upstream))
+        if upstream.status_code >= 300:
+            logger.warning(f"⚠️ 업로드 실패 응답: {node} (HTTP {upstream.status_code})",
+                           extra=fields(node=node, vehicle=backend_vehicle, status=upstream.status_code))
+    if not responses:
+        raise HTTPException(status_code=503, detail="담당 노드에 연결할 수 없습니다.", headers={"Retry-After": "1"})
+
+    succeeded = [node for node, result in results.items() if isinstance(result, int) and result < 300]
+    if succeeded and len(succeeded) < len(owners):
+        logger.warning(f"⚠️ {backend_vehicle} 업로드 일부 노드만 성공 ({len(succeeded)}/{len(owners)})",
+                       extra=fields(vehicle=backend_vehicle, nodes=results))
+    # 기본 노드가 실패해도 복제 노드가 성공했으면 성공 응답을 반환
+    node, upstream = next(((node, upstream) for node, upstream in responses if node in succeeded), responses[0])
+
+    try:
+        payload = upstream.json()
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        return Response(content=upstream.content, status_code=upstream.status_code,
+                        media_type=upstream.headers.get("content-type"), headers={"X-Shard-Node": node})
+    payload["replication"] = {
+        "nodes": results,
+        "succeeded": len(succeeded),
+        "total": len(owners),
+        "complete": len(succeeded) == len(owners)
+    }
+    return FastJSONResponse(payload, status_code=upstream.status_code, headers={"X-Shard-Node": node})
+
+
+@app.get("/vehicles")
+async def get_vehicles():
+    """준비된 노드들의 사용 가능 차량 합집합"""
+    shard_router = get_router()
+    nodes = [node for node in shard_router.ring.nodes if shard_router.healthy[node]]
+    payloads = await asyncio.gather(*(shard_router.fetch_json(node, "/vehicles") for node in nodes))
+    available = set()
+    for payload in payloads:
+        available.update((payload or {}).get("available_vehicles", []))
+    return {
+        "vehicles": FRONTEND_VEHICLES,
+        "available_vehicles": [vehicle for vehicle in FRONTEND_VEHICLES if vehicle in available]
+    }
+
+
+@app.get("/health")
+def health_check():
+    return {"status": "healthy", "role": "router", "shard": router.get_stats() if router else None}
+
+
+@app.get("/ready")
+def readiness_check():
+    """차량마다 준비된 담당 노드가 하나 이상 있으면 준비 완료"""
+    if router is None:
+        return FastJSONResponse({"ready": False}, status_code=503, headers={"Retry-After": "1"})
+    unavailable = [map_vehicle_to_frontend(vehicle) for vehicle, owners in router.ring.assignments().items()
+                   if not any(router.healthy[node] for node in owners)]
+    state = {"ready": not unavailable, "unavailable_vehicles": unavailable}
+    if unavailable:
+        return FastJSONResponse(state, status_code=503, headers={"Retry-After": "1"})
+    return state
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def spawn_nodes(count: int, base_port: int) -> List[subprocess.Popen]:
+    """로컬 노드 count개 실행 (PORT+1부터, 모두 같은 SHARD_NODES)"""
+    nodes = [f"http://127.0.0.1:{base_port + i + 1}" for i in range(count)]
+    processes = []
+    for node in nodes:
+        env: Dict[str, str] = {
+            **os.environ,
+            "SHARD_NODES": ",".join(nodes),
+            "SHARD_SELF": node,
+            "SHARD_REPLICAS": str(SHARD_REPLICAS),
+            "SHARD_VNODES": str(SHARD_VNODES),
+            "HOST": "127.0.0.1",
+            "PORT": node.rsplit(":", 1)[1]
+        }
+        processes.append(subprocess.Popen([sys.executable, "main.py"], cwd=Path(__file__).resolve().parent, env=env))
+    os.environ["SHARD_NODES"] = ",".join(nodes)
+    return processes
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="차량 샤딩 라우터")
+    parser.add_argument("--spawn-nodes", type=int, default=0, help="로컬 노드 N개를 같이 실행 (PORT+1부터)")
+    args = parser.parse_args()
+
+    processes = spawn_nodes(args.spawn_nodes, PORT) if args.spawn_nodes else []
+    SHARD_NODES = parse_nodes(os.getenv("SHARD_NODES"))
+    logger.info(f"🚀 라우터 시작: {HOST}:{PORT} (노드 {len(SHARD_NODES)}개, 복제 {SHARD_REPLICAS})")
+    try:
+        uvicorn.run(app, host=HOST, port=PORT, log_level="info", log_config=None)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
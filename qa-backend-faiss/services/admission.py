@@ -0,0 +1,67 @@
+import asyncio
+import time
+from typing import Dict, Any
+
+from services.metrics import ADMISSION_DECISIONS, ADMISSION_WAIT_SECONDS
+
+
+class AdmissionLimiter:
+    """단계별 동시 실행 수 + 대기열 길이 제한 (이벤트 루프 안에서만 사용)
+
+    실행 중인 작업이 max_concurrent개면 max_queue개까지 queue_timeout초 동안 기다리고,
+    대기열이 차 있거나 시간 안에 자리가 나지 않으면 바로 거절합니다 (호출한 쪽에서 낮은 단계로 대체하거나 429).
+    max_concurrent가 0이면 제한 없음.
+    """
+
+    def __init__(self, stage: str, max_concurrent: int, max_queue: int = 0, queue_timeout: float = 1.0):
+        self.stage = stage
+        self.max_concurrent = max(0, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.max_concurrent) if self.max_concurrent else None
+        self.active = 0
+        self.waiting = 0
+
+    async def acquire(self) -> bool:
+        if self._semaphore is None:
+            self.active += 1
+            ADMISSION_DECISIONS.inc(self.stage, "admitted")
+            return True
+
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                ADMISSION_DECISIONS.inc(self.stage, "rejected")
+                return False
+
+            self.waiting += 1
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                ADMISSION_DECISIONS.inc(self.stage, "timeout")
+                return False
+            finally:
+                self.waiting -= 1
+                ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, self.stage)
+            ADMISSION_DECISIONS.inc(self.stage, "queued")
+        else:
+            await self._semaphore.acquire()
+            ADMISSION_DECISIONS.inc(self.stage, "admitted")
+
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent or None,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout
+        }
+
@@ -0,0 +1,137 @@
+import re
+import threading
+import time
+import zlib
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+from models.query_cache import normalize_query
+
+# HashingEncoder 기본 임계값: benchmarks/answer_cache_pairs.json 라벨 쌍에서 오탐 0개인 최저값
+# (python -m benchmarks.answer_cache_calibration, 0.6은 주제만 겹치는 다른 질문 20%를 적중으로 처리)
+HASHING_ENCODER_THRESHOLD = 0.82
+
+
+class HashingEncoder:
+    """가벼운 로컬 인코더: 글자 n-gram 해싱 벡터 (모델 없이 EmbeddingModel.encode_query 대체)"""
+
+    def __init__(self, dimension: int = 1024, ngram_sizes: Tuple[int, ...] = (2, 3)):
+        self.dimension = dimension
+        self.ngram_sizes = ngram_sizes
+        self.model_name = f"hashing-{dimension}-{'-'.join(map(str, ngram_sizes))}"
+
+    def encode_query(self, query: str) -> np.ndarray:
+        vector = np.zeros((1, self.dimension), dtype=np.float32)
+
+        for token in re.findall(r'[가-힣a-z0-9]+', normalize_query(query)):
+            padded = f"<{token}>"
+            for n in self.ngram_sizes:
+                for i in range(len(padded) - n + 1):
+                    # crc32는 프로세스가 달라도 값이 같음 (hash()는 실행마다 달라짐)
+                    vector[0, zlib.crc32(padded[i:i + n].encode("utf-8")) % self.dimension] += 1.0
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+class SemanticAnswerCache:
+    """차량별 질문 벡터 인덱스 기반 유사 질문 답변 캐시
+
+    새 질문이 저장된 질문과 임계값 이상으로 비슷하고, 같은 최상위 섹션/질문 의도로
+    이어질 때만 저장된 답변을 돌려줍니다.
+    """
+
+    def __init__(self, encoder, threshold: float = HASHING_ENCODER_THRESHOLD, max_entries_per_vehicle: int = 1000):
+        self.encoder = encoder
+        self.threshold = threshold
+        self.max_entries_per_vehicle = max_entries_per_vehicle
+
+        # 차량별 링 버퍼: 미리 잡아둔 질문 벡터 행렬 (IndexFlatIP와 같은 내적 검색) + 같은 슬롯의 항목
+        # 용량을 채운 뒤에는 가장 오래된 슬롯을 덮어씀 (저장마다 행렬을 새로 만들지 않음)
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._entries: Dict[str, List[Optional[Dict[str, Any]]]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def section_key(section: Dict[str, Any]) -> str:
+        return f"{section.get('source', '')}#{section.get('section_number', '')}"
+
+    def encode(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.encoder.encode_query(question), dtype=np.float32).reshape(1, -1)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def lookup(self, vehicle: str, question: str, best_section: Dict[str, Any],
+               intent: str = "", question_vector: Optional[np.ndarray] = None) -> Optional[Dict[str, Any]]:
+        """비슷한 질문의 답변 찾기 (같은 섹션/의도일 때만)"""
+        section_key = self.section_key(best_section)
+        vector = question_vector if question_vector is not None else self.encode(question)
+
+        with self._lock:
+            size = self._sizes.get(vehicle, 0)
+            if size == 0:
+                self.misses += 1
+                return None
+
+            similarities = self._vectors[vehicle][:size] @ vector[0]
+            # 유사도 높은 순으로 같은 섹션/의도 항목 탐색
+            for idx in np.argsort(-similarities):
+                if similarities[idx] < self.threshold:
+                    break
+                entry = self._entries[vehicle][idx]
+                if entry["section_key"] == section_key and entry["intent"] == intent:
+                    entry["hits"] += 1
+                    self.hits += 1
+                    return {**entry, "similarity": float(similarities[idx])}
+
+            self.misses += 1
+            return None
+
+    def store(self, vehicle: str, question: str, best_section: Dict[str, Any], answer: str,
+              intent: str = "", question_vector: Optional[np.ndarray] = None):
+        """새 질문/답변 저장 (용량을 넘으면 가장 오래된 항목부터 제거)"""
+        vector = question_vector if question_vector is not None else self.encode(question)
+        entry = {
+            "question": question,
+            "answer": answer,
+            "section_key": self.section_key(best_section),
+            "intent": intent,
+            "created_at": time.time(),
+            "hits": 0
+        }
+
+        with self._lock:
+            if vehicle not in self._vectors:
+                self._vectors[vehicle] = np.zeros((self.max_entries_per_vehicle, vector.shape[1]), dtype=np.float32)
+                self._entries[vehicle] = [None] * self.max_entries_per_vehicle
+                self._sizes[vehicle] = 0
+                self._positions[vehicle] = 0
+
+            position = self._positions[vehicle]
+            self._vectors[vehicle][position] = vector[0]
+            self._entries[vehicle][position] = entry
+            self._positions[vehicle] = (position + 1) % self.max_entries_per_vehicle
+            self._sizes[vehicle] = min(self._sizes[vehicle] + 1, self.max_entries_per_vehicle)
+
+    def invalidate(self, vehicle: str):
+        """매뉴얼이 바뀐 차량의 캐시 제거"""
+        with self._lock:
+            self._vectors.pop(vehicle, None)
+            self._entries.pop(vehicle, None)
+            self._sizes.pop(vehicle, None)
+            self._positions.pop(vehicle, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "encoder": getattr(self.encoder, "model_name", type(self.encoder).__name__),
+            "threshold": self.threshold,
+            "entries": dict(self._sizes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
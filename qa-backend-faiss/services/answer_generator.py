@@ -1,21 +1,97 @@
+import asyncio
+import functools
+import logging
 import os
 import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List
 
+from services.logging_config import fields
+from services.metrics import ASK_STAGE_SECONDS, ERRORS
+from services.profiling import track_thread
+
+logger = logging.getLogger(__name__)
+
 class AnswerGenerator:
-    def __init__(self):
+    # OpenAI 호출 실패 시 안내 문구 (답변 캐시에 저장하지 않도록 구분)
+    OPENAI_ERROR_MESSAGE = "앗, 답변을 생성하는 중에 문제가 생겼어요. 다시 한 번 질문해주시면 도와드릴게요! 😊"
+
+    # 워밍업에서 연결만 열 때의 타임아웃 (초)
+    WARMUP_TIMEOUT = 5.0
+    # 정리된 본문 캐시 크기 (본문 내용 해시 기준: 변형 매뉴얼의 같은 섹션도 한 번만 정리)
+    CLEANED_CACHE_SIZE = 512
+
+    # 질문 의도별 답변 소제목
+    INTENT_HEADINGS = {
+        "점검하고 싶으신가요?": ("🔧", "점검 방법"),
+        "교체하려고 하시나요?": ("🔄", "교체 방법"),
+        "관리 방법을 알고 싶으신가요?": ("🛠️", "관리 방법"),
+        "문제가 있으신가요?": ("⚠️", "문제 해결"),
+        "사용법을 알고 싶으신가요?": ("📖", "사용 방법")
+    }
+    WARNING_WORDS = ['주의', '위험', '경고', '안전', '금지']
+
+    # 추출형 답변: 최고 점수 섹션 외 섹션 문장의 가중치, 핵심 문장 수, 주의사항 수
+    EXTRACTIVE_SECONDARY_WEIGHT = 0.8
+    EXTRACTIVE_SENTENCES = 5
+    EXTRACTIVE_WARNINGS = 2
+
+    def __init__(self, llm_threads: int = 8):
         self.openai_available = bool(os.getenv("OPENAI_API_KEY"))
+        # LLM 호출 전용 스레드 (응답 대기가 길어서 기본 스레드풀을 쓰면 검색 작업이 밀림)
+        self._llm_executor = ThreadPoolExecutor(max_workers=max(1, llm_threads), thread_name_prefix="llm")
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._cleaned: "OrderedDict[str, str]" = OrderedDict()
+        self._cleaned_lock = threading.Lock()
+
+    def _get_client(self):
+        """OpenAI 클라이언트 (한 번 만들어서 재사용: 연결 풀과 TLS 세션 유지)"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    self._client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    def warmup_connection(self) -> bool:
+        """openai import + 클라이언트 생성 + 연결 풀에 TLS 연결 하나 열어두기 (토큰을 쓰지 않는 모델 목록 조회)"""
+        if not self.openai_available:
+            return False
+
+        client = self._get_client()
+        try:
+            client.with_options(timeout=self.WARMUP_TIMEOUT, max_retries=0).models.list()
+        except Exception as e:
+            # 응답이 에러여도 (404 등) 연결은 이미 열렸음
+            logger.warning("⚠️ OpenAI 연결 워밍업 응답 오류", extra=fields(error=str(e)))
+        return True
+
+    def warmup_postprocess(self, section_data: Dict[str, Any]):
+        """정리/후처리 경로를 한 번 실행 (정규식 컴파일 캐시 채우기, 결과는 버림)"""
+        question = section_data.get('title', '')
+        cleaned_content = self._cleaned_content(section_data)
+        intent = self._analyze_question_intent(question)
+        if self.openai_available:
+            self._add_source_info(self._make_answer_friendly(cleaned_content[:1200]), section_data)
+        else:
+            relevant = self._extract_relevant_sentences(cleaned_content, self._extract_question_keywords(question))
+            self._fallback_answer(intent, relevant, section_data)
 
     async def generate_answer(self, question: str, section_data: Dict[str, Any]) -> str:
-        cleaned_content = self._clean_content(section_data['content'])
+        with ASK_STAGE_SECONDS.time("cleaning"):
+            cleaned_content = self._cleaned_content(section_data)
         question_intent = self._analyze_question_intent(question)
 
         if self.openai_available:
             raw_answer = await self._generate_openai_answer(question, cleaned_content, question_intent, section_data)
         else:
-            keywords = self._extract_question_keywords(question)
-            relevant = self._extract_relevant_sentences(cleaned_content, keywords)
-            raw_answer = self._fallback_answer(question_intent, relevant, section_data)
+            with ASK_STAGE_SECONDS.time("fallback"):
+                keywords = self._extract_question_keywords(question)
+                relevant = self._extract_relevant_sentences(cleaned_content, keywords)
+                raw_answer = self._fallback_answer(question_intent, relevant, section_data)
 
         return raw_answer
 
@@ -48,21 +124,70 @@ class AnswerGenerator:
 """
 
         try:
-            from openai import OpenAI
-            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1200,
-                temperature=0.3,
-            )
-            answer = self._make_answer_friendly(response.choices[0].message.content.strip())
-            return self._add_source_info(answer, section_data)
+            client = self._get_client()
+
+            # 동기 클라이언트라 LLM 전용 스레드에서 호출 (응답을 기다리는 동안 이벤트 루프를 막지 않도록)
+            with ASK_STAGE_SECONDS.time("llm"):
+                response = await asyncio.get_running_loop().run_in_executor(self._llm_executor, track_thread(functools.partial(
+                    client.chat.completions.create,
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=1200,
+                    temperature=0.3,
+                )))
+            with ASK_STAGE_SECONDS.time("postprocess"):
+                answer = self._make_answer_friendly(response.choices[0].message.content.strip())
+                return self._add_source_info(answer, section_data)
 
         except Exception as e:
-            print(f"❌ OpenAI 호출 에러: {e}")
-            return f"앗, 답변을 생성하는 중에 문제가 생겼어요. 다시 한 번 질문해주시면 도와드릴게요! 😊"
+            ERRORS.inc("llm")
+            logger.error("❌ OpenAI 호출 에러", extra=fields(error=str(e)))
+            return self.OPENAI_ERROR_MESSAGE
+
+    def shutdown(self):
+        self._llm_executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_question_intent(self, question: str) -> str:
+        """질문 의도 (답변 캐시에서 같은 의도의 질문인지 확인용)"""
+        return self._analyze_question_intent(question)
+
+    def generate_extractive_answer(self, question: str, results: List[Dict[str, Any]], sentence_index) -> str:
+        """LLM 없이 문장 인덱스에서 핵심 문장을 골라 구조화된 답변 생성 (수 ms)"""
+        with ASK_STAGE_SECONDS.time("extractive"):
+            best_section = results[0]
+            intent = self._analyze_question_intent(question)
+
+            section_weights = [
+                (result["section_id"], 1.0 if rank == 0 else self.EXTRACTIVE_SECONDARY_WEIGHT)
+                for rank, result in enumerate(results) if result.get("section_id") is not None
+            ]
+            ranked = sentence_index.rank(question, section_weights)
+            selected = sentence_index.select(ranked, limit=self.EXTRACTIVE_SENTENCES)
+            if not selected:
+                return self._fallback_answer(intent, [], best_section)
+
+            icon, title = self.INTENT_HEADINGS.get(intent, ("📝", "관련 정보"))
+            result = f"🔍 **매뉴얼 요약 답변**\n\n{icon} **{title}**\n\n"
+            for i, item in enumerate(selected, 1):
+                result += f"{i}. {self._shorten_sentence(sentence_index.sentences[item['id']])}\n"
+
+            # 주의사항: 질문과 관련된 문장 → 최고 점수 섹션 문장 순으로, 위에서 고르지 않은 것
+            used = {item["id"] for item in selected}
+            start, end = sentence_index.section_ranges[section_weights[0][0]] if section_weights else (0, 0)
+            warnings = []
+            for sentence_id in [item["id"] for item in ranked] + list(range(start, end)):
+                sentence = sentence_index.sentences[sentence_id]
+                if sentence_id not in used and any(word in sentence for word in self.WARNING_WORDS):
+                    used.add(sentence_id)
+                    warnings.append(sentence)
+                    if len(warnings) >= self.EXTRACTIVE_WARNINGS:
+                        break
+            if warnings:
+                result += "\n⚠️ **주의사항**\n"
+                for warning in warnings:
+                    result += f"• {self._shorten_sentence(warning)}\n"
+
+            return self._add_source_info(result, best_section)
 
     def _analyze_question_intent(self, question: str) -> str:
         intent_keywords = {
@@ -126,31 +251,16 @@ class AnswerGenerator:
 
         result = "🔍 **매뉴얼 검색 결과**\n\n"
         
-        intent_info = {
-            "점검하고 싶으신가요?": ("🔧", "점검 방법"),
-            "교체하려고 하시나요?": ("🔄", "교체 방법"),
-            "관리 방법을 알고 싶으신가요?": ("🛠️", "관리 방법"),
-            "문제가 있으신가요?": ("⚠️", "문제 해결"),
-            "사용법을 알고 싶으신가요?": ("📖", "사용 방법")
-        }
-        
-        icon, title = intent_info.get(intent, ("📝", "관련 정보"))
+        icon, title = self.INTENT_HEADINGS.get(intent, ("📝", "관련 정보"))
         result += f"{icon} **{title}**\n\n"
         
         if len(sentences) == 1:
             result += f"**주요 내용:**\n{sentences[0]}\n\n"
         else:
             for i, sentence in enumerate(sentences[:8], 1):
-                clean_sentence = sentence.strip()
-                if len(clean_sentence) > 200:
-                    clean_sentence = clean_sentence[:200]
-                    if '.' in clean_sentence:
-                        clean_sentence = clean_sentence.rsplit('.', 1)[0] + '.'
-                    else:
-                        clean_sentence += "..."
-                result += f"{i}. {clean_sentence}\n"
+                result += f"{i}. {self._shorten_sentence(sentence)}\n"
         
-        warning_sentences = [s for s in sentences if any(keyword in s for keyword in ['주의', '위험', '경고', '안전', '금지'])]
+        warning_sentences = [s for s in sentences if any(keyword in s for keyword in self.WARNING_WORDS)]
         if warning_sentences:
             result += f"\n⚠️ **주의사항**\n"
             for warning in warning_sentences[:3]:
@@ -166,6 +276,16 @@ class AnswerGenerator:
         
         return self._add_source_info(result, section_data)
 
+    def _shorten_sentence(self, sentence: str, limit: int = 200) -> str:
+        sentence = sentence.strip()
+        if len(sentence) > limit:
+            sentence = sentence[:limit]
+            if '.' in sentence:
+                sentence = sentence.rsplit('.', 1)[0] + '.'
+            else:
+                sentence += "..."
+        return sentence
+
     def _make_answer_friendly(self, text: str) -> str:
         friendly_replacements = {
             r'해야 합니다': '해주세요',
@@ -301,6 +421,25 @@ class AnswerGenerator:
         
         return answer + source_info
 
+    def _cleaned_content(self, section_data: Dict[str, Any]) -> str:
+        """섹션 본문 정리 결과 (검색 결과에 content_key가 있으면 본문마다 한 번만 계산)"""
+        key = section_data.get('content_key')
+        if key is None:
+            return self._clean_content(section_data['content'])
+
+        with self._cleaned_lock:
+            cleaned = self._cleaned.get(key)
+            if cleaned is not None:
+                self._cleaned.move_to_end(key)
+                return cleaned
+
+        cleaned = self._clean_content(section_data['content'])
+        with self._cleaned_lock:
+            self._cleaned[key] = cleaned
+            while len(self._cleaned) > self.CLEANED_CACHE_SIZE:
+                self._cleaned.popitem(last=False)
+        return cleaned
+
     def _clean_content(self, content: str) -> str:
         content = re.sub(r'\*\*([^*]+)\*\*\s*\*\*\1\*\*', r'**\1**', content)
         content = re.sub(r'(\b[가-힣]+)\s+\1', r'\1', content)
@@ -0,0 +1,144 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional, Tuple
+
+from models.section_store import tokenize, normalize_token
+from services.metrics import RETRIEVAL_MODES
+
+# 후속 질문에서 주제와 상관없는 말 (이전 턴 후보와 비교할 검색어에서 제외)
+FOLLOWUP_FILLER_WORDS = {
+    "그럼", "그러면", "그리고", "그래서", "그런데", "근데", "그거", "그건", "그게", "이거", "이건", "이게",
+    "저거", "저건", "혹시", "그다음", "다음", "아니면", "어떻게", "어떻게요", "뭐야", "뭐예요", "알려줘",
+    "알려주세요", "해줘", "해주세요", "하나요", "인가요", "있나요", "되나요",
+    # 어느 섹션에나 나오는 질문 형식 단어 (주제가 바뀌었는지 판단에 도움이 안 됨)
+    "방법", "절차", "사용법", "주의사항", "궁금해요"
+}
+
+
+def query_terms(query: str) -> List[str]:
+    """질문의 주제어 (후속 질문 군더더기를 뺀 뒤 SimpleSearchService._tokenize와 같은 정규화: "주기는" → "주기")"""
+    terms = []
+    for token in tokenize(query):
+        if token not in FOLLOWUP_FILLER_WORDS:
+            token = normalize_token(token)
+            if token not in terms:
+                terms.append(token)
+    return terms
+
+
+class ConversationStore:
+    """대화별 최근 턴의 검색 섹션/검색어 보관 (개수 제한 LRU + TTL, 워커 메모리)
+
+    매뉴얼이 바뀌면 (업로드, 공유 인덱스 교체) 섹션 번호가 달라지므로 검색 서비스가
+    바뀐 대화는 새 대화로 취급합니다.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 1800, max_turns: int = 3):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, conversation_id: str, vehicle: str, search_service) -> Optional[Dict[str, Any]]:
+        """이전 턴들의 (검색어, 섹션 번호) 합집합, 없거나 만료/차량 변경/매뉴얼 변경이면 None"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                return None
+            if now - session["updated_at"] > self.ttl_seconds:
+                del self._sessions[conversation_id]
+                self.expired += 1
+                return None
+            if session["vehicle"] != vehicle or session["service"]() is not search_service:
+                return None
+
+            terms, section_ids = [], set()
+            for turn_terms, turn_sections in session["turns"]:
+                terms.extend(term for term in turn_terms if term not in terms)
+                section_ids.update(turn_sections)
+            return {"terms": terms, "section_ids": sorted(section_ids)}
+
+    def record(self, conversation_id: str, vehicle: str, search_service, terms: List[str],
+               section_ids: List[int]):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(conversation_id)
+            if session is None or session["vehicle"] != vehicle or session["service"]() is not search_service:
+                session = {
+                    "vehicle": vehicle,
+                    "service": weakref.ref(search_service),
+                    "turns": deque(maxlen=self.max_turns)
+                }
+                self._sessions[conversation_id] = session
+            session["turns"].append((terms, section_ids))
+            session["updated_at"] = now
+            self._sessions.move_to_end(conversation_id)
+
+            # 갱신 순서로 정렬되어 있으므로 앞에서부터 만료/초과분만 정리
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if now - oldest["updated_at"] > self.ttl_seconds:
+                    self.expired += 1
+                elif len(self._sessions) > self.max_sessions:
+                    self.evicted += 1
+                else:
+                    break
+                self._sessions.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "expired": self.expired,
+            "evicted": self.evicted
+        }
+
+
+def neighbor_candidates(section_ids: List[int], num_sections: int) -> List[int]:
+    """이전 턴 섹션 + 바로 앞/뒤 섹션 (같은 장의 이어지는 내용: 공기압 → 타이어 교체 등)"""
+    candidates = set()
+    for idx in section_ids:
+        candidates.update(i for i in (idx - 1, idx, idx + 1) if 0 <= i < num_sections)
+    return sorted(candidates)
+
+
+def conversational_search(search_service, store: Optional[ConversationStore], conversation_id: Optional[str],
+                          vehicle: str, query: str, k: int = 3,
+                          min_coverage: float = 0.5) -> Tuple[List[Dict[str, Any]], str]:
+    """대화 맥락을 이용한 검색, (결과, 방식) 반환
+
+    - stateless: 대화 ID 없음 → 전체 검색
+    - new: 첫 턴 (또는 만료) → 전체 검색
+    - followup: 질문 주제어가 이전 턴 후보 섹션에 충분히 나옴 → 후보만 이전 검색어로 확장해서 채점
+    - fallback: 후보 점수가 낮음 (주제가 바뀜) → 전체 검색
+    """
+    if store is None or not conversation_id:
+        RETRIEVAL_MODES.inc("stateless")
+        return search_service.search_sections(query, k=k), "stateless"
+
+    terms = query_terms(query)
+    session = store.get(conversation_id, vehicle, search_service)
+    results, mode = [], "new"
+
+    if session is not None:
+        candidates = neighbor_candidates(session["section_ids"], len(search_service.sections_data))
+        mode = "fallback"
+        if candidates and search_service.term_coverage(terms, candidates) >= min_coverage:
+            context_terms = [term for term in session["terms"] if term not in terms]
+            results = search_service.search_sections(query, k=k, candidates=candidates, context_terms=context_terms)
+            if results:
+                mode = "followup"
+
+    if not results:
+        results = search_service.search_sections(query, k=k)
+
+    store.record(conversation_id, vehicle, search_service, terms, [result["section_id"] for result in results])
+    RETRIEVAL_MODES.inc(mode)
+    return results, mode
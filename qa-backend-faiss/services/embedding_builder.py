@@ -0,0 +1,237 @@
+import hashlib
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable
+from pathlib import Path
+
+from models.embedding_cache import (
+    load_embedding_cache, open_sidecar, iter_sidecars, save_embedding_cache
+)
+from services.logging_config import fields
+
+logger = logging.getLogger(__name__)
+
+# 워커 프로세스마다 한 번만 로드하는 임베딩 모델
+_worker_model = None
+
+
+def _init_worker(model_name: str):
+    global _worker_model
+    from models.embeddings import EmbeddingModel
+    _worker_model = EmbeddingModel(model_name)
+
+
+def _encode_in_worker(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_model.encode_texts(texts), dtype=np.float32)
+
+
+def section_text(section: Dict[str, Any]) -> str:
+    """임베딩할 섹션 텍스트 (제목 + 본문)"""
+    return f"{section.get('title', '')}\n{section.get('content', '')}".strip()
+
+
+def section_hash(model_name: str, section: Dict[str, Any]) -> str:
+    """모델 + 섹션 텍스트 해시 (내용이 같으면 이전 빌드의 벡터 재사용)"""
+    return hashlib.sha256(f"{model_name}\n{section_text(section)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingBuilder:
+    """섹션 임베딩 빌드 파이프라인 (배치 인코딩, 워커 프로세스, 변경된 섹션만 인코딩)"""
+
+    def __init__(self, embedding_model=None, cache_dir: str = "./data/processed/embeddings/",
+                 batch_size: int = 32, workers: int = 1, cache_dtype: str = "float16",
+                 model_name: Optional[str] = None):
+        self.embedding_model = embedding_model
+        self.model_name = model_name or getattr(embedding_model, "model_name", "")
+        self.cache_dir = Path(cache_dir)
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.cache_dtype = cache_dtype
+
+    def build(self, json_data: Dict[str, Any]) -> Dict[str, Any]:
+        """문서 하나의 임베딩 캐시 생성 (이미 최신이면 바로 반환)"""
+        started = time.perf_counter()
+        sections = json_data.get("sections", [])
+
+        if load_embedding_cache(self.cache_dir, sections) is not None:
+            return {"sections": len(sections), "encoded": 0, "reused": len(sections),
+                    "seconds": round(time.perf_counter() - started, 3), "up_to_date": True}
+
+        hashes = [section_hash(self.model_name, section) for section in sections]
+        embeddings: List[Optional[np.ndarray]] = [None] * len(sections)
+
+        # ♻️ 이전 빌드에서 같은 내용으로 만든 벡터 재사용
+        previous = self._previous_vectors(set(hashes))
+        for i, h in enumerate(hashes):
+            if h in previous:
+                embeddings[i] = previous[h]
+
+        todo = [i for i, vector in enumerate(embeddings) if vector is None]
+        if todo:
+            # 문서 안에서 같은 내용의 섹션은 한 번만 인코딩
+            unique: Dict[str, int] = {}
+            for i in todo:
+                unique.setdefault(hashes[i], i)
+            encoded = dict(zip(unique, self._encode([section_text(sections[i]) for i in unique.values()])))
+            for i in todo:
+                embeddings[i] = encoded[hashes[i]]
+
+        matrix = np.vstack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+        matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+        save_embedding_cache(self.cache_dir, sections, matrix, self.cache_dtype,
+                             json_data.get("file_name", ""),
+                             extra={"model_name": self.model_name, "section_hashes": hashes})
+
+        encoded_count = len({hashes[i] for i in todo})
+        return {"sections": len(sections), "encoded": encoded_count, "reused": len(sections) - encoded_count,
+                "seconds": round(time.perf_counter() - started, 3), "up_to_date": False}
+
+    def _previous_vectors(self, wanted: set) -> Dict[str, np.ndarray]:
+        """기존 사이드카들에서 필요한 섹션 해시의 벡터 찾기"""
+        found: Dict[str, np.ndarray] = {}
+        for sidecar in iter_sidecars(self.cache_dir):
+            if sidecar.get("model_name") != self.model_name:
+                continue
+            rows = [(i, h) for i, h in enumerate(sidecar.get("section_hashes") or [])
+                    if h in wanted and h not in found]
+            if not rows:
+                continue
+
+            cache = open_sidecar(self.cache_dir, sidecar)
+            if cache is None:
+                continue
+            for i, h in rows:
+                found[h] = cache.row(i)
+
+            if len(found) == len(wanted):
+                break
+        return found
+
+    def _encode(self, texts: List[str]) -> List[np.ndarray]:
+        """배치 단위 인코딩 (workers > 1이면 워커 프로세스에 분산)"""
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+        if self.workers > 1 and len(batches) > 1:
+            # spawn: 스레드가 여러 개인 uvicorn 프로세스를 fork하면 다른 스레드가 잡고 있던
+            # 잠금(로깅 큐, OpenAI 클라이언트 등)이 잠긴 채로 복사되어 워커가 멈출 수 있음
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(batches)),
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(self.model_name,)) as pool:
+                results = list(pool.map(_encode_in_worker, batches))
+        else:
+            if self.embedding_model is None:
+                from models.embeddings import EmbeddingModel
+                self.embedding_model = EmbeddingModel(self.model_name)
+            results = [np.asarray(self.embedding_model.encode_texts(batch), dtype=np.float32)
+                       for batch in batches]
+
+        return [vector for batch in results for vector in batch]
+
+
+class EmbeddingJobQueue:
+    """업로드 후 임베딩 빌드를 백그라운드에서 순차 실행하는 작업 큐"""
+
+    def __init__(self, builder: EmbeddingBuilder,
+                 on_complete: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                 max_history: int = 100):
+        self.builder = builder
+        self.on_complete = on_complete
+        self.max_history = max_history
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-job")
+        self._lock = threading.Lock()
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._latest_job: Dict[str, str] = {}  # 차량별 가장 최근 작업 ID
+
+    def submit(self, vehicle: str, json_data: Dict[str, Any]) -> str:
+        """빌드 작업 등록 후 작업 ID 반환"""
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self.jobs[job_id] = {"job_id": job_id, "vehicle": vehicle, "status": "queued",
+                                 "submitted_at": time.time(), "result": None, "error": None}
+            self._latest_job[vehicle] = job_id
+            while len(self.jobs) > self.max_history:
+                self.jobs.popitem(last=False)
+
+        self._executor.submit(self._run, job_id, vehicle, json_data)
+        return job_id
+
+    def _run(self, job_id: str, vehicle: str, json_data: Dict[str, Any]):
+        # 같은 차량에 더 새로운 업로드가 있으면 이전 작업은 건너뜀
+        if not self._is_latest(vehicle, job_id):
+            self._update(job_id, status="superseded")
+            return
+
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            result = self.builder.build(json_data)
+        except Exception as e:
+            logger.exception(f"❌ {vehicle} 임베딩 빌드 실패", extra=fields(job_id=job_id, error=str(e)))
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+            return
+
+        self._update(job_id, status="done", result=result, finished_at=time.time())
+        logger.info(f"✅ {vehicle} 임베딩 빌드 완료", extra=fields(
+            job_id=job_id, encoded=result["encoded"], reused=result["reused"], seconds=result["seconds"]
+        ))
+
+        if self.on_complete and self._is_latest(vehicle, job_id):
+            try:
+                self.on_complete(vehicle, json_data)
+            except Exception as e:
+                logger.exception(f"⚠️ {vehicle} 벡터 검색 전환 실패", extra=fields(job_id=job_id, error=str(e)))
+
+    def _is_latest(self, vehicle: str, job_id: str) -> bool:
+        with self._lock:
+            return self._latest_job.get(vehicle) == job_id
+
+    def _update(self, job_id: str, **changes):
+        with self._lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(changes)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    """data/processed의 모든 매뉴얼 임베딩 캐시 생성 (변경된 섹션만 인코딩)"""
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="매뉴얼 섹션 임베딩 빌드")
+    parser.add_argument("--data", default="./data/processed/")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--dtype", choices=("float16", "int8"), default="float16")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    data_dir = Path(args.data)
+    builder = EmbeddingBuilder(cache_dir=str(data_dir / "embeddings"), batch_size=args.batch_size,
+                               workers=args.workers, cache_dtype=args.dtype, model_name=args.model)
+
+    for json_file in sorted(data_dir.glob("*.json")):
+        with open(json_file, "r", encoding="utf-8") as f:
+            json_data = json.load(f)
+        if "sections" not in json_data:
+            continue
+        result = builder.build(json_data)
+        logger.info(f"✅ {json_file.name}: 인코딩 {result['encoded']}개, 재사용 {result['reused']}개 ({result['seconds']}초)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi.responses import JSONResponse, Response
+
+# 🚀 orjson이 있으면 사용 (없으면 표준 json으로 동일한 결과)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# brotli는 선택 사항 (없으면 gzip만 협상)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = 512  # 이보다 작은 응답은 압축 이득보다 비용이 큼
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson 기반 JSON 응답 (앱 기본 응답 클래스)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Accept-Encoding에서 사용할 압축 방식 선택 (br > gzip, q=0은 제외)"""
+    if not accept_encoding:
+        return None
+
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compressed_json_response(content: Any, accept_encoding: Optional[str], status_code: int = 200) -> Response:
+    """JSON 직렬화 후 클라이언트가 받을 수 있는 방식으로 압축 (한국어 마크다운 답변은 압축률이 높음)"""
+    body = dumps(content)
+    headers = {"Vary": "Accept-Encoding"}
+
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+        headers["Content-Encoding"] = "br"
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """If-None-Match 비교 (약한 비교: W/ 접두사는 무시, *는 모든 ETag와 일치)"""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in tags:
+        return True
+    etag = etag[2:] if etag.startswith("W/") else etag
+    return any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in tags)
+
+
+class StaticPayloadCache:
+    """업로드 전까지 바뀌지 않는 응답을 미리 직렬화해 두는 캐시 (ETag 포함)"""
+
+    def __init__(self, max_age: int = 60):
+        self.max_age = max_age
+        self._payloads: Dict[str, Tuple[bytes, str]] = {}
+        self._objects: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def get(self, key: str, builder: Callable[[], Any]) -> Tuple[bytes, str]:
+        cached = self._payloads.get(key)
+        if cached is not None:
+            return cached
+
+        # 만드는 동안 invalidate()되면 이전 매뉴얼 기준 본문이므로 반환만 하고 저장하지 않음
+        version = self.version
+        body = dumps(builder())
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        with self._lock:
+            if self.version == version:
+                self._payloads[key] = (body, etag)
+        return body, etag
+
+    def get_object(self, key: str, builder: Callable[[], Any]) -> Any:
+        """직렬화하지 않은 객체 캐시 (요청마다 일부만 바뀌는 응답의 고정 부분용)"""
+        cached = self._objects.get(key)
+        if cached is None:
+            version = self.version
+            cached = builder()
+            with self._lock:
+                if self.version == version:
+                    self._objects[key] = cached
+        return cached
+
+    def invalidate(self):
+        """매뉴얼 업로드/로드 후 호출"""
+        with self._lock:
+            self._payloads.clear()
+            self._objects.clear()
+            self.version += 1
+
+    def response(self, key: str, builder: Callable[[], Any], if_none_match: Optional[str]) -> Response:
+        """ETag가 같으면 304, 아니면 미리 직렬화된 본문 반환"""
+        body, etag = self.get(key, builder)
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}, must-revalidate"}
+
+        if if_none_match and etag_matches(etag, if_none_match):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
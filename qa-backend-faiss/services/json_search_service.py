@@ -1,20 +1,41 @@
 import json
+import logging
 import numpy as np
 import os
-import pickle
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+from models.embedding_cache import (
+    EmbeddingCache, load_embedding_cache, load_legacy_pickle, save_embedding_cache
+)
+from models.section_store import section_key
+from services.logging_config import fields, is_sampled, log_sampled
+
+logger = logging.getLogger(__name__)
+
 class JSONSearchService:
-    def __init__(self, embedding_model, auto_load: bool = False, data_path: str = "./data/processed/"):
+    # 보너스 점수 판단용 단어
+    PROCEDURE_QUERY_WORDS = ["방법", "절차", "어떻게"]
+    PROCEDURE_CONTENT_WORDS = ["방법", "절차", "단계", "하십시오"]
+
+    def __init__(self, embedding_model, auto_load: bool = False, data_path: str = "./data/processed/",
+                 cache_dtype: str = "float16"):
         self.embedding_model = embedding_model
         self.data_path = Path(data_path)
+        self.cache_dir = self.data_path / "embeddings"
+        self.cache_dtype = cache_dtype  # 새로 만드는 캐시의 저장 dtype (float16 / int8)
         self.documents = []
         
         # 🚀 임베딩 캐시 관련
-        self.section_embeddings = None  # numpy array of embeddings
+        self.section_embeddings: Optional[EmbeddingCache] = None  # 메모리 맵 임베딩
         self.sections_data = []  # list of section metadata
         self.embeddings_cached = False  # 🔥 중요: 이 플래그가 핵심!
+
+        # 🚀 벡터화 점수 계산용 인덱스 (_build_score_index에서 구성)
+        self.title_postings: Dict[str, np.ndarray] = {}
+        self.keyword_postings: Dict[str, np.ndarray] = {}
+        self.max_keyword_length = 0
+        self.procedure_flags = np.zeros(0, dtype=bool)
         
         if auto_load:
             self.load_all_documents()
@@ -22,146 +43,224 @@ class JSONSearchService:
     def add_document(self, json_data: Dict[str, Any]):
         """새 JSON 문서 추가 및 임베딩 생성/로드"""
         if "sections" not in json_data:
-            print("❌ sections 필드가 없습니다.")
+            logger.error("❌ sections 필드가 없습니다.")
             return
             
         self.documents = [json_data]
         vehicle_name = self._extract_vehicle_name_from_data(json_data)
         sections_count = len(json_data.get("sections", []))
         
-        print(f"📄 {vehicle_name} 매뉴얼 추가: {sections_count}개 섹션")
+        logger.info("📄 매뉴얼 추가", extra=fields(vehicle=vehicle_name, sections=sections_count))
         
         # 캐시 파일 확인 및 로드/생성
         self._precompute_embeddings(json_data, vehicle_name)
     
+    def _prepare_sections_data(self, json_data: Dict[str, Any]):
+        """섹션 데이터를 검색 가능한 형태로 준비 (메타데이터는 캐시가 아닌 원본 JSON 기준)"""
+        self.sections_data = []
+
+        for section in json_data.get("sections", []):
+            section_data = {
+                "source": json_data.get("file_name", "unknown"),
+                "section_number": section.get("section_number", ""),
+                "title": section.get("title", ""),
+                "page_range": section.get("page_range", ""),
+                "content": section.get("content", ""),
+                "content_key": section_key(section.get("content", "")),
+                "keywords": section.get("keywords", []),
+                "subsections": section.get("subsections", [])
+            }
+            self.sections_data.append(section_data)
+
     def _precompute_embeddings(self, json_data: Dict[str, Any], vehicle_name: str):
         """섹션별 임베딩을 미리 계산하여 캐싱"""
-        cache_file = self.data_path / f"{vehicle_name}_embeddings.pkl"
-        
-        # 🔍 기존 캐시 확인
-        if cache_file.exists():
-            try:
-                print(f"💾 {vehicle_name} 기존 임베딩 캐시 로드 중...")
-                with open(cache_file, 'rb') as f:
-                    cache_data = pickle.load(f)
-                    self.section_embeddings = cache_data['embeddings']
-                    self.sections_data = cache_data['sections_data']
-                    self.embeddings_cached = True  # 🔥 플래그 설정!
-                print(f"✅ {vehicle_name} 캐시된 임베딩 로드 완료 ({len(self.sections_data)}개 섹션)")
-                return
-            except Exception as e:
-                print(f"⚠️ 캐시 로드 실패, 새로 생성: {e}")
-        
+        sections = json_data.get("sections", [])
+        self._prepare_sections_data(json_data)
+
+        # 🔍 문서 내용 해시로 캐시 확인 (메모리 맵, 복사 없이 로드)
+        try:
+            cache = load_embedding_cache(self.cache_dir, sections)
+            if cache is None:
+                cache = self._migrate_legacy_cache(json_data, vehicle_name)
+        except Exception as e:
+            logger.warning("⚠️ 캐시 로드 실패", extra=fields(vehicle=vehicle_name, error=str(e)))
+            cache = None
+
+        if cache is not None:
+            self.section_embeddings = cache
+            self.embeddings_cached = True  # 🔥 플래그 설정!
+            self._build_score_index()
+            logger.info("✅ 캐시된 임베딩 로드 완료",
+                        extra=fields(vehicle=vehicle_name, sections=len(self.sections_data), dtype=str(cache.dtype)))
+            return
+
         # 🚫 캐시가 없으면 에러 (배포 환경에서는 생성하지 않음)
-        print(f"❌ {vehicle_name} 임베딩 캐시 파일이 없습니다: {cache_file}")
-        print("💡 로컬에서 create_embeddings.py를 실행하여 캐시를 생성해주세요.")
+        logger.warning("❌ 임베딩 캐시 파일이 없습니다 (python -m services.embedding_builder 로 생성하거나 "
+                       "업로드 후 백그라운드 빌드를 기다려주세요)",
+                       extra=fields(vehicle=vehicle_name, cache_dir=str(self.cache_dir)))
         return
-        
-    def search_sections(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """🚀 최적화된 검색: 캐시된 임베딩 사용"""
-        
-        # 🔍 디버깅 로그
-        print(f"🔍 [DEBUG] 검색 시작")
-        print(f"🔍 [DEBUG] documents 개수: {len(self.documents)}")
-        print(f"🔍 [DEBUG] embeddings_cached: {self.embeddings_cached}")
-        print(f"🔍 [DEBUG] sections_data 개수: {len(self.sections_data)}")
-        print(f"🔍 [DEBUG] section_embeddings 존재: {self.section_embeddings is not None}")
-        
+
+    def _migrate_legacy_cache(self, json_data: Dict[str, Any], vehicle_name: str) -> Optional[EmbeddingCache]:
+        """기존 {vehicle}_embeddings.pkl 중 같은 문서로 만든 것을 새 형식으로 변환"""
+        sections = json_data.get("sections", [])
+
+        for pickle_path in sorted(self.data_path.glob(f"{vehicle_name}*_embeddings.pkl")):
+            embeddings = load_legacy_pickle(pickle_path, sections)
+            if embeddings is None:
+                continue
+
+            logger.info("🔄 기존 pickle을 새 임베딩 캐시 형식으로 변환", extra=fields(path=pickle_path.name))
+            save_embedding_cache(self.cache_dir, sections, embeddings, self.cache_dtype,
+                                 json_data.get("file_name", ""))
+            return load_embedding_cache(self.cache_dir, sections)
+
+        return None
+
+    def _build_score_index(self):
+        """🚀 제목/키워드/보너스 점수 계산용 인덱스를 미리 구성 (벡터화 검색용)"""
+        num_sections = len(self.sections_data)
+
+        # 제목 단어 → 섹션 인덱스 (희소 지시 행렬의 열 단위 저장)
+        title_postings: Dict[str, List[int]] = {}
+        # 키워드 → 섹션 인덱스 (중복 키워드도 그대로 카운트)
+        keyword_postings: Dict[str, List[int]] = {}
+        procedure_flags = np.zeros(num_sections, dtype=bool)
+
+        for i, section_data in enumerate(self.sections_data):
+            for word in set((section_data.get("title") or "").lower().split()):
+                title_postings.setdefault(word, []).append(i)
+
+            for keyword in section_data.get("keywords") or []:
+                keyword_lower = keyword.lower()
+                if keyword_lower:
+                    keyword_postings.setdefault(keyword_lower, []).append(i)
+
+            content = (section_data.get("content") or "").lower()
+            procedure_flags[i] = any(word in content for word in self.PROCEDURE_CONTENT_WORDS)
+
+        self.title_postings = {w: np.array(ids, dtype=np.int64) for w, ids in title_postings.items()}
+        self.keyword_postings = {w: np.array(ids, dtype=np.int64) for w, ids in keyword_postings.items()}
+        self.max_keyword_length = max((len(w) for w in keyword_postings), default=0)
+        self.procedure_flags = procedure_flags
+
+    def search_sections(self, query: str, k: int = 5, candidates: Optional[List[int]] = None,
+                        context_terms: Optional[List[str]] = None, min_score: float = 0.05) -> List[Dict[str, Any]]:
+        """🚀 최적화된 검색: 캐시된 임베딩 + 벡터화된 점수 계산 (candidates / context_terms / min_score는 SimpleSearchService와 같음)"""
         if not self.documents or not self.embeddings_cached:
-            print(f"⚠️ 로드된 문서나 임베딩이 없습니다")
             return []
-        
-        vehicle_name = self._extract_vehicle_name_from_data(self.documents[0])
-        print(f"🔍 {vehicle_name} 매뉴얼 검색 시작: '{query}'")
-        
+
+        num_sections = len(self.sections_data)
+        if context_terms:
+            query = " ".join([query, *context_terms])
+        query_lower = query.lower()
+
         # 🚀 쿼리만 임베딩 계산 (섹션 임베딩은 재사용)
         query_embedding = self.embedding_model.encode_query(query)
         query_norm = query_embedding / np.linalg.norm(query_embedding, axis=1, keepdims=True)
-        
-        # 🚀 벡터화된 유사도 계산
-        similarities = np.dot(query_norm, self.section_embeddings.T)[0]
-        
+        content_scores = self.section_embeddings.similarities(query_norm).astype(np.float64)
+
+        title_scores = self._vectorized_title_scores(query_lower, num_sections)
+        keyword_scores = self._vectorized_keyword_scores(query_lower, num_sections)
+        bonus_scores = self._vectorized_bonus_scores(query_lower)
+
+        total_scores = (title_scores * 0.6) + (keyword_scores * 0.15) + \
+                       (content_scores * 0.15) + (bonus_scores * 0.1)
+        if candidates is not None:
+            mask = np.zeros(num_sections, dtype=bool)
+            mask[list(candidates)] = True
+            total_scores = np.where(mask, total_scores, 0.0)
+
+        # 임계값 통과 섹션 중 상위 k개 선택 (동점은 섹션 순서 유지)
+        candidates = np.flatnonzero(total_scores > min_score)
+        if k <= 0 or candidates.size == 0:
+            return []
+        if candidates.size > k:
+            top = np.argpartition(-total_scores[candidates], k - 1)[:k]
+            candidates = candidates[top]
+        order = np.lexsort((candidates, -total_scores[candidates]))
+        top_indices = candidates[order]
+
         search_results = []
-        
-        # 각 섹션에 대해 점수 계산
-        for i, section_data in enumerate(self.sections_data):
-            scores = self._calculate_all_scores_optimized(query, section_data, similarities[i])
-            total_score = self._calculate_total_score(scores)
-            
-            if total_score > 0.05:  # 임계값
-                search_results.append({
-                    "score": total_score,
-                    "source": section_data["source"],
-                    "section_number": section_data["section_number"],
-                    "title": section_data["title"],
-                    "page_range": section_data["page_range"],
-                    "content": section_data["content"],
-                    "keywords": section_data["keywords"],
-                    "subsections": section_data["subsections"],
-                    "match_details": {
-                        "title_score": round(scores["title"], 3),
-                        "keyword_score": round(scores["keyword"], 3),
-                        "content_score": round(scores["content"], 3),
-                        "bonus_score": round(scores["bonus"], 3)
-                    }
-                })
-        
-        # 점수순 정렬
-        search_results.sort(key=lambda x: x["score"], reverse=True)
-        
-        print(f"📊 {vehicle_name} 검색 결과: {len(search_results)}개 섹션 (⚡ 캐시 사용)")
-        for i, result in enumerate(search_results[:3]):
-            print(f"  {i+1}. [{result['score']:.3f}] {result['title']} (페이지 {result['page_range']})")
-        
-        return search_results[:k]
-    
-    def _calculate_all_scores_optimized(self, query: str, section_data: Dict, content_similarity: float) -> Dict[str, float]:
-        """최적화된 점수 계산: 콘텐츠 유사도는 미리 계산된 값 사용"""
-        return {
-            "title": self._calculate_title_score(query, section_data["title"]),
-            "keyword": self._calculate_keyword_score(query, section_data["keywords"]),
-            "content": float(content_similarity),  # 🚀 미리 계산된 유사도 사용
-            "bonus": self._calculate_bonus_score(query, section_data)
-        }
-    
-    def _calculate_total_score(self, scores: Dict[str, float]) -> float:
-        """종합 점수 계산"""
-        return (scores["title"] * 0.6) + (scores["keyword"] * 0.15) + \
-               (scores["content"] * 0.15) + (scores["bonus"] * 0.1)
-    
-    def _calculate_title_score(self, query: str, title: str) -> float:
-        """제목 매칭 점수 (간단 버전)"""
-        if not title:
-            return 0
-        
-        query_words = set(query.lower().split())
-        title_words = set(title.lower().split())
-        
-        # 기본 매칭
-        matches = len(query_words.intersection(title_words))
-        return min(matches / max(len(query_words), 1), 1.0)
-    
-    def _calculate_keyword_score(self, query: str, keywords: List[str]) -> float:
-        """키워드 매칭 점수 (간단 버전)"""
-        if not keywords:
-            return 0
-        
-        query_lower = query.lower()
-        matches = sum(1 for keyword in keywords if keyword.lower() in query_lower)
-        return min(matches / 2.0, 1.0)
-    
-    def _calculate_bonus_score(self, query: str, section: Dict) -> float:
-        """보너스 점수 (간단 버전)"""
-        content = section.get("content", "").lower()
-        query_lower = query.lower()
-        
-        # 방법, 절차 관련 보너스
-        if any(word in query_lower for word in ["방법", "절차", "어떻게"]):
-            if any(word in content for word in ["방법", "절차", "단계", "하십시오"]):
-                return 0.2
-        
-        return 0.1
-    
+        for i in top_indices:
+            section_data = self.sections_data[i]
+            search_results.append({
+                "score": float(total_scores[i]),
+                "section_id": int(i),
+                "source": section_data["source"],
+                "section_number": section_data["section_number"],
+                "title": section_data["title"],
+                "page_range": section_data["page_range"],
+                "content": section_data["content"],
+                "content_key": section_data["content_key"],
+                "keywords": section_data["keywords"],
+                "subsections": section_data["subsections"],
+                "match_details": {
+                    "title_score": round(float(title_scores[i]), 3),
+                    "keyword_score": round(float(keyword_scores[i]), 3),
+                    "content_score": round(float(content_scores[i]), 3),
+                    "bonus_score": round(float(bonus_scores[i]), 3)
+                }
+            })
+
+        if is_sampled():
+            log_sampled(
+                logger, "📊 벡터 검색 완료",
+                query=query,
+                matched=int(np.count_nonzero(total_scores > min_score)),
+                top=[(round(r["score"], 3), r["title"], r["page_range"]) for r in search_results[:3]]
+            )
+
+        return search_results
+
+    def term_coverage(self, terms: List[str], candidates: List[int]) -> float:
+        """검색어 중 후보 섹션(제목/키워드/본문)에 나오는 비율"""
+        if not terms:
+            return 1.0
+
+        parts = []
+        for i in candidates:
+            section_data = self.sections_data[i]
+            parts.extend([section_data["title"], *(section_data["keywords"] or []), section_data["content"]])
+        text = " ".join(parts).lower()
+        return sum(1 for term in terms if term.lower() in text) / len(terms)
+
+    def _vectorized_title_scores(self, query_lower: str, num_sections: int) -> np.ndarray:
+        """제목 매칭 점수 (쿼리 단어 열만 합산)"""
+        query_words = set(query_lower.split())
+        postings = [self.title_postings[w] for w in query_words if w in self.title_postings]
+        if not postings:
+            return np.zeros(num_sections, dtype=np.float64)
+
+        matches = np.bincount(np.concatenate(postings), minlength=num_sections)
+        return np.minimum(matches / max(len(query_words), 1), 1.0)
+
+    def _vectorized_keyword_scores(self, query_lower: str, num_sections: int) -> np.ndarray:
+        """키워드 매칭 점수 (쿼리 부분 문자열로 키워드 사전 조회)"""
+        if not self.keyword_postings:
+            return np.zeros(num_sections, dtype=np.float64)
+
+        # 키워드가 쿼리에 포함되는지 = 쿼리의 부분 문자열이 키워드 사전에 있는지
+        matched = set()
+        query_length = len(query_lower)
+        for start in range(query_length):
+            for end in range(start + 1, min(start + self.max_keyword_length, query_length) + 1):
+                substring = query_lower[start:end]
+                if substring in self.keyword_postings:
+                    matched.add(substring)
+
+        if not matched:
+            return np.zeros(num_sections, dtype=np.float64)
+
+        postings = [self.keyword_postings[w] for w in matched]
+        matches = np.bincount(np.concatenate(postings), minlength=num_sections)
+        return np.minimum(matches / 2.0, 1.0)
+
+    def _vectorized_bonus_scores(self, query_lower: str) -> np.ndarray:
+        """보너스 점수 (방법, 절차 관련 질문일 때 절차형 섹션 가산)"""
+        if any(word in query_lower for word in self.PROCEDURE_QUERY_WORDS):
+            return np.where(self.procedure_flags, 0.2, 0.1)
+        return np.full(self.procedure_flags.shape, 0.1)
+
     def _extract_vehicle_name_from_data(self, json_data: Dict[str, Any]) -> str:
         """JSON 데이터에서 차량명 추출"""
         file_name = json_data.get("file_name", "").lower()
@@ -0,0 +1,183 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+# 요청 단위 상관관계 ID / 샘플링 여부 (요청 처리 중인 코루틴/스레드 컨텍스트에 저장)
+_request_id = contextvars.ContextVar("request_id", default="-")
+_sampled = contextvars.ContextVar("sampled", default=True)
+
+_sample_rate = 1.0
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+def fields(**values) -> Dict[str, Any]:
+    """구조화 필드를 logging extra로 전달 (logger.info("...", extra=fields(vehicle=...)))"""
+    return {"fields": values}
+
+
+def get_request_id() -> str:
+    return _request_id.get()
+
+
+def is_sampled() -> bool:
+    """현재 요청의 질문별 상세 로그를 남길지 여부 (요청 밖에서는 항상 True)"""
+    return _sampled.get()
+
+
+def log_sampled(logger: logging.Logger, message: str, **values):
+    """샘플링된 요청에서만 남기는 질문별 상세 로그 (샘플링되지 않으면 포맷팅 비용도 없음)"""
+    if _sampled.get() and logger.isEnabledFor(logging.INFO):
+        logger.info(message, extra={"fields": values})
+
+
+def start_request(request_id: Optional[str] = None) -> str:
+    """요청 시작: 상관관계 ID 지정 + 샘플링 여부 결정"""
+    request_id = request_id or uuid.uuid4().hex[:12]
+    _request_id.set(request_id)
+    _sampled.set(_sample_rate >= 1.0 or random.random() < _sample_rate)
+    return request_id
+
+
+class RequestContextFilter(logging.Filter):
+    """로그 레코드에 요청 ID 추가 (큐에 넣기 전, 요청 컨텍스트 안에서 실행)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """메시지 + key=value 필드 (text) 또는 한 줄 JSON (json)"""
+
+    def __init__(self, output_format: str = "text"):
+        super().__init__()
+        self.output_format = output_format
+
+    def format(self, record: logging.LogRecord) -> str:
+        values = getattr(record, "fields", None) or {}
+        request_id = getattr(record, "request_id", "-")
+        exc_text = self.formatException(record.exc_info) if record.exc_info else record.exc_text
+
+        if self.output_format == "json":
+            payload = {
+                "time": round(record.created, 3),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                "request_id": request_id,
+                **values
+            }
+            if exc_text:
+                payload["exc_info"] = exc_text
+            return json.dumps(payload, ensure_ascii=False, default=str)
+
+        timestamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        line = f"{timestamp} {record.levelname}:{record.name} [{request_id}] {record.getMessage()}"
+        if values:
+            line += " " + " ".join(f"{key}={value}" for key, value in values.items())
+        if exc_text:
+            line += "\n" + exc_text
+        return line
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 기다리지 않고 버리는 QueueHandler (버린 개수는 dropped에 기록)"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 포맷팅은 리스너 스레드에서 하도록 레코드만 복사 (예외 정보는 여기서 문자열로 고정)
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.message = record.getMessage()
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(level: str = "INFO", output_format: str = "text", sample_rate: float = 1.0,
+                  queue_size: int = 10000):
+    """루트 로거를 큐 기반 비동기 핸들러로 설정 (실제 stdout 쓰기는 별도 스레드)"""
+    global _sample_rate, _listener, _queue_handler
+
+    _sample_rate = max(0.0, min(float(sample_rate), 1.0))
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(StructuredFormatter(output_format))
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """남은 로그를 모두 쓰고 리스너 스레드 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    return {
+        "sample_rate": _sample_rate,
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": _queue_handler.dropped if _queue_handler else 0
+    }
+
+
+class RequestContextMiddleware:
+    """요청마다 상관관계 ID를 지정하고 응답 헤더(X-Request-ID)로 돌려주는 ASGI 미들웨어"""
+
+    header_name = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope.get("headers", []):
+            if name == self.header_name:
+                # 클라이언트가 보낸 ID는 길이 제한 후 그대로 사용 (로그 연결용)
+                incoming = value.decode("latin-1")[:64]
+                break
+        request_id = start_request(incoming)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (self.header_name, request_id.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_request_id)
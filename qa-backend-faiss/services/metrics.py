@@ -0,0 +1,211 @@
+import bisect
+import threading
+import time
+from typing import List, Dict, Tuple, Sequence
+
+# 단계별 지연 버킷 (초): 키워드 검색(ms 미만)부터 OpenAI 호출(수 초)까지
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(label_names: Sequence[str], label_values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """라벨별 누적 카운터"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def get(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Gauge(Counter):
+    """스크랩 시점에 값을 채우는 게이지 (캐시 적중률 등)"""
+
+    kind = "gauge"
+
+    def set(self, *label_values: str, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "start")
+
+    def __init__(self, histogram: "Histogram", label_values: Tuple[str, ...]):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+
+class Histogram:
+    """라벨별 누적 버킷 히스토그램 (관측 1회 = bisect 1번 + 리스트 갱신)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 → [버킷별 개수..., +Inf 개수, 합계]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(label_values)
+            if counts is None:
+                counts = self._values[label_values] = [0.0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def time(self, *label_values: str) -> _Timer:
+        """with 블록 실행 시간을 관측"""
+        return _Timer(self, label_values)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(counts)) for labels, counts in self._values.items())
+
+        lines = []
+        for labels, counts in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            cumulative += counts[len(self.buckets)]
+            bucket_labels = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {counts[-1]!r}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Prometheus 텍스트 형식으로 내보낼 메트릭 모음"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 📈 /ask 경로 메트릭 (모듈 전역: 어디서든 import 해서 기록)
+REGISTRY = MetricsRegistry()
+
+ASK_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "qa_ask_stage_seconds",
+    "Latency of each /ask stage (vehicle_mapping, retrieval, cleaning, llm, fallback, extractive, postprocess, serialization)",
+    ["stage"]
+))
+ASK_REQUESTS = REGISTRY.register(Counter(
+    "qa_ask_requests_total", "/ask requests by vehicle and outcome", ["vehicle", "outcome"]
+))
+ERRORS = REGISTRY.register(Counter(
+    "qa_errors_total", "Errors by stage", ["stage"]
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "qa_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"]
+))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "qa_cache_hit_ratio", "Cache hit ratio since startup", ["cache"]
+))
+RETRIEVAL_MODES = REGISTRY.register(Counter(
+    "qa_retrieval_mode_total", "/ask retrievals by conversation mode (stateless, new, followup, fallback)", ["mode"]
+))
+WARMUP_SECONDS = REGISTRY.register(Gauge(
+    "qa_warmup_step_seconds", "Duration of each startup warmup step", ["step"]
+))
+READY = REGISTRY.register(Gauge(
+    "qa_ready", "1 once startup warmup has finished (same as /ready)"
+))
+SUGGEST_SECONDS = REGISTRY.register(Histogram(
+    "qa_suggest_seconds", "Latency of /suggest prefix lookups",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005)
+))
+ADMISSION_DECISIONS = REGISTRY.register(Counter(
+    "qa_admission_decisions_total",
+    "/ask admission decisions by stage (admitted, queued, rejected, timeout)", ["stage", "decision"]
+))
+ADMISSION_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "qa_admission_wait_seconds", "Time spent waiting in an admission queue", ["stage"]
+))
+ADMISSION_IN_FLIGHT = REGISTRY.register(Gauge(
+    "qa_admission_in_flight", "Requests currently running per limited stage", ["stage"]
+))
+ADMISSION_QUEUED = REGISTRY.register(Gauge(
+    "qa_admission_queued", "Requests currently waiting per limited stage", ["stage"]
+))
+LOAD_SHED = REGISTRY.register(Counter(
+    "qa_load_shed_total", "/ask requests degraded or rejected under load by stage and action (extractive, rejected)",
+    ["stage", "action"]
+))
+SPELL_CORRECTIONS = REGISTRY.register(Counter(
+    "qa_spell_corrections_total", "Query terms replaced by a manual term before keyword scoring"
+))
+SEARCH_SECONDS = REGISTRY.register(Histogram(
+    "qa_search_seconds", "Latency of /search retrieval (without answer generation)"
+))
+ROUTER_REQUESTS = REGISTRY.register(Counter(
+    "qa_router_requests_total", "Routed requests by target node and outcome (ok, client_error, server_error, unavailable)",
+    ["node", "outcome"]
+))
+ROUTER_FAILOVERS = REGISTRY.register(Counter(
+    "qa_router_failovers_total", "Requests retried on the next owning node by reason (connect, not_ready)", ["reason"]
+))
+ROUTER_UPSTREAM_SECONDS = REGISTRY.register(Histogram(
+    "qa_router_upstream_seconds", "Latency of forwarded requests per routed endpoint", ["endpoint"]
+))
+ROUTER_NODE_HEALTHY = REGISTRY.register(Gauge(
+    "qa_router_node_healthy", "1 if the node passed its last /ready check", ["node"]
+))
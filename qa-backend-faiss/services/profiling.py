@@ -0,0 +1,178 @@
+import collections
+import contextvars
+import functools
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+from services.logging_config import fields, get_request_id
+
+logger = logging.getLogger(__name__)
+
+# 지금 프로파일링 중인 요청의 샘플러 (미들웨어가 설정, 요청 안에서 만든 태스크에도 복사됨)
+_active_sampler: contextvars.ContextVar[Optional["StackSampler"]] = contextvars.ContextVar(
+    "active_sampler", default=None
+)
+
+
+class StackSampler:
+    """지정한 스레드들의 콜스택을 일정 간격으로 샘플링해서 folded 형식으로 집계
+
+    스택 맨 앞에 스레드 이름을 붙여서 이벤트 루프와 워커 스레드 구간을 나눠 보여줍니다.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001, name: str = "event-loop"):
+        # 샘플링할 스레드 id → 이름 (요청이 스레드풀에 넘긴 작업은 실행 중에만 추가됨)
+        self._threads: Dict[int, str] = {thread_id: name}
+        self.interval = interval
+        self.stacks: Dict[str, int] = collections.Counter()
+        self.samples = 0
+        self._labels: Dict[object, str] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def add_thread(self, thread_id: int, name: str):
+        self._threads[thread_id] = name
+
+    def remove_thread(self, thread_id: int):
+        self._threads.pop(thread_id, None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, name in self._threads.copy().items():
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    stack.append(name)
+                    self.stacks[";".join(reversed(stack))] += 1
+                    self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path: Path):
+        """flamegraph.pl / speedscope / inferno에서 바로 읽는 'a;b;c 개수' 형식"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+def track_thread(func: Callable) -> Callable:
+    """스레드풀에 넘길 함수를 현재 요청 컨텍스트에서 실행하도록 감싸기
+
+    run_in_executor는 contextvar를 넘기지 않으므로 (요청 ID, 로그 샘플링 여부) 이벤트 루프에서
+    현재 컨텍스트를 복사해서 그 안에서 실행합니다. 프로파일링 중인 요청이면 실행 동안
+    워커 스레드도 샘플링 대상에 추가합니다.
+    """
+    context = contextvars.copy_context()
+    sampler = _active_sampler.get()
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        if sampler is None:
+            return context.run(func, *args, **kwargs)
+        thread_id = threading.get_ident()
+        sampler.add_thread(thread_id, threading.current_thread().name)
+        try:
+            return context.run(func, *args, **kwargs)
+        finally:
+            sampler.remove_thread(thread_id)
+
+    return run
+
+
+class ProfilingMiddleware:
+    """공유 비밀값이 맞는 요청만 프로파일링하는 ASGI 미들웨어
+
+    X-Profile-Token 헤더 또는 ?profile=<비밀값> 쿼리로 켭니다. 이벤트 루프 스레드와
+    이 요청이 track_thread로 넘긴 스레드풀 작업(검색, LLM 호출 등)을 샘플링합니다.
+    이벤트 루프에서는 같은 시간에 처리된 다른 요청의 스택도 함께 잡힐 수 있고,
+    한 번에 하나의 요청만 프로파일링합니다 (나머지는 평소대로 처리).
+    PROFILE_SECRET이 없으면 main에서 이 미들웨어를 아예 등록하지 않습니다.
+    """
+
+    header_name = b"x-profile-token"
+
+    def __init__(self, app, secret: str, output_dir: str = "./data/profiles",
+                 interval: float = 0.001, paths=("/ask",)):
+        self.app = app
+        self.secret = secret.encode("utf-8")
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.paths = set(paths)
+        self._busy = threading.Lock()
+
+    def _requested(self, scope) -> bool:
+        token = None
+        for name, value in scope.get("headers", []):
+            if name == self.header_name:
+                token = value
+                break
+        if token is None and scope.get("query_string"):
+            token = (parse_qs(scope["query_string"].decode("latin-1")).get("profile") or [""])[0].encode("latin-1")
+        return bool(token) and hmac.compare_digest(token, self.secret)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._busy.acquire(blocking=False):
+            logger.warning("⚠️ 다른 요청을 프로파일링 중이라 건너뜀", extra=fields(path=scope["path"]))
+            await self.app(scope, receive, send)
+            return
+
+        request_id = get_request_id()
+        profile_path = self.output_dir / f"{time.strftime('%Y%m%d-%H%M%S')}_{request_id}.folded"
+        sampler = StackSampler(threading.get_ident(), self.interval)
+
+        async def send_with_profile_path(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []),
+                                      (b"x-profile-path", profile_path.name.encode("latin-1"))]
+            await send(message)
+
+        start = time.perf_counter()
+        sampler.start()
+        token = _active_sampler.set(sampler)
+        try:
+            await self.app(scope, receive, send_with_profile_path)
+        finally:
+            _active_sampler.reset(token)
+            sampler.stop()
+            self._busy.release()
+            sampler.write_folded(profile_path)
+            logger.info("🔬 요청 프로파일 저장", extra=fields(
+                path=str(profile_path), samples=sampler.samples,
+                elapsed_ms=round((time.perf_counter() - start) * 1000, 1)
+            ))
+
+
+def install_profiler(app, secret: Optional[str], output_dir: str, interval_ms: float):
+    """비밀값이 설정된 경우에만 프로파일링 미들웨어 등록 (꺼져 있으면 요청 경로에 아무것도 추가하지 않음)"""
+    if not secret:
+        return False
+    app.add_middleware(ProfilingMiddleware, secret=secret, output_dir=output_dir,
+                       interval=interval_ms / 1000)
+    return True
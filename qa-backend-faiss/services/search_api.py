@@ -0,0 +1,72 @@
+import base64
+import binascii
+import hashlib
+import json
+from typing import List, Dict, Any, Optional
+
+from models.section_store import analyze
+
+
+def query_fingerprint(vehicle: str, query: str, min_score: float) -> str:
+    """같은 검색의 다음 페이지인지 확인용 (커서를 다른 질문에 쓰면 거절)"""
+    return hashlib.blake2b(f"{vehicle}\n{query}\n{min_score}".encode("utf-8"), digest_size=6).hexdigest()
+
+
+def encode_cursor(offset: int, fingerprint: str) -> str:
+    """다음 페이지 커서 (서버에 상태를 두지 않음: 다음 요청에서 같은 검색을 다시 실행해 offset부터 반환)"""
+    raw = json.dumps({"o": offset, "f": fingerprint}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], fingerprint: str) -> int:
+    """커서 → offset (없으면 0, 잘못됐거나 다른 검색의 커서면 ValueError)"""
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        offset = int(data["o"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError("잘못된 커서입니다.")
+    if data.get("f") != fingerprint or offset < 0:
+        raise ValueError("다른 검색의 커서입니다.")
+    return offset
+
+
+def make_snippet(content: str, terms: List[str], length: int = 200) -> str:
+    """본문 발췌 (질문 단어가 처음 나오는 곳 근처 length자)"""
+    text = " ".join(content.split())
+    if len(text) <= length:
+        return text
+
+    text_lower = text.lower()
+    positions = [position for position in (text_lower.find(term) for term in terms) if position >= 0]
+    start = max(0, min(positions) - length // 4) if positions else 0
+    end = min(len(text), start + length)
+    start = max(0, end - length)
+    return ("…" if start > 0 else "") + text[start:end] + ("…" if end < len(text) else "")
+
+
+def format_search_results(results: List[Dict[str, Any]], query: str, offset: int,
+                          content_mode: str = "snippet", snippet_chars: int = 200) -> List[Dict[str, Any]]:
+    """검색 결과 → /search 응답 항목 (content_mode: snippet / full / none)"""
+    terms = list(analyze(query)) if content_mode == "snippet" else []
+    items = []
+    for rank, result in enumerate(results, offset + 1):
+        item = {
+            "rank": rank,
+            "score": result["score"],
+            "section_id": result["section_id"],
+            "source": result["source"],
+            "section_number": result["section_number"],
+            "title": result["title"],
+            "page_range": result["page_range"],
+            "keywords": result["keywords"],
+            "match_details": result["match_details"]
+        }
+        if content_mode == "snippet":
+            item["snippet"] = make_snippet(result["content"], terms, snippet_chars)
+        elif content_mode == "full":
+            item["content"] = result["content"]
+        items.append(item)
+    return items
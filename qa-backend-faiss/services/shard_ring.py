@@ -0,0 +1,83 @@
+import bisect
+import hashlib
+import math
+from typing import List, Dict, Optional
+
+
+def parse_nodes(value: Optional[str]) -> List[str]:
+    """"http://127.0.0.1:8081,http://127.0.0.1:8082" → 노드 주소 목록 (끝의 / 제거, 중복 제거)"""
+    nodes = []
+    for part in (value or "").split(","):
+        node = part.strip().rstrip("/")
+        if node and node not in nodes:
+            nodes.append(node)
+    return nodes
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """차량 → 노드 consistent hash 링 (노드마다 가상 노드 vnodes개, 부하 상한 있음)
+
+    차량마다 링에서 시계 방향으로 만나는 서로 다른 노드 replicas개가 담당합니다
+    (첫 번째가 기본 노드, 나머지는 장애 시 넘겨받는 복제 노드). 차량이 7개뿐이라 해시만으로는
+    한 노드에 몰리기 쉬워서, 담당 수가 평균의 load_factor배(올림)에 찬 노드는 건너뜁니다 (consistent hashing
+    with bounded loads). 노드가 추가/제거되어도 대부분의 차량은 담당이 그대로이고, 라우터와 노드가
+    같은 노드 목록으로 같은 링을 만들므로 노드는 자기 담당 차량만 로드합니다.
+    """
+
+    def __init__(self, nodes: List[str], keys: List[str], vnodes: int = 64, replicas: int = 1,
+                 load_factor: float = 1.0):
+        self.nodes = list(nodes)
+        self.keys = list(keys)
+        self.replicas = max(1, min(replicas, len(self.nodes) or 1))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(max(1, vnodes)))
+        self._hashes = [point for point, _ in points]
+        self._points = [node for _, node in points]
+
+        # 기본 노드부터 한 단계씩, 키 해시 순서로 배정 (같은 노드 목록이면 어느 프로세스에서나 같은 결과)
+        self.load = {node: 0 for node in self.nodes}
+        self._owners: Dict[str, List[str]] = {key: [] for key in self.keys}
+        for step in range(1, self.replicas + 1):
+            capacity = math.ceil(len(self.keys) * step * load_factor / len(self.nodes)) if self.nodes else 0
+            for key in sorted(self.keys, key=_hash):
+                owners = self._owners[key]
+                # 남은 자리가 없으면 상한을 넘더라도 다음 노드에 배정
+                node = self._next(key, owners, capacity) or self._next(key, owners)
+                if node is not None:
+                    owners.append(node)
+                    self.load[node] += 1
+
+    def _next(self, key: str, exclude: List[str], capacity: Optional[int] = None) -> Optional[str]:
+        """링에서 key 다음에 오는 노드 (exclude 제외, capacity가 있으면 담당 수가 찬 노드도 제외)"""
+        if not self._points:
+            return None
+        start = bisect.bisect(self._hashes, _hash(key))
+        for i in range(len(self._points)):
+            node = self._points[(start + i) % len(self._points)]
+            if node not in exclude and (capacity is None or self.load[node] < capacity):
+                return node
+        return None
+
+    def owners(self, key: str) -> List[str]:
+        """key를 담당하는 노드 (우선순위 순서, 최대 replicas개)"""
+        owners = self._owners.get(key)
+        if owners is not None:
+            return list(owners)
+        owners = []
+        while len(owners) < self.replicas:
+            node = self._next(key, owners)
+            if node is None:
+                break
+            owners.append(node)
+        return owners
+
+    def assignments(self) -> Dict[str, List[str]]:
+        """key별 담당 노드"""
+        return {key: self.owners(key) for key in self.keys}
+
+    def shard(self, node: str) -> List[str]:
+        """node가 (기본 또는 복제로) 담당하는 key"""
+        return [key for key in self.keys if node in self._owners[key]]
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import time
+from typing import List, Dict, Any, Optional
+
+import httpx
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from services.logging_config import fields, get_request_id
+from services.metrics import ROUTER_REQUESTS, ROUTER_FAILOVERS, ROUTER_UPSTREAM_SECONDS, ROUTER_NODE_HEALTHY
+from services.shard_ring import HashRing
+
+logger = logging.getLogger(__name__)
+
+# 노드로 넘기는 요청 헤더 / 클라이언트로 돌려주는 응답 헤더 (압축된 본문은 풀지 않고 그대로 전달)
+FORWARD_REQUEST_HEADERS = ("content-type", "accept-encoding", "if-none-match")
+FORWARD_RESPONSE_HEADERS = ("content-type", "content-encoding", "vary", "etag", "cache-control",
+                            "retry-after", "x-answer-mode")
+
+# 연결 자체가 안 된 경우 (요청이 노드에 닿지 않음): 어떤 요청이든 다음 담당 노드로 재시도
+FAILOVER_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+# 요청을 보낸 뒤 연결이 끊긴 경우: 노드가 이미 처리했을 수 있어서 조회(GET)만 재시도
+# (/ask를 다시 보내면 LLM 답변을 두 번 생성)
+READ_FAILOVER_ERRORS = (httpx.RemoteProtocolError, httpx.ReadError)
+IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+
+class ShardRouter:
+    """차량별 담당 노드로 요청 전달 (keep-alive 연결 풀 + /ready 기반 장애 조치)
+
+    담당 노드는 HashRing 순서(기본 → 복제)로 시도하되 마지막 상태 확인에서 준비되지 않은
+    노드는 뒤로 미룹니다. 연결 실패나 503(워밍업 중)이면 다음 담당 노드로 넘기고, 실패한 노드는
+    다음 상태 확인에서 다시 준비될 때까지 뒤로 밀립니다. 요청을 보낸 뒤 연결이 끊기면 GET만
+    재시도하고 POST(/ask 등)는 502를 반환합니다. 응답 시간 초과는 노드가 이미 처리 중일 수
+    있어서 재시도하지 않고 504를 반환합니다.
+    """
+
+    def __init__(self, ring: HashRing, timeout: float = 60.0, connect_timeout: float = 1.0,
+                 max_connections: int = 200, health_interval: float = 2.0, health_timeout: float = 1.0):
+        self.ring = ring
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        # 첫 확인 전에는 정상으로 가정
+        self.healthy: Dict[str, bool] = {node: True for node in ring.nodes}
+        self.last_error: Dict[str, Optional[str]] = {node: None for node in ring.nodes}
+        self.last_checked: Optional[float] = None
+        self._health_task = None
+
+    async def start(self):
+        await self.check_health()
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self):
+        if self._health_task:
+            self._health_task.cancel()
+        await self.client.aclose()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.exception("❌ 노드 상태 확인 중 오류", extra=fields(error=str(e)))
+
+    async def check_health(self):
+        """모든 노드의 /ready를 동시에 확인"""
+        results = await asyncio.gather(*(self._check_node(node) for node in self.ring.nodes))
+        for node, (ready, error) in zip(self.ring.nodes, results):
+            if ready != self.healthy[node]:
+                logger.info(f"{'✅' if ready else '⚠️'} 노드 상태 변경: {node} → {'준비' if ready else '사용 불가'}",
+                            extra=fields(node=node, error=error))
+            self._set_health(node, ready, error)
+        self.last_checked = time.time()
+
+    async def _check_node(self, node: str):
+        try:
+            response = await self.client.get(f"{node}/ready", timeout=self.health_timeout)
+            return response.status_code == 200, None if response.status_code == 200 else f"HTTP {response.status_code}"
+        except httpx.HTTPError as e:
+            return False, type(e).__name__
+
+    def _set_health(self, node: str, ready: bool, error: Optional[str] = None):
+        self.healthy[node] = ready
+        self.last_error[node] = error
+        ROUTER_NODE_HEALTHY.set(node, value=1 if ready else 0)
+
+    def candidates(self, vehicle: str) -> List[str]:
+        """시도할 노드 순서 (준비된 담당 노드 먼저, 모두 실패 표시면 그래도 순서대로 시도)"""
+        owners = self.ring.owners(vehicle)
+        return [node for node in owners if self.healthy[node]] + [node for node in owners if not self.healthy[node]]
+
+    async def forward(self, vehicle: str, endpoint: str, method: str, path: str,
+                      headers: Dict[str, str], body: Optional[bytes] = None) -> Response:
+        """vehicle 담당 노드로 요청을 전달하고 응답을 그대로 반환 (path에는 쿼리 문자열 포함)"""
+        forward_headers = {name: value for name, value in headers.items() if name.lower() in FORWARD_REQUEST_HEADERS}
+        forward_headers["x-request-id"] = get_request_id()
+
+        nodes = self.candidates(vehicle)
+        last_response = None
+        for attempt, node in enumerate(nodes):
+            request = self.client.build_request(method, f"{node}{path}", headers=forward_headers, content=body)
+            try:
+                with ROUTER_UPSTREAM_SECONDS.time(endpoint):
+                    upstream = await self.client.send(request, stream=True)
+                    try:
+                        content = b"".join([chunk async for chunk in upstream.aiter_raw()])
+                    finally:
+                        await upstream.aclose()
+            except FAILOVER_ERRORS as e:
+                ROUTER_REQUESTS.inc(node, "unavailable")
+                self._set_health(node, False, type(e).__name__)
+                if attempt + 1 < len(nodes):
+                    ROUTER_FAILOVERS.inc("connect")
+                logger.warning(f"⚠️ 노드 연결 실패, 다음 담당 노드로: {node}",
+                               extra=fields(node=node, vehicle=vehicle, error=type(e).__name__))
+                continue
+            except READ_FAILOVER_ERRORS as e:
+                ROUTER_REQUESTS.inc(node, "unavailable")
+                self._set_health(node, False, type(e).__name__)
+                if method.upper() not in IDEMPOTENT_METHODS:
+                    logger.warning(f"⚠️ 노드 연결이 요청 처리 중 끊김 (재시도하지 않음): {node}",
+                                   extra=fields(node=node, vehicle=vehicle, error=type(e).__name__))
+                    raise HTTPException(status_code=502, detail=f"담당 노드 연결이 끊겼습니다 ({type(e).__name__})")
+                if attempt + 1 < len(nodes):
+                    ROUTER_FAILOVERS.inc("connect")
+                logger.warning(f"⚠️ 노드 연결 끊김, 다음 담당 노드로: {node}",
+                               extra=fields(node=node, vehicle=vehicle, error=type(e).__name__))
+                continue
+            except httpx.TimeoutException as e:
+                ROUTER_REQUESTS.inc(node, "timeout")
+                raise HTTPException(status_code=504, detail=f"담당 노드 응답 시간 초과 ({type(e).__name__})")
+
+            response = Response(content=content, status_code=upstream.status_code)
+            for name in FORWARD_RESPONSE_HEADERS:
+                if name in upstream.headers:
+                    response.headers[name] = upstream.headers[name]
+            response.headers["X-Shard-Node"] = node
+
+            status = upstream.status_code
+            ROUTER_REQUESTS.inc(node, "ok" if status < 400 else "client_error" if status < 500 else "server_error")
+            if status < 500 and not self.healthy[node]:
+                # 상태 확인 전이라도 정상 응답한 노드는 다시 앞으로
+                self._set_health(node, True)
+            if status == 503 and attempt + 1 < len(nodes):
+                # 워밍업 중이거나 답변 생성기가 없는 노드: 복제 노드로
+                self._set_health(node, False, "HTTP 503")
+                ROUTER_FAILOVERS.inc("not_ready")
+                last_response = response
+                continue
+            return response
+
+        if last_response is not None:
+            return last_response
+        raise HTTPException(status_code=503, detail="담당 노드에 연결할 수 없습니다. 잠시 후 다시 시도해주세요.",
+                            headers={"Retry-After": "1"})
+
+    async def fetch_json(self, node: str, path: str) -> Optional[Dict[str, Any]]:
+        """노드 조회용 GET (실패하면 None)"""
+        try:
+            response = await self.client.get(f"{node}{path}", timeout=self.health_timeout)
+            return response.json() if response.status_code == 200 else None
+        except (httpx.HTTPError, ValueError):
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "nodes": {
+                node: {
+                    "healthy": self.healthy[node],
+                    "last_error": self.last_error[node],
+                    "vehicles": self.ring.shard(node)
+                }
+                for node in self.ring.nodes
+            },
+            "replicas": self.ring.replicas,
+            "assignments": self.ring.assignments(),
+            "last_checked": self.last_checked
+        }
@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from models.content_pool import ContentPool
+from models.embedding_cache import content_hash
+from models.section_index import SectionIndex
+from services.logging_config import fields
+
+# 여러 워커가 동시에 publish하지 않도록 파일 잠금 (Windows 등 fcntl이 없으면 단일 프로세스 가정)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".lock"
+CONTENT_DIR = "content"  # 매뉴얼 인덱스들이 같이 쓰는 본문 pack
+
+
+class SharedIndexRegistry:
+    """uvicorn 워커들이 같이 쓰는 읽기 전용 섹션 인덱스 저장소
+
+    매뉴얼 JSON 하나당 인덱스를 한 번만 만들어 {root}/{내용 해시}/ 에 저장하고,
+    각 워커는 메모리 맵으로 붙기만 합니다 (본문 페이지는 OS 페이지 캐시에서 공유).
+    manifest.json은 파일별 인덱스와 차량별 현재 매뉴얼을 기록하고, 워커는 manifest
+    변경을 감지해서 다른 워커가 업로드한 매뉴얼로 교체합니다.
+    """
+
+    def __init__(self, root: str = "./data/shared", poll_interval: float = 1.0,
+                 vehicles: Optional[List[str]] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.root / MANIFEST_FILE
+        self.pool = ContentPool(self.root / CONTENT_DIR)
+        self.poll_interval = poll_interval
+        # 이 워커가 붙을 차량 (샤드 노드는 담당 차량만, None이면 전체)
+        self.vehicles = set(vehicles) if vehicles is not None else None
+
+        # 이 워커가 붙어 있는 인덱스: 차량 → (인덱스 디렉토리 이름, 원본 file_name, SectionIndex)
+        self.attached: Dict[str, Tuple[str, str, SectionIndex]] = {}
+        # 차량 → 붙어 있는 인덱스의 매뉴얼 파일 이름 (manifest의 vehicles 값)
+        self.sources: Dict[str, str] = {}
+        self._manifest_mtime = None
+        self._next_check = 0.0
+        self._refresh_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with open(self.root / LOCK_FILE, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"files": {}, "vehicles": {}}
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        tmp_path = self.manifest_path.with_name(f"{MANIFEST_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _build(self, json_data: Dict[str, Any]) -> str:
+        """인덱스 디렉토리 생성 (같은 내용이면 재사용)"""
+        name = content_hash(json_data.get("sections", []))[:16]
+        directory = self.root / name
+        if not directory.exists():
+            tmp_dir = self.root / f"{name}.{os.getpid()}.tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            SectionIndex.from_json(json_data).save(tmp_dir, self.pool)
+            os.replace(tmp_dir, directory)
+        return name
+
+    def _collect_garbage(self, manifest: Dict[str, Any]):
+        """manifest에서 빠진 인덱스 디렉토리와 남은 인덱스가 참조하지 않는 본문 pack 삭제
+        (이미 매핑한 워커는 계속 읽을 수 있음)"""
+        referenced = {entry["index"] for entry in manifest["files"].values()}
+        for path in self.root.iterdir():
+            if path.is_dir() and path.name != CONTENT_DIR and path.name not in referenced:
+                shutil.rmtree(path, ignore_errors=True)
+
+        live_packs = set()
+        for name in referenced:
+            try:
+                live_packs.update(SectionIndex.pack_names(self.root / name))
+            except FileNotFoundError:
+                # 읽을 수 없는 인덱스가 있으면 pack을 지우지 않음 (다음 publish 때 다시 정리)
+                return
+        self.pool.collect_garbage(live_packs)
+
+    def publish_file(self, vehicle: str, json_file: Path,
+                     json_data: Optional[Dict[str, Any]] = None) -> Optional[SectionIndex]:
+        """매뉴얼 파일의 인덱스를 (필요하면 만들어서) 공유하고 차량의 현재 매뉴얼로 지정
+
+        파일 크기/수정 시각이 manifest와 같으면 JSON을 다시 읽지 않습니다 (두 번째 워커부터).
+        """
+        json_file = Path(json_file)
+        stat = json_file.stat()
+
+        with self._locked():
+            manifest = self._read_manifest()
+            entry = manifest["files"].get(json_file.name)
+            fresh = entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and \
+                entry["size"] == stat.st_size and (self.root / entry["index"]).exists()
+
+            if not fresh:
+                if json_data is None:
+                    with open(json_file, "r", encoding="utf-8") as f:
+                        json_data = json.load(f)
+                if "sections" not in json_data:
+                    return None
+                entry = {
+                    "index": self._build(json_data),
+                    "file_name": json_data.get("file_name", ""),
+                    "sections": len(json_data["sections"]),
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "published_at": time.time()
+                }
+                manifest["files"][json_file.name] = entry
+                logger.info("📦 공유 인덱스 publish", extra=fields(
+                    vehicle=vehicle, file=json_file.name, index=entry["index"], sections=entry["sections"]
+                ))
+
+            changed = manifest["vehicles"].get(vehicle) != json_file.name
+            manifest["vehicles"][vehicle] = json_file.name
+            if changed or not fresh:
+                self._write_manifest(manifest)
+                self._collect_garbage(manifest)
+
+        return self._attach(vehicle, entry, json_file.name)
+
+    def _attach(self, vehicle: str, entry: Dict[str, Any], file_key: str) -> SectionIndex:
+        self.sources[vehicle] = file_key
+        current = self.attached.get(vehicle)
+        if current is not None and current[0] == entry["index"]:
+            return current[2]
+
+        # 이전 인덱스는 닫지 않음 (처리 중인 요청이 쓰고 있을 수 있음, 참조가 없어지면 해제)
+        index = SectionIndex.open(self.root / entry["index"], self.pool)
+        self.attached[vehicle] = (entry["index"], entry["file_name"], index)
+        return index
+
+    def refresh(self, force: bool = False) -> List[str]:
+        """manifest가 바뀌었으면 (다른 워커의 업로드) 바뀐 차량 인덱스로 교체, 바뀐 차량 목록 반환"""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return []
+        # 스레드풀의 다른 요청이 이미 확인 중이면 건너뜀
+        if not self._refresh_lock.acquire(blocking=False):
+            return []
+        try:
+            self._next_check = now + self.poll_interval
+            return self._refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self) -> List[str]:
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if mtime == self._manifest_mtime:
+            return []
+
+        manifest = self._read_manifest()
+        changed = []
+        for vehicle, file_key in manifest["vehicles"].items():
+            entry = manifest["files"].get(file_key)
+            current = self.attached.get(vehicle)
+            if entry is None or (current is not None and current[0] == entry["index"]):
+                continue
+            if self.vehicles is not None and vehicle not in self.vehicles:
+                continue
+            try:
+                self._attach(vehicle, entry, file_key)
+                changed.append(vehicle)
+            except OSError as e:
+                # 그 사이 더 새 버전으로 교체되어 삭제된 경우: 다음 확인 때 다시 시도
+                logger.warning("⚠️ 공유 인덱스 연결 실패", extra=fields(vehicle=vehicle, error=str(e)))
+                return changed
+
+        self._manifest_mtime = mtime
+        return changed
+
+    def get(self, vehicle: str) -> Optional[Tuple[str, SectionIndex]]:
+        """차량의 (원본 file_name, 인덱스)"""
+        current = self.attached.get(vehicle)
+        return (current[1], current[2]) if current else None
+
+    def source_file(self, vehicle: str) -> Optional[str]:
+        """차량에 붙어 있는 인덱스를 만든 매뉴얼 파일 이름 (processed 디렉토리 기준)"""
+        return self.sources.get(vehicle)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "root": str(self.root),
+            "content_pool": self.pool.get_stats(),
+            "attached": {vehicle: name for vehicle, (name, _, _) in self.attached.items()}
+        }
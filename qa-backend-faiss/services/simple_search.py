@@ -1,98 +1,174 @@
 import json
-import re
-from typing import List, Dict, Any
+import logging
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+from models.section_index import SectionIndex
+from models.section_store import analyze
+from models.spell_index import SpellIndex
+from services.logging_config import fields, is_sampled, log_sampled
+from services.metrics import SPELL_CORRECTIONS
+
+logger = logging.getLogger(__name__)
+
+# 주제와 상관없이 여러 섹션 제목에 나오는 질문 의도 단어 (조사를 떼면 "점검은" → "점검"으로 제목에 일치)
+INTENT_WORDS = {"점검", "확인", "교체", "주기", "방법", "사용법", "주의사항", "관리", "절차", "문제"}
+
 class SimpleSearchService:
     def __init__(self, data_path: str = "./data/processed/"):
         self.data_path = Path(data_path)
         self.documents = []
         self.sections_data = []
+        self.index: Optional[SectionIndex] = None
+        self.spell_index: Optional[SpellIndex] = None
         
     def add_document(self, json_data: Dict[str, Any]):
         """새 JSON 문서 추가"""
         if "sections" not in json_data:
-            print("❌ sections 필드가 없습니다.")
+            logger.error("❌ sections 필드가 없습니다.")
             return
             
-        self.documents = [json_data]
         vehicle_name = self._extract_vehicle_name_from_data(json_data)
         sections_count = len(json_data.get("sections", []))
         
-        print(f"📄 {vehicle_name} 매뉴얼 추가: {sections_count}개 섹션")
+        logger.info("📄 매뉴얼 추가", extra=fields(vehicle=vehicle_name, sections=sections_count))
         
         # 섹션 데이터 준비
-        self._prepare_sections_data(json_data)
+        self.attach_index(SectionIndex.from_json(json_data), json_data.get("file_name", ""))
     
-    def _prepare_sections_data(self, json_data: Dict[str, Any]):
-        """섹션 데이터를 검색 가능한 형태로 준비"""
-        self.sections_data = []
-        
-        for section in json_data.get("sections", []):
-            section_data = {
-                "source": json_data.get("file_name", "unknown"),
-                "section_number": section.get("section_number", ""),
-                "title": section.get("title", ""),
-                "page_range": section.get("page_range", ""),
-                "content": section.get("content", ""),
-                "keywords": section.get("keywords", []),
-                "subsections": section.get("subsections", [])
-            }
-            self.sections_data.append(section_data)
-        
-        print(f"✅ {len(self.sections_data)}개 섹션 데이터 준비 완료")
+    def attach_index(self, index: SectionIndex, file_name: str):
+        """미리 만든 섹션 인덱스 사용 (공유 메모리 맵 인덱스 포함, 원본 JSON은 보관하지 않음)"""
+        self.index = index
+        self.spell_index = SpellIndex.from_section_index(index)  # 워밍업이나 첫 검색 때 생성
+        self.documents = [{"file_name": file_name}]
+        self.sections_data = index.records
+        logger.debug("✅ 섹션 데이터 준비 완료", extra=fields(sections=len(self.sections_data)))
     
-    def search_sections(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """키워드 기반 섹션 검색"""
+    def search_sections(self, query: str, k: int = 5, candidates: Optional[List[int]] = None,
+                        context_terms: Optional[List[str]] = None, min_score: float = 0.05) -> List[Dict[str, Any]]:
+        """키워드 기반 섹션 검색 (candidates: 이 섹션 번호만 채점, context_terms: 이전 대화 턴의 검색어로 질문 확장,
+        min_score: 이 점수를 넘는 섹션만 반환)"""
         
         if not self.documents or not self.sections_data:
-            print("⚠️ 로드된 문서나 섹션 데이터가 없습니다")
+            logger.warning("⚠️ 로드된 문서나 섹션 데이터가 없습니다")
             return []
         
-        vehicle_name = self._extract_vehicle_name_from_data(self.documents[0])
-        print(f"🔍 {vehicle_name} 매뉴얼 키워드 검색 시작: '{query}'")
-        
-        search_results = []
+        # 질문 토큰/조건은 한 번만 계산
+        query_terms = self._prepare_query(query, context_terms)
+        index = self.index
+        matches = []
         
         # 각 섹션에 대해 점수 계산
-        for section_data in self.sections_data:
-            scores = self._calculate_all_scores(query, section_data)
+        indices = range(len(self.sections_data)) if candidates is None else sorted(candidates)
+        for idx in indices:
+            section_data = self.sections_data[idx]
+            scores = self._calculate_all_scores(query_terms, index, idx, section_data)
             total_score = self._calculate_total_score(scores)
             
-            if total_score > 0.05:  # 임계값
-                search_results.append({
-                    "score": total_score,
-                    "source": section_data["source"],
-                    "section_number": section_data["section_number"],
-                    "title": section_data["title"],
-                    "page_range": section_data["page_range"],
-                    "content": section_data["content"],
-                    "keywords": section_data["keywords"],
-                    "subsections": section_data["subsections"],
-                    "match_details": {
-                        "title_score": round(scores["title"], 3),
-                        "keyword_score": round(scores["keyword"], 3),
-                        "content_score": round(scores["content"], 3),
-                        "bonus_score": round(scores["bonus"], 3)
-                    }
-                })
-        
-        # 점수순 정렬
-        search_results.sort(key=lambda x: x["score"], reverse=True)
-        
-        print(f"📊 {vehicle_name} 검색 결과: {len(search_results)}개 섹션 (키워드 매칭)")
-        for i, result in enumerate(search_results[:3]):
-            print(f"  {i+1}. [{result['score']:.3f}] {result['title']} (페이지 {result['page_range']})")
-        
-        return search_results[:k]
+            if total_score > min_score:  # 임계값
+                matches.append((total_score, idx, scores))
+        
+        # 점수순 정렬 (동점은 섹션 순서 유지)
+        matches.sort(key=lambda x: x[0], reverse=True)
+        
+        # 결과 dict(본문 디코딩 포함)는 반환할 섹션만 생성
+        search_results = []
+        for total_score, idx, scores in matches[:k]:
+            section_data = self.sections_data[idx]
+            search_results.append({
+                "score": total_score,
+                "section_id": idx,
+                "source": section_data["source"],
+                "section_number": section_data["section_number"],
+                "title": section_data["title"],
+                "page_range": section_data["page_range"],
+                "content": index.content(idx),
+                "content_key": index.content_key(idx),
+                "keywords": section_data["keywords"],
+                "subsections": section_data["subsections"],
+                "match_details": {
+                    "title_score": round(scores["title"], 3),
+                    "keyword_score": round(scores["keyword"], 3),
+                    "content_score": round(scores["content"], 3),
+                    "bonus_score": round(scores["bonus"], 3)
+                }
+            })
+        
+        # 질문별 상세 로그는 샘플링된 요청만 (top-3 요약도 그때만 만듦)
+        if is_sampled():
+            log_sampled(
+                logger, "📊 키워드 검색 완료",
+                vehicle=self._extract_vehicle_name_from_data(self.documents[0]),
+                query=query,
+                matched=len(matches),
+                top=[(round(r["score"], 3), r["title"], r["page_range"]) for r in search_results[:3]]
+            )
+        
+        return search_results
     
-    def _calculate_all_scores(self, query: str, section_data: Dict) -> Dict[str, float]:
+    def term_coverage(self, terms: List[str], candidates: List[int]) -> float:
+        """검색어 중 후보 섹션(제목/키워드/본문)에 나오는 비율 (후속 질문이 이전 주제에서 벗어났는지 판단)"""
+        if not terms:
+            return 1.0
+
+        remaining = {term: term.lower().encode("utf-8") for term in terms}
+        for idx in candidates:
+            section_data = self.sections_data[idx]
+            text = " ".join([section_data["title"], *(section_data["keywords"] or [])]).lower()
+            content_lower = self.index.content_lower_bytes(idx)
+            for term, encoded in list(remaining.items()):
+                if term in text or encoded in content_lower:
+                    del remaining[term]
+            if not remaining:
+                break
+
+        return 1.0 - len(remaining) / len(terms)
+
+    def _prepare_query(self, query: str, context_terms: Optional[List[str]] = None) -> Dict[str, Any]:
+        """질문에서 섹션마다 반복하던 계산을 미리 수행"""
+        query_lower = query.lower()
+        tokens = self._tokenize(query)
+
+        # 매뉴얼에 없는 단어는 가장 가까운 매뉴얼 단어로 교정 ("타이여" → "타이어")
+        corrections = self._correct_tokens(tokens)
+        if corrections:
+            tokens = [corrections.get(token, token) for token in tokens]
+            query_lower = " ".join([query_lower, *corrections.values()])
+            SPELL_CORRECTIONS.inc(amount=len(corrections))
+            log_sampled(logger, "✏️ 검색어 오타 교정", corrections=corrections)
+        if context_terms:
+            tokens = tokens + [term for term in context_terms if term not in tokens]
+            query_lower = " ".join([query_lower, *context_terms])
+        return {
+            "lower": query_lower,
+            "tokens": tokens,
+            "token_set": set(tokens),
+            # 본문은 UTF-8 바이트로 검색하므로 토큰도 인코딩
+            "encoded": [(word, word.lower().encode("utf-8")) for word in tokens],
+            "procedure": any(word in query_lower for word in ["방법", "절차", "어떻게", "how"]),
+            "problem": any(word in query_lower for word in ["문제", "오류", "고장", "안됨", "작동"])
+        }
+    
+    def _correct_tokens(self, tokens: List[str]) -> Dict[str, str]:
+        """오타로 보이는 토큰 → 교정된 매뉴얼 단어 (SymSpell 사전 조회, 교정할 것이 없으면 빈 dict)"""
+        if self.spell_index is None:
+            return {}
+        corrections = {}
+        for token in tokens:
+            corrected = self.spell_index.correct(token)
+            if corrected:
+                corrections[token] = corrected
+        return corrections
+
+    def _calculate_all_scores(self, query_terms: Dict[str, Any], index: SectionIndex, idx: int,
+                              section_data: Dict) -> Dict[str, float]:
         """모든 점수 계산"""
         return {
-            "title": self._calculate_title_score(query, section_data["title"]),
-            "keyword": self._calculate_keyword_score(query, section_data["keywords"]),
-            "content": self._calculate_content_score(query, section_data["content"]),
-            "bonus": self._calculate_bonus_score(query, section_data)
+            "title": self._calculate_title_score(query_terms, index.title_tokens[idx]),
+            "keyword": self._calculate_keyword_score(query_terms, section_data["keywords"]),
+            "content": self._calculate_content_score(query_terms, index.content_lower_bytes(idx),
+                                                     section_data["content_length"]),
+            "bonus": self._calculate_bonus_score(query_terms, section_data)
         }
     
     def _calculate_total_score(self, scores: Dict[str, float]) -> float:
@@ -100,107 +176,87 @@ class SimpleSearchService:
         return (scores["title"] * 0.4) + (scores["keyword"] * 0.3) + \
                (scores["content"] * 0.2) + (scores["bonus"] * 0.1)
     
-    def _calculate_title_score(self, query: str, title: str) -> float:
-        """제목 매칭 점수"""
-        if not title:
+    def _calculate_title_score(self, query_terms: Dict[str, Any], title_words: frozenset) -> float:
+        """제목 매칭 점수 (제목 토큰은 인덱스 생성 시 고유 제목마다 한 번 계산)"""
+        if not title_words:
             return 0
         
-        query_words = set(self._tokenize(query))
-        title_words = set(self._tokenize(title))
+        query_words = query_terms["token_set"]
         
-        # 완전 매칭
-        exact_matches = len(query_words.intersection(title_words))
-        
-        # 부분 매칭
-        partial_matches = 0
+        total_matches = 0
         for q_word in query_words:
+            # 질문 의도 단어(점검/교체/주기...)는 여러 제목에 나오므로 절반만 (주제어보다 앞서지 않도록)
+            weight = 0.5 if q_word in INTENT_WORDS else 1.0
+            # 완전 매칭 (부분 매칭도 성립: 1 + 0.5)
+            if q_word in title_words:
+                total_matches += 1.5 * weight
+                continue
+            # 부분 매칭
             for t_word in title_words:
                 if q_word in t_word or t_word in q_word:
-                    partial_matches += 0.5
+                    total_matches += 0.5 * weight
                     break
         
-        total_matches = exact_matches + partial_matches
         return min(total_matches / max(len(query_words), 1), 1.0)
     
-    def _calculate_keyword_score(self, query: str, keywords: List[str]) -> float:
+    def _calculate_keyword_score(self, query_terms: Dict[str, Any], keywords: List[str]) -> float:
         """키워드 매칭 점수"""
         if not keywords:
             return 0
         
-        query_lower = query.lower()
+        query_lower = query_terms["lower"]
         matches = 0
         
         for keyword in keywords:
             keyword_lower = keyword.lower()
             if keyword_lower in query_lower:
                 matches += 1
-            elif any(word in keyword_lower for word in self._tokenize(query)):
+            elif any(word in keyword_lower for word in query_terms["tokens"]):
                 matches += 0.5
         
         return min(matches / max(len(keywords), 1), 1.0)
     
-    def _calculate_content_score(self, query: str, content: str) -> float:
-        """콘텐츠 매칭 점수"""
-        if not content:
+    def _calculate_content_score(self, query_terms: Dict[str, Any], content_lower: bytes,
+                                 content_length: int) -> float:
+        """콘텐츠 매칭 점수 (소문자 본문 UTF-8 바이트에서 개수 세기 = str에서 세는 것과 같은 결과)"""
+        if not content_length:
             return 0
         
-        content_lower = content.lower()
-        query_words = self._tokenize(query)
-        
         # 단어별 매칭 횟수 계산
         total_matches = 0
-        for word in query_words:
+        for word, encoded in query_terms["encoded"]:
             # 완전 매칭
-            exact_count = content_lower.count(word.lower())
+            exact_count = content_lower.count(encoded)
             total_matches += exact_count
             
-            # 부분 매칭 (길이 3 이상인 단어만)
+            # 부분 매칭 (길이 3 이상인 단어만, 겹치지 않는 출현 수라 완전 매칭 수와 같음)
             if len(word) >= 3:
-                partial_count = len(re.findall(rf'{re.escape(word.lower())}', content_lower))
-                total_matches += partial_count * 0.5
+                total_matches += exact_count * 0.5
         
         # 콘텐츠 길이로 정규화
-        content_length = len(content)
-        if content_length > 0:
-            return min(total_matches / (content_length / 100), 1.0)
-        
-        return 0
+        return min(total_matches / (content_length / 100), 1.0)
     
-    def _calculate_bonus_score(self, query: str, section: Dict) -> float:
-        """보너스 점수"""
-        content = section.get("content", "").lower()
-        title = section.get("title", "").lower()
-        query_lower = query.lower()
+    def _calculate_bonus_score(self, query_terms: Dict[str, Any], section: Dict) -> float:
+        """보너스 점수 (섹션 쪽 조건은 인덱스 생성 시 미리 계산)"""
         bonus = 0
         
         # 방법, 절차 관련 보너스
-        if any(word in query_lower for word in ["방법", "절차", "어떻게", "how"]):
-            if any(word in content for word in ["방법", "절차", "단계", "하십시오", "순서"]):
-                bonus += 0.3
+        if query_terms["procedure"] and section["procedure"]:
+            bonus += 0.3
         
         # 문제 해결 관련 보너스
-        if any(word in query_lower for word in ["문제", "오류", "고장", "안됨", "작동"]):
-            if any(word in content for word in ["점검", "확인", "교체", "정비", "수리"]):
-                bonus += 0.2
+        if query_terms["problem"] and section["problem"]:
+            bonus += 0.2
         
         # 제목에 중요 키워드가 있는 경우
-        if any(word in title for word in ["안전", "주의", "경고", "중요"]):
+        if section["important_title"]:
             bonus += 0.1
         
         return min(bonus, 1.0)
     
     def _tokenize(self, text: str) -> List[str]:
-        """텍스트를 토큰으로 분리"""
-        if not text:
-            return []
-        
-        # 한글, 영문, 숫자만 추출
-        tokens = re.findall(r'[가-힣a-zA-Z0-9]+', text.lower())
-        
-        # 길이 1인 토큰 제거 (단, 숫자는 유지)
-        tokens = [token for token in tokens if len(token) > 1 or token.isdigit()]
-        
-        return tokens
+        """텍스트를 토큰으로 분리 (한글, 영문, 숫자만 추출 / 길이 1인 토큰 제거, 숫자는 유지 / 조사·어미 제거, 결과 캐시)"""
+        return list(analyze(text))
     
     def _extract_vehicle_name_from_data(self, json_data: Dict[str, Any]) -> str:
         """JSON 데이터에서 차량명 추출"""
@@ -0,0 +1,60 @@
+from typing import List, Optional
+
+# 프론트엔드와 백엔드 차량명 매핑
+VEHICLE_MAPPING = {
+    "GRANDEUR": "그랜저",
+    "SANTAFE": "싼타페",
+    "SONATA": "쏘나타",
+    "AVANTE": "아반떼",
+    "KONA": "코나",
+    "TUCSON": "투싼",
+    "PALISADE": "펠리세이드"
+}
+
+# 백엔드 -> 프론트엔드 (역방향 매핑)
+REVERSE_VEHICLE_MAPPING = {v: k for k, v in VEHICLE_MAPPING.items()}
+
+# 지원하는 차량 목록 (백엔드 기준)
+SUPPORTED_VEHICLES = [
+    "그랜저", "싼타페", "쏘나타", "아반떼", "코나", "투싼", "펠리세이드"
+]
+
+# 파일명에 쓰이는 영문 차량명
+ENGLISH_NAMES = {
+    "그랜저": ["grandeur", "granzer"],
+    "싼타페": ["santafe", "santa"],
+    "쏘나타": ["sonata"],
+    "아반떼": ["avante", "elantra"],
+    "코나": ["kona"],
+    "투싼": ["tucson"],
+    "펠리세이드": ["palisade"]
+}
+
+# 프론트엔드에 보낼 차량 목록 (영문)
+FRONTEND_VEHICLES: List[str] = list(VEHICLE_MAPPING.keys())
+
+
+def map_vehicle_to_backend(frontend_vehicle: str) -> str:
+    """프론트엔드 차량명을 백엔드 차량명으로 매핑"""
+    return VEHICLE_MAPPING.get(frontend_vehicle, frontend_vehicle)
+
+
+def map_vehicle_to_frontend(backend_vehicle: str) -> str:
+    """백엔드 차량명을 프론트엔드 차량명으로 매핑"""
+    return REVERSE_VEHICLE_MAPPING.get(backend_vehicle, backend_vehicle)
+
+
+def extract_vehicle_name(filename: str) -> Optional[str]:
+    """파일명에서 차량명 추출 (간단 버전: 매뉴얼 JSON, 벡터 메타데이터의 source 공용)"""
+    filename_lower = filename.lower()
+
+    for vehicle in SUPPORTED_VEHICLES:
+        if vehicle in filename_lower:
+            return vehicle
+
+        # 영문명도 확인
+        for eng_name in ENGLISH_NAMES.get(vehicle, []):
+            if eng_name in filename_lower:
+                return vehicle
+
+    return None
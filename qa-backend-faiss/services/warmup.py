@@ -0,0 +1,134 @@
+import importlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+from services.logging_config import fields
+from services.metrics import WARMUP_SECONDS, READY
+
+logger = logging.getLogger(__name__)
+
+# 워밍업 때 재생할 대표 질문 (WARMUP_QUERIES로 교체, 빈 값이면 재생하지 않음)
+DEFAULT_WARMUP_QUERIES = [
+    "타이어 공기압 확인 방법",
+    "엔진오일 교체 주기는?",
+    "경고등이 켜졌어요",
+    "배터리 방전되면 어떻게 해야 하나요",
+    "스마트 키 사용법",
+]
+
+
+def parse_warmup_queries(value: Optional[str]) -> List[str]:
+    """WARMUP_QUERIES 환경 변수 ('|'로 구분) → 질문 목록, 설정하지 않으면 기본 목록"""
+    if value is None:
+        return list(DEFAULT_WARMUP_QUERIES)
+    return [query.strip() for query in value.split("|") if query.strip()]
+
+
+class WarmupState:
+    """워밍업 진행 상태 (/ready 응답): pending → running → ready / failed"""
+
+    def __init__(self):
+        self.status = "pending"
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        READY.set(value=0.0)
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def start(self):
+        self.status = "running"
+        self.started_at = time.time()
+
+    def finish(self, error: Optional[str] = None):
+        self.finished_at = time.time()
+        self.error = error
+        self.status = "failed" if error else "ready"
+        READY.set(value=1.0 if self.ready else 0.0)
+
+    @contextmanager
+    def step(self, name: str):
+        """단계별 소요 시간 기록, 단계가 실패해도 다음 단계는 계속 (LLM 연결 실패는 요청 처리 때 다시 시도됨)"""
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except Exception as e:
+            status = f"error: {e}"
+            logger.warning("⚠️ 워밍업 단계 실패", extra=fields(step=name, error=str(e)))
+        finally:
+            elapsed = time.perf_counter() - start
+            WARMUP_SECONDS.set(name, value=elapsed)
+            with self._lock:
+                self.steps[name] = {"status": status, "ms": round(elapsed * 1000, 1)}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = dict(self.steps)
+        elapsed = None
+        if self.started_at:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {
+            "ready": self.ready,
+            "status": self.status,
+            "error": self.error,
+            "elapsed_seconds": elapsed,
+            "steps": steps
+        }
+
+
+def run_warmup(state: WarmupState, search_services: Dict[str, Any], answer_generator,
+               answer_cache=None, queries: Optional[List[str]] = None, replay: bool = True,
+               sentence_indexes: Optional[Dict[str, Any]] = None):
+    """콜드 스타트 워밍업 (스레드풀에서 실행: 모두 동기 작업)
+
+    1. imports: 요청 경로에서 처음 import 되는 모듈 미리 로드
+    2. llm_connection: OpenAI 클라이언트 생성 + TLS 연결 열기
+    3. indexes: 차량별로 한 번씩 검색 (메모리 맵 본문 페이지 / 임베딩 로드) + 오타 교정 사전 / 추출형 답변용 문장 인덱스 생성
+    4. caches: 답변 캐시 인코더로 질문 인코딩
+    5. replay: 대표 질문을 차량별 검색 + 답변 후처리까지 실행 (LLM 호출은 하지 않음)
+    """
+    queries = queries or []
+
+    with state.step("imports"):
+        if answer_generator.openai_available:
+            importlib.import_module("openai")
+
+    with state.step("llm_connection"):
+        answer_generator.warmup_connection()
+
+    probe = queries[0] if queries else DEFAULT_WARMUP_QUERIES[0]
+    with state.step("indexes"):
+        for search_service in list(search_services.values()):
+            search_service.search_sections(probe, k=3)
+            # 오타 교정 사전 (키워드 검색 서비스만)
+            spell_index = getattr(search_service, "spell_index", None)
+            if spell_index is not None:
+                spell_index.build()
+        for sentence_index in list((sentence_indexes or {}).values()):
+            sentence_index.build()
+
+    if answer_cache:
+        with state.step("caches"):
+            for query in queries or [probe]:
+                answer_cache.encode(query)
+
+    if replay and queries:
+        with state.step("replay"):
+            for search_service in list(search_services.values()):
+                for query in queries:
+                    results = search_service.search_sections(query, k=3)
+                    if results:
+                        answer_generator.warmup_postprocess(results[0])
+
+    logger.info("🔥 워밍업 완료", extra=fields(
+        vehicles=len(search_services), queries=len(queries),
+        steps={name: step["ms"] for name, step in state.steps.items()}
+    ))